@@ -0,0 +1,128 @@
+"""Repeat-scan benchmark for the raw-sample columnar cache.
+
+Builds a synthetic heart_rate day file, then times summing its values three ways:
+
+- ``jsonl``: stream the raw file and ``json.loads`` every line (the cache-disabled path)
+- ``build``: the one-time columnar build on the first full scan
+- ``cached``: later scans served from the mmap'd columnar file
+
+Run from the repository root:
+
+    uv run python benchmarks/columnar_cache.py --records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import math
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from nucleus_apple_mcp.tools import health
+
+
+class _MemoryBackend:
+    def __init__(self, objects: dict[str, bytes]) -> None:
+        self.objects = objects
+
+    @property
+    def backend(self) -> str:
+        return "memory"
+
+    def read_bytes(self, relpath: str) -> bytes:
+        try:
+            return self.objects[relpath]
+        except KeyError as exc:
+            raise health._DataNotFound(relpath) from exc
+
+    def iter_bytes(self, relpath: str) -> Iterator[bytes]:
+        raw = self.read_bytes(relpath)
+        for start in range(0, len(raw), 1 << 16):
+            yield raw[start : start + (1 << 16)]
+
+    def read_range(self, relpath: str, start: int, end: int) -> bytes:
+        return self.read_bytes(relpath)[start:end]
+
+
+def _day_file(records: int) -> bytes:
+    lines = []
+    for index in range(records):
+        second = index * 86_400 // records
+        stamp = f"2026-03-08T{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}+08:00"
+        lines.append(
+            json.dumps(
+                {
+                    "record": "sample",
+                    "kind": "quantity",
+                    "key": "heart_rate",
+                    "uuid": f"00000000-0000-0000-0000-{index:012d}",
+                    "start": stamp,
+                    "end": stamp,
+                    "value": 55 + index % 90,
+                    "unit": "count/min",
+                    "source_name": "Apple Watch" if index % 7 else "iPhone",
+                    "source_bundle_id": "com.apple.health",
+                    "device_model": "Watch",
+                }
+            )
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _scan(backend: _MemoryBackend, cache_root: Path | None, type_info: dict[str, object]) -> float:
+    total = 0.0
+    for _, _, value, _, _ in health._iter_sample_points(
+        backend,
+        health._RawPackReader(backend, end=dt.date(2026, 3, 8)),
+        cache_root,
+        date=dt.date(2026, 3, 8),
+        type_key="heart_rate",
+        type_info=type_info,
+        commit_id="20260308T091230Z-A1B2C3",
+        with_components=False,
+    ):
+        if value is not None and not math.isnan(value):
+            total += value
+    return total
+
+
+def _best_of(repeat: int, run: Callable[[], float]) -> tuple[float, float]:
+    best = math.inf
+    result = 0.0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    relpath = "health/raw/dates/2026-03-08/types/heart_rate.jsonl"
+    backend = _MemoryBackend({relpath: _day_file(args.records)})
+    type_info = {"status": "ok", "record_count": args.records, "relpath": relpath}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_root = Path(cache_dir)
+        jsonl_s, expected = _best_of(args.repeat, lambda: _scan(backend, None, type_info))
+        build_s, built = _best_of(1, lambda: _scan(backend, cache_root, type_info))
+        cached_s, cached = _best_of(args.repeat, lambda: _scan(backend, cache_root, type_info))
+    assert expected == built == cached
+
+    print(f"records: {args.records}")
+    print(f"jsonl scan:   {jsonl_s * 1000:9.1f} ms")
+    print(f"cache build:  {build_s * 1000:9.1f} ms (first scan)")
+    print(f"cached scan:  {cached_s * 1000:9.1f} ms")
+    print(f"speedup:      {jsonl_s / cached_s:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
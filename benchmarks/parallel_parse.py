@@ -0,0 +1,67 @@
+"""Crossover benchmark for parsing raw type files on the worker pool.
+
+Times the columnar build (parse, merge, serialize) of synthetic heart_rate files inline and on
+the spawned parse pool, for a range of record counts. The pool is started and warmed before
+timing, as it is in a long-running server. ``_PARALLEL_PARSE_MIN_RECORDS`` should sit where the
+pool starts winning.
+
+Run from the repository root:
+
+    uv run python benchmarks/parallel_parse.py --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from collections.abc import Callable
+
+from columnar_cache import _day_file
+
+from nucleus_apple_mcp.tools import health
+
+_META = {"version": 1, "commit_id": "bench", "relpath": "bench", "type_key": "heart_rate"}
+
+
+def _best_of(repeat: int, run: Callable[[], bytes]) -> tuple[float, bytes]:
+    best = float("inf")
+    result = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _build(lines: list[bytes], *, parallel: bool) -> bytes:
+    health._PARALLEL_PARSE_MIN_RECORDS = 0 if parallel else len(lines) + 1
+    return health._build_columnar(lambda: (line for line in lines), meta=_META, record_count=len(lines))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 8))
+    parser.add_argument("--records", type=int, nargs="+", default=[5_000, 10_000, 20_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["NUCLEUS_HEALTH_PARSE_WORKERS"] = str(args.workers)
+    health._parse_workers.cache_clear()
+    health._parse_pool.cache_clear()
+    if health._parse_pool() is None:
+        raise SystemExit("the parse pool needs at least 2 workers")
+    _build(_day_file(1_000).splitlines(), parallel=True)
+
+    print(f"workers: {args.workers}")
+    print(f"{'records':>9} {'inline ms':>10} {'pool ms':>10} {'speedup':>8}")
+    for records in args.records:
+        lines = _day_file(records).splitlines()
+        inline_s, inline = _best_of(args.repeat, lambda: _build(lines, parallel=False))
+        pool_s, pooled = _best_of(args.repeat, lambda: _build(lines, parallel=True))
+        assert inline == pooled
+        print(f"{records:>9} {inline_s * 1000:>10.1f} {pool_s * 1000:>10.1f} {inline_s / pool_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -154,22 +154,26 @@ def _common_parameters() -> list[inspect.Parameter]:
     ]
 
 
+def _exit_with_error(exc: Exception, *, pretty: bool) -> None:
+    _dump_json(
+        {
+            "ok": False,
+            "error": {
+                "type": exc.__class__.__name__,
+                "message": str(exc),
+            },
+        },
+        pretty=pretty,
+        stream=sys.stderr,
+    )
+    raise typer.Exit(code=1) from exc
+
+
 async def _invoke_tool(tool: Any, arguments: dict[str, Any], *, pretty: bool) -> None:
     try:
         result = await tool.run(arguments)
     except (ToolError, ValidationError, ValueError) as exc:
-        _dump_json(
-            {
-                "ok": False,
-                "error": {
-                    "type": exc.__class__.__name__,
-                    "message": str(exc),
-                },
-            },
-            pretty=pretty,
-            stream=sys.stderr,
-        )
-        raise typer.Exit(code=1) from exc
+        _exit_with_error(exc, pretty=pretty)
 
     payload = result.structured_content if result.structured_content is not None else result.content
     _dump_json(payload, pretty=pretty)
@@ -203,6 +207,25 @@ def _make_tool_callback(tool: Any) -> Any:
     return callback
 
 
+def _add_health_operator_commands(health_app: typer.Typer) -> None:
+    @health_app.command(
+        "compact-raw-month",
+        help="Operator command: pack one finished month of raw JSONL files into per-type objects with an offset index.",
+    )
+    def compact_raw_month(
+        month: str = typer.Option(..., "--month", help="Finished month to pack (YYYY-MM)."),
+        dry_run: bool = typer.Option(False, "--dry-run", help="Read and size the packs without writing anything."),
+        pretty: bool = _pretty_option(),
+    ) -> None:
+        from .tools.health import compact_raw_month as compact
+
+        try:
+            payload = compact(month=month, dry_run=dry_run)
+        except ToolError as exc:
+            _exit_with_error(exc, pretty=pretty)
+        _dump_json(payload, pretty=pretty)
+
+
 def _make_typer_app(*, help_text: str | None = None) -> typer.Typer:
     return typer.Typer(
         add_completion=False,
@@ -234,6 +257,8 @@ async def _build_typer_app() -> typer.Typer:
         for tool in namespace_tools:
             _, command_name = tool.name.split(".", maxsplit=1)
             namespace_app.command(name=_command_name(command_name), help=tool.description)(_make_tool_callback(tool))
+        if namespace == "health":
+            _add_health_operator_commands(namespace_app)
         root.add_typer(namespace_app, name=namespace, help=f"{namespace} commands")
 
     mcp_app = _make_typer_app(help_text="Run the MCP server over stdio.")
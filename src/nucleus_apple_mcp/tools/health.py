@@ -1,31 +1,80 @@
 from __future__ import annotations
 
+import asyncio
+import atexit
 import base64
 import datetime as dt
 import hashlib
+import heapq
 import hmac
 import json
 import math
+import mmap
+import multiprocessing
 import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
 import xml.etree.ElementTree as ET
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
 from dataclasses import dataclass
 from enum import Enum
+from fractions import Fraction
 from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from statistics import StatisticsError, mean, median, quantiles
-from typing import Annotated, Any, Literal, Protocol
+from statistics import StatisticsError, median, quantiles
+from typing import Annotated, Any, BinaryIO, Literal, Protocol
 from urllib.parse import quote, urlparse
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import httpx
 from fastmcp import FastMCP
 from fastmcp.exceptions import ToolError
 from pydantic import BaseModel, ConfigDict, Field, ValidationError
 
+from .health_parse import (
+    COLUMNAR_MISSING_INT as _COLUMNAR_MISSING_INT,
+    COLUMNAR_MISSING_TIME as _COLUMNAR_MISSING_TIME,
+    COLUMNAR_NUMERIC_FIELDS,
+    COLUMNAR_STRING_FIELDS,
+    EPOCH as _EPOCH,
+    ColumnarChunk,
+    coerce_numeric as _coerce_numeric,
+    iso_to_epoch_ms as _iso_to_epoch_ms,
+    parse_columnar_bytes,
+    parse_columnar_lines,
+)
+
 try:
     import tomllib
 except ModuleNotFoundError:  # pragma: no cover
     import tomli as tomllib
 
+try:
+    from compression import zstd as _zstd_stdlib
+except ModuleNotFoundError:  # pragma: no cover
+    _zstd_stdlib = None
+
+try:
+    import zstandard as _zstandard
+except ModuleNotFoundError:  # pragma: no cover
+    _zstandard = None
+
+try:
+    import numpy as _np
+except ModuleNotFoundError:  # pragma: no cover
+    _np = None
+
 health_router = FastMCP(name="health")
 
 _StorageBackendName = Literal["auto", "s3_object_store"]
@@ -381,6 +430,16 @@ def _parse_ymd(value: str) -> dt.date:
         raise ToolError(f"INVALID_ARGUMENTS: invalid date (expected YYYY-MM-DD): {value}") from exc
 
 
+def _parse_instant_ms(value: str, *, name: str) -> int:
+    try:
+        parsed = dt.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError as exc:
+        raise ToolError(f"INVALID_ARGUMENTS: invalid {name} (expected ISO 8601 datetime): {value}") from exc
+    if parsed.tzinfo is None:
+        _raise("INVALID_ARGUMENTS", f"{name} must include a UTC offset or Z: {value}")
+    return (parsed - _EPOCH) // dt.timedelta(milliseconds=1)
+
+
 def _parse_yyyy_mm(value: str) -> tuple[int, int]:
     try:
         year_text, month_text = value.split("-", maxsplit=1)
@@ -437,6 +496,13 @@ class _HealthS3ConfigModel(BaseModel):
     use_path_style: bool = True
 
 
+class _HealthCacheConfigModel(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    enabled: bool = True
+    dir: str = ""
+
+
 class _HealthConfigModel(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
@@ -444,6 +510,7 @@ class _HealthConfigModel(BaseModel):
     storage_backend: str | None = None
     icloud_root: str | None = None
     s3: _HealthS3ConfigModel = Field(default_factory=_HealthS3ConfigModel)
+    cache: _HealthCacheConfigModel = Field(default_factory=_HealthCacheConfigModel)
 
 
 class _AppConfigModel(BaseModel):
@@ -498,11 +565,26 @@ def _configured_storage_backend() -> _StorageBackendName | None:
 class _StorageBackend(Protocol):
     def read_bytes(self, relpath: str) -> bytes: ...
 
+    def iter_bytes(self, relpath: str) -> Iterator[bytes]: ...
+
+    def read_range(self, relpath: str, start: int, end: int) -> bytes: ...
+
+    def write_bytes(self, relpath: str, data: bytes, *, content_type: str = "application/octet-stream") -> None: ...
+
+    def write_file(self, relpath: str, handle: BinaryIO, *, content_type: str = "application/octet-stream") -> None: ...
+
     def list_keys(self, relprefix: str) -> list[str]: ...
 
+    def etag(self, relpath: str) -> str: ...
+
+    def presign_get(self, relpath: str, *, expires_s: int, now: dt.datetime | None = None) -> str: ...
+
     @property
     def backend(self) -> str: ...
 
+    @property
+    def namespace(self) -> str: ...
+
 
 @dataclass(frozen=True)
 class _S3Config:
@@ -523,6 +605,43 @@ def _bool_env(name: str, default: bool) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _cache_root() -> Path | None:
+    cache_config = _load_app_config().health.cache
+    if not _bool_env("NUCLEUS_HEALTH_CACHE_ENABLED", default=cache_config.enabled):
+        return None
+    override = (os.getenv("NUCLEUS_HEALTH_CACHE_DIR") or cache_config.dir).strip()
+    if override:
+        return Path(os.path.expanduser(override)).resolve()
+    xdg = (os.getenv("XDG_CACHE_HOME") or "").strip()
+    return (Path(xdg).expanduser() if xdg else Path.home() / ".cache") / "nucleus-apple-mcp" / "health"
+
+
+def _make_private_dirs(directory: Path) -> None:
+    # mkdir(parents=True) ignores ``mode`` for intermediate directories, so create each level.
+    missing: list[Path] = []
+    while not directory.exists():
+        missing.append(directory)
+        directory = directory.parent
+    for path in reversed(missing):
+        path.mkdir(mode=0o700, exist_ok=True)
+
+
+def _write_cache_file(path: Path, data: bytes) -> bool:
+    """Atomically replace ``path`` with an owner-only (0o600) file; False when the cache is not writable.
+
+    The cache holds decoded Health records, so nothing under it is group- or world-readable.
+    """
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        _make_private_dirs(path.parent)
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
 def _load_s3_config() -> _S3Config | None:
     s3_config = _load_app_config().health.s3
 
@@ -591,6 +710,9 @@ def _hmac_sha256(key: bytes, message: str) -> bytes:
     return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
 
 
+_UPLOAD_BLOCK_BYTES = 1 << 20
+
+
 class _S3Backend:
     def __init__(self, config: _S3Config) -> None:
         self._config = config
@@ -600,6 +722,11 @@ class _S3Backend:
     def backend(self) -> str:
         return "s3_object_store"
 
+    @property
+    def namespace(self) -> str:
+        # Local caches keyed by this are shared only between backends reading the same objects.
+        return f"{self._config.endpoint.rstrip('/')}/{self._config.bucket}/{self._config.prefix.strip('/')}"
+
     def _endpoint_parts(self) -> tuple[str, str, str | None]:
         parsed = urlparse(self._config.endpoint)
         scheme = parsed.scheme or "https"
@@ -625,12 +752,21 @@ class _S3Backend:
             url = f"{url}?{query}"
         return url, canonical_uri, host
 
-    def _sign_headers(self, *, method: str, host: str, canonical_uri: str, query: str) -> dict[str, str]:
+    def _sign_headers(
+        self,
+        *,
+        method: str,
+        host: str,
+        canonical_uri: str,
+        query: str,
+        payload: bytes = b"",
+        payload_hash: str | None = None,
+    ) -> dict[str, str]:
         now = dt.datetime.now(dt.timezone.utc)
         amz_date = now.strftime("%Y%m%dT%H%M%SZ")
         date_stamp = now.strftime("%Y%m%d")
         region = self._config.region or "auto"
-        payload_hash = _sha256_hex(b"")
+        payload_hash = payload_hash or _sha256_hex(payload)
 
         lower_headers: dict[str, str] = {
             "host": host,
@@ -664,11 +800,7 @@ class _S3Backend:
             ]
         )
 
-        k_date = _hmac_sha256(f"AWS4{self._config.secret_access_key}".encode("utf-8"), date_stamp)
-        k_region = hmac.new(k_date, region.encode("utf-8"), hashlib.sha256).digest()
-        k_service = hmac.new(k_region, b"s3", hashlib.sha256).digest()
-        k_signing = hmac.new(k_service, b"aws4_request", hashlib.sha256).digest()
-        signature = hmac.new(k_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        signature = self._signature(date_stamp=date_stamp, region=region, string_to_sign=string_to_sign)
 
         headers = {
             "Host": host,
@@ -683,6 +815,45 @@ class _S3Backend:
             headers["x-amz-security-token"] = self._config.session_token
         return headers
 
+    def _signature(self, *, date_stamp: str, region: str, string_to_sign: str) -> str:
+        k_date = _hmac_sha256(f"AWS4{self._config.secret_access_key}".encode("utf-8"), date_stamp)
+        k_region = hmac.new(k_date, region.encode("utf-8"), hashlib.sha256).digest()
+        k_service = hmac.new(k_region, b"s3", hashlib.sha256).digest()
+        k_signing = hmac.new(k_service, b"aws4_request", hashlib.sha256).digest()
+        return hmac.new(k_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def presign_get(self, relpath: str, *, expires_s: int, now: dt.datetime | None = None) -> str:
+        """Return a query-string-signed GET URL for ``relpath``; signing is local, no request is made."""
+        now = now or dt.datetime.now(dt.timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = now.strftime("%Y%m%d")
+        region = self._config.region or "auto"
+        scope = f"{date_stamp}/{region}/s3/aws4_request"
+
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self._config.access_key_id}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_s),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if self._config.session_token:
+            params["X-Amz-Security-Token"] = self._config.session_token
+        query = _canonical_query(params)
+        url, canonical_uri, host = self._make_url(key=self._join_prefix(relpath), query=query)
+
+        canonical_request = "\n".join(["GET", canonical_uri, query, f"host:{host}\n", "host", "UNSIGNED-PAYLOAD"])
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                _sha256_hex(canonical_request.encode("utf-8")),
+            ]
+        )
+        signature = self._signature(date_stamp=date_stamp, region=region, string_to_sign=string_to_sign)
+        return f"{url}&X-Amz-Signature={signature}"
+
     def _join_prefix(self, relpath: str) -> str:
         rel = relpath.strip("/")
         if not self._config.prefix:
@@ -707,6 +878,112 @@ class _S3Backend:
             _raise("STORAGE_UNAVAILABLE", f"S3 GET failed ({response.status_code}).")
         return response.content
 
+    def read_range(self, relpath: str, start: int, end: int) -> bytes:
+        key = self._join_prefix(relpath)
+        url, canonical_uri, host = self._make_url(key=key)
+        headers = self._sign_headers(method="GET", host=host, canonical_uri=canonical_uri, query="")
+        headers["Range"] = f"bytes={start}-{end - 1}"
+
+        try:
+            response = self._client.get(url, headers=headers)
+        except httpx.HTTPError as exc:
+            raise ToolError(f"STORAGE_UNAVAILABLE: S3 request failed: {exc}") from exc
+
+        # 416: the object is shorter than the requested range, e.g. rewritten since it was indexed.
+        if response.status_code in {404, 416}:
+            raise _DataNotFound(relpath)
+        if response.status_code in {401, 403}:
+            _raise("NOT_AUTHORIZED", "S3 request not authorized. Check credentials, bucket policy, and prefix.")
+        if response.status_code >= 400:
+            _raise("STORAGE_UNAVAILABLE", f"S3 range GET failed ({response.status_code}).")
+        if response.status_code == 200:
+            # Some S3-compatible stores ignore Range and return the whole object.
+            return response.content[start:end]
+        return response.content
+
+    def write_bytes(self, relpath: str, data: bytes, *, content_type: str = "application/octet-stream") -> None:
+        key = self._join_prefix(relpath)
+        url, canonical_uri, host = self._make_url(key=key)
+        headers = self._sign_headers(method="PUT", host=host, canonical_uri=canonical_uri, query="", payload=data)
+        headers["Content-Type"] = content_type
+
+        try:
+            response = self._client.put(url, headers=headers, content=data)
+        except httpx.HTTPError as exc:
+            raise ToolError(f"STORAGE_UNAVAILABLE: S3 request failed: {exc}") from exc
+
+        if response.status_code in {401, 403}:
+            _raise("NOT_AUTHORIZED", "S3 write not authorized. Check credentials, bucket policy, and prefix.")
+        if response.status_code >= 400:
+            _raise("STORAGE_UNAVAILABLE", f"S3 PUT failed ({response.status_code}).")
+
+    def write_file(self, relpath: str, handle: BinaryIO, *, content_type: str = "application/octet-stream") -> None:
+        """PUT a seekable file in blocks, so large objects are never held in memory."""
+        digest = hashlib.sha256()
+        size = 0
+        handle.seek(0)
+        for block in iter(lambda: handle.read(_UPLOAD_BLOCK_BYTES), b""):
+            digest.update(block)
+            size += len(block)
+        handle.seek(0)
+
+        key = self._join_prefix(relpath)
+        url, canonical_uri, host = self._make_url(key=key)
+        headers = self._sign_headers(
+            method="PUT", host=host, canonical_uri=canonical_uri, query="", payload_hash=digest.hexdigest()
+        )
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(size)
+
+        try:
+            response = self._client.put(url, headers=headers, content=iter(lambda: handle.read(_UPLOAD_BLOCK_BYTES), b""))
+        except httpx.HTTPError as exc:
+            raise ToolError(f"STORAGE_UNAVAILABLE: S3 request failed: {exc}") from exc
+
+        if response.status_code in {401, 403}:
+            _raise("NOT_AUTHORIZED", "S3 write not authorized. Check credentials, bucket policy, and prefix.")
+        if response.status_code >= 400:
+            _raise("STORAGE_UNAVAILABLE", f"S3 PUT failed ({response.status_code}).")
+
+    def etag(self, relpath: str) -> str:
+        key = self._join_prefix(relpath)
+        url, canonical_uri, host = self._make_url(key=key)
+        headers = self._sign_headers(method="HEAD", host=host, canonical_uri=canonical_uri, query="")
+
+        try:
+            response = self._client.head(url, headers=headers)
+        except httpx.HTTPError as exc:
+            raise ToolError(f"STORAGE_UNAVAILABLE: S3 request failed: {exc}") from exc
+
+        if response.status_code == 404:
+            raise _DataNotFound(relpath)
+        if response.status_code in {401, 403}:
+            _raise("NOT_AUTHORIZED", "S3 request not authorized. Check credentials, bucket policy, and prefix.")
+        if response.status_code >= 400:
+            _raise("STORAGE_UNAVAILABLE", f"S3 HEAD failed ({response.status_code}).")
+        etag = response.headers.get("ETag")
+        if not etag:
+            # Without an ETag, fall back to size and modification time as the version token.
+            etag = f"{response.headers.get('Content-Length', '')}:{response.headers.get('Last-Modified', '')}"
+        return etag.strip('"')
+
+    def iter_bytes(self, relpath: str) -> Iterator[bytes]:
+        key = self._join_prefix(relpath)
+        url, canonical_uri, host = self._make_url(key=key)
+        headers = self._sign_headers(method="GET", host=host, canonical_uri=canonical_uri, query="")
+
+        try:
+            with self._client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 404:
+                    raise _DataNotFound(relpath)
+                if response.status_code in {401, 403}:
+                    _raise("NOT_AUTHORIZED", "S3 request not authorized. Check credentials, bucket policy, and prefix.")
+                if response.status_code >= 400:
+                    _raise("STORAGE_UNAVAILABLE", f"S3 GET failed ({response.status_code}).")
+                yield from response.iter_bytes()
+        except httpx.HTTPError as exc:
+            raise ToolError(f"STORAGE_UNAVAILABLE: S3 request failed: {exc}") from exc
+
     def list_keys(self, relprefix: str) -> list[str]:
         prefix = self._join_prefix(relprefix.strip("/"))
         if prefix and not prefix.endswith("/"):
@@ -829,10 +1106,22 @@ def _raw_manifest_path(date: dt.date) -> str:
     return _posix_join("health", "raw", "dates", date.isoformat(), "manifest.json")
 
 
+def _raw_pack_index_path(month: str) -> str:
+    return _posix_join("health", "raw", "packs", month, "index.json")
+
+
+def _raw_pack_type_path(month: str, type_key: str) -> str:
+    return _posix_join("health", "raw", "packs", month, "types", f"{type_key}.pack")
+
+
 def _commit_prefix() -> str:
     return _posix_join("health", "commits") + "/"
 
 
+def _commit_day_prefix(day: dt.date) -> str:
+    return _posix_join("health", "commits", f"{day.year:04d}", f"{day.month:02d}", f"{day.day:02d}") + "/"
+
+
 def _read_json(backend: _StorageBackend, relpath: str) -> dict[str, Any]:
     return _json_loads_dict(backend.read_bytes(relpath), relpath)
 
@@ -972,14 +1261,23 @@ def _selection_signature(
     type_keys: list[str],
     tags: list[HealthSampleTag] | None,
     kinds: list[HealthSampleKind] | None,
+    where: list[str] | None = None,
+    window: list[int] | None = None,
+    order: str = "type",
 ) -> str:
-    payload = {
+    payload: dict[str, Any] = {
         "start_date": start_date,
         "end_date": end_date,
         "type_keys": type_keys,
         "tags": sorted(tag.value for tag in (tags or [])),
         "kinds": sorted(kind.value for kind in (kinds or [])),
     }
+    if where:
+        payload["where"] = where
+    if window:
+        payload["window"] = window
+    if order != "type":
+        payload["order"] = order
     return _sha256_hex(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8"))[:16]
 
 
@@ -1000,13 +1298,275 @@ def _decode_cursor(cursor: str) -> dict[str, Any]:
     return value
 
 
-def _parse_jsonl_page(raw: bytes, *, offset: int, max_records: int) -> tuple[list[dict[str, Any]], int, bool]:
-    if max_records <= 0:
-        return [], offset, False
+_RAW_ENCODINGS: tuple[str, ...] = ("identity", "gzip", "zstd")
+_RAW_ENCODING_SUFFIXES: dict[str, str] = {".gz": "gzip", ".zst": "zstd"}
+_RAW_DECODE_ERRORS: tuple[type[Exception], ...] = (zlib.error, EOFError) + tuple(
+    module.ZstdError for module in (_zstd_stdlib, _zstandard) if module is not None
+)
+
 
-    samples: list[dict[str, Any]] = []
-    sample_index = 0
-    for line in raw.splitlines():
+def _raw_type_encoding(type_info: dict[str, Any]) -> str:
+    encoding = type_info.get("encoding")
+    if encoding is None:
+        relpath = type_info.get("relpath")
+        if isinstance(relpath, str):
+            for suffix, inferred in _RAW_ENCODING_SUFFIXES.items():
+                if relpath.endswith(suffix):
+                    return inferred
+        return "identity"
+    if encoding not in _RAW_ENCODINGS:
+        raise ToolError(f"INTERNAL: unsupported raw file encoding: {encoding}")
+    return encoding
+
+
+def _member_chunks(chunks: Iterable[bytes], new_decompressor: Callable[[], Any]) -> Iterator[bytes]:
+    """Decode a stream of concatenated gzip members or zstd frames, failing on a truncated last one."""
+    decompressor = new_decompressor()
+    started = False
+    for chunk in chunks:
+        while chunk:
+            started = True
+            yield decompressor.decompress(chunk)
+            if not decompressor.eof:
+                break
+            # Concatenated members (frames) are valid; restart on the trailing bytes.
+            chunk = decompressor.unused_data
+            decompressor = new_decompressor()
+            started = False
+    if hasattr(decompressor, "flush"):
+        yield decompressor.flush()
+    if started and not decompressor.eof:
+        raise EOFError("compressed stream ended before the end of its last member")
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    return _member_chunks(chunks, lambda: zlib.decompressobj(wbits=zlib.MAX_WBITS | 16))
+
+
+def _zstd_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    if _zstd_stdlib is not None:
+        return _member_chunks(chunks, _zstd_stdlib.ZstdDecompressor)
+    if _zstandard is not None:
+        return _member_chunks(chunks, lambda: _zstandard.ZstdDecompressor().decompressobj())
+    _raise("INTERNAL", "raw file is zstd-encoded but no zstd decoder is installed (install `zstandard`).")
+    raise AssertionError("unreachable")
+
+
+def _decoded_chunks(chunks: Iterable[bytes], *, encoding: str, relpath: str) -> Iterator[bytes]:
+    if encoding == "identity":
+        yield from chunks
+        return
+    decoder = _gzip_chunks if encoding == "gzip" else _zstd_chunks
+    try:
+        yield from decoder(chunks)
+    except _RAW_DECODE_ERRORS as exc:
+        raise ToolError(f"STORAGE_UNAVAILABLE: failed to decode {encoding} raw file: {relpath} ({exc})") from exc
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _iter_raw_lines(backend: _StorageBackend, type_info: dict[str, Any]) -> Iterator[bytes]:
+    relpath = type_info["relpath"]
+    encoding = _raw_type_encoding(type_info)
+    yield from _iter_lines(_decoded_chunks(backend.iter_bytes(relpath), encoding=encoding, relpath=relpath))
+
+
+_SAMPLE_FILTER_MAX_CLAUSES = 16
+_SAMPLE_FILTER_NUMERIC_FIELDS: tuple[str, ...] = ("value", "category_value", "duration_minutes", "time_of_day")
+_SAMPLE_FILTER_STRING_FIELDS: tuple[str, ...] = COLUMNAR_STRING_FIELDS
+_SAMPLE_FILTER_CLAUSE = re.compile(r"^\s*([a-z_]+)\s*(<=|>=|!=|==|=|<|>|~|\s+in\s+)\s*(.*?)\s*$")
+_SAMPLE_FILTER_TIME_OF_DAY = re.compile(r"^(\d{1,2}):(\d{2})$")
+_NUMERIC_COMPARATORS: dict[str, Callable[[float, float], bool]] = {
+    "=": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+}
+
+
+def _parse_time_of_day(text: str, *, clause: str) -> float:
+    match = _SAMPLE_FILTER_TIME_OF_DAY.match(text)
+    if match is None or int(match.group(2)) >= 60 or int(match.group(1)) * 60 + int(match.group(2)) > 1440:
+        _raise("INVALID_ARGUMENTS", f"invalid time of day in filter {clause!r} (expected HH:MM).")
+    return float(int(match.group(1)) * 60 + int(match.group(2)))
+
+
+@dataclass(frozen=True)
+class _SampleFilter:
+    field: str
+    op: str
+    operand: Any
+
+    def test(self, value: Any) -> bool:
+        if value is None:
+            return False
+        if self.op == "in":
+            low, high = self.operand
+            return low <= value < high if low <= high else (value >= low or value < high)
+        if self.field in _SAMPLE_FILTER_NUMERIC_FIELDS:
+            return _NUMERIC_COMPARATORS[self.op](value, self.operand)
+        if self.op == "~":
+            return self.operand in value.casefold()
+        return (value in self.operand) == (self.op == "=")
+
+
+class _SamplePredicate:
+    """Conjunction of ``where`` clauses evaluated while raw samples are scanned.
+
+    Clauses are ``field op operand``. Numeric fields (``value``, ``category_value``,
+    ``duration_minutes``, ``time_of_day``) take ``= != < <= > >=``; ``time_of_day`` operands are
+    local ``HH:MM`` and it also accepts ``in HH:MM-HH:MM`` (wrapping past midnight). String fields
+    (``category_label``, ``unit``, ``source_name``, ``source_bundle_id``, ``device_model``) take
+    ``=``/``!=`` with ``|``-separated alternatives, or ``~`` for a case-insensitive substring.
+    Samples without the field never match.
+    """
+
+    def in_window(self, start_ms: int, end_ms: int) -> bool:
+        if self.window is None:
+            return True
+        if start_ms == _COLUMNAR_MISSING_TIME:
+            return False
+        return start_ms < self.window[1] and max(start_ms, end_ms) >= self.window[0]
+
+    def __init__(self, clauses: list[str], *, window: tuple[int, int] | None = None) -> None:
+        if len(clauses) > _SAMPLE_FILTER_MAX_CLAUSES:
+            _raise("INVALID_ARGUMENTS", f"too many where clauses (max {_SAMPLE_FILTER_MAX_CLAUSES}).")
+        self.filters = [self._parse(clause) for clause in clauses]
+        # [start_ms, end_ms) from start_time/end_time; a sample matches when its interval overlaps it.
+        self.window = window
+        self.clauses = [f"{item.field} {item.op} {self._operand_text(item)}" for item in self.filters]
+
+    @staticmethod
+    def _parse(clause: str) -> _SampleFilter:
+        match = _SAMPLE_FILTER_CLAUSE.match(clause)
+        if match is None or not match.group(3):
+            _raise("INVALID_ARGUMENTS", f"invalid where clause {clause!r} (expected `field op value`).")
+        field, op, text = match.group(1), match.group(2).strip(), match.group(3)
+        op = "=" if op == "==" else op
+        if field in _SAMPLE_FILTER_STRING_FIELDS:
+            if op == "~":
+                return _SampleFilter(field, op, text.casefold())
+            if op not in ("=", "!="):
+                _raise("INVALID_ARGUMENTS", f"{field} supports =, != and ~ (got {clause!r}).")
+            return _SampleFilter(field, op, frozenset(part.strip() for part in text.split("|")))
+        if field == "time_of_day":
+            if op == "in":
+                low, sep, high = text.partition("-")
+                if not sep:
+                    _raise("INVALID_ARGUMENTS", f"invalid time_of_day range in {clause!r} (expected HH:MM-HH:MM).")
+                return _SampleFilter(
+                    field, op, (_parse_time_of_day(low.strip(), clause=clause), _parse_time_of_day(high.strip(), clause=clause))
+                )
+            if op == "~":
+                _raise("INVALID_ARGUMENTS", f"time_of_day does not support ~ (got {clause!r}).")
+            return _SampleFilter(field, op, _parse_time_of_day(text, clause=clause))
+        if field in _SAMPLE_FILTER_NUMERIC_FIELDS:
+            if op in ("~", "in"):
+                _raise("INVALID_ARGUMENTS", f"{field} supports = != < <= > >= (got {clause!r}).")
+            try:
+                operand = float(text)
+            except ValueError:
+                operand = math.nan
+            if not math.isfinite(operand):
+                _raise("INVALID_ARGUMENTS", f"{field} needs a numeric operand (got {clause!r}).")
+            return _SampleFilter(field, op, operand)
+        supported = ", ".join(_SAMPLE_FILTER_NUMERIC_FIELDS + _SAMPLE_FILTER_STRING_FIELDS)
+        _raise("INVALID_ARGUMENTS", f"unknown where field {field!r}; supported: {supported}.")
+
+    @staticmethod
+    def _operand_text(item: _SampleFilter) -> str:
+        if item.field == "time_of_day":
+            bounds = item.operand if item.op == "in" else (item.operand,)
+            return "-".join(f"{int(bound) // 60:02d}:{int(bound) % 60:02d}" for bound in bounds)
+        if isinstance(item.operand, frozenset):
+            return "|".join(sorted(item.operand))
+        return f"{item.operand:g}" if isinstance(item.operand, float) else item.operand
+
+    def matches_record(self, record: dict[str, Any], *, day_tz: dt.tzinfo) -> bool:
+        if self.window is not None and not self.in_window(
+            _iso_to_epoch_ms(record.get("start")), _iso_to_epoch_ms(record.get("end"))
+        ):
+            return False
+        for item in self.filters:
+            field = item.field
+            if field == "value":
+                value: Any = _coerce_numeric(record.get("value"))
+            elif field == "category_value":
+                raw = record.get("category_value")
+                value = raw if isinstance(raw, int) and not isinstance(raw, bool) else None
+            elif field in ("duration_minutes", "time_of_day"):
+                start_ms = _iso_to_epoch_ms(record.get("start"))
+                value = self._time_field(field, start_ms, _iso_to_epoch_ms(record.get("end")), day_tz)
+            else:
+                raw = record.get(field)
+                value = raw if isinstance(raw, str) else None
+            if not item.test(value):
+                return False
+        return True
+
+    def columnar_matcher(self, columnar: _ColumnarSamples, *, day_tz: dt.tzinfo) -> Callable[[int], bool]:
+        columns = columnar.columns
+        checks: list[Callable[[int], bool]] = []
+        if self.window is not None:
+            checks.append(
+                lambda index, starts=columns["start_ms"], ends=columns["end_ms"]: self.in_window(starts[index], ends[index])
+            )
+        for item in self.filters:
+            if item.field in _SAMPLE_FILTER_STRING_FIELDS:
+                # Resolve the clause against the string table once; rows then compare integer ids.
+                accepted = frozenset(index for index, text in enumerate(columnar.strings) if item.test(text))
+                checks.append(lambda index, ids=columns[item.field], accepted=accepted: ids[index] in accepted)
+            elif item.field == "value":
+                checks.append(
+                    lambda index, values=columns["value"], item=item: item.test(None if math.isnan(values[index]) else values[index])
+                )
+            elif item.field == "category_value":
+                checks.append(
+                    lambda index, values=columns["category_value"], item=item: item.test(
+                        None if values[index] == _COLUMNAR_MISSING_INT else values[index]
+                    )
+                )
+            else:
+                checks.append(
+                    lambda index, starts=columns["start_ms"], ends=columns["end_ms"], item=item: item.test(
+                        self._time_field(item.field, starts[index], ends[index], day_tz)
+                    )
+                )
+        return lambda index: all(check(index) for check in checks)
+
+    @staticmethod
+    def _time_field(field: str, start_ms: int, end_ms: int, day_tz: dt.tzinfo) -> float | None:
+        if start_ms == _COLUMNAR_MISSING_TIME:
+            return None
+        if field == "time_of_day":
+            # Wall-clock minutes in the collector's zone, so DST days keep their local clock.
+            try:
+                local = (_EPOCH + dt.timedelta(milliseconds=start_ms)).astimezone(day_tz)
+            except OverflowError:
+                return None
+            return local.hour * 60 + local.minute + (local.second + local.microsecond / 1_000_000) / 60
+        if end_ms == _COLUMNAR_MISSING_TIME:
+            return None
+        return (end_ms - start_ms) / 60_000
+
+
+def _iter_jsonl_samples(lines: Iterable[bytes], *, first_index: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+    sample_index = first_index
+    for line in lines:
+        line = line.strip()
         if not line:
             continue
         try:
@@ -1015,91 +1575,865 @@ def _parse_jsonl_page(raw: bytes, *, offset: int, max_records: int) -> tuple[lis
             continue
         if not isinstance(value, dict) or value.get("record") != "sample":
             continue
+        yield sample_index, value
+        sample_index += 1
+
+
+def _filter_samples(
+    indexed_samples: Iterable[tuple[int, dict[str, Any]]],
+    *,
+    offset: int,
+    predicate: _SamplePredicate | None,
+    day_tz: dt.tzinfo,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    for sample_index, value in indexed_samples:
         if sample_index < offset:
-            sample_index += 1
             continue
+        if predicate is not None and not predicate.matches_record(value, day_tz=day_tz):
+            continue
+        yield sample_index, value
+
+
+def _page_samples(
+    matches: Iterable[tuple[int, dict[str, Any]]],
+    *,
+    offset: int,
+    max_records: int,
+) -> tuple[list[dict[str, Any]], int, bool]:
+    # Indexes are positions among all samples in the file, so the returned index (the next match)
+    # lets a cursor resume without re-testing anything before it.
+    samples: list[dict[str, Any]] = []
+    next_index = offset
+    for sample_index, value in matches:
         if len(samples) >= max_records:
             return samples, sample_index, True
         samples.append(value)
-        sample_index += 1
-    return samples, sample_index, False
+        next_index = sample_index + 1
+    return samples, next_index, False
 
 
-@dataclass(frozen=True)
-class _ManifestContext:
-    date: dt.date
-    relpath: str
-    manifest: dict[str, Any]
-    selected_type_keys: list[str]
+def _read_raw_pack_index(month: str, backend: _StorageBackend) -> dict[str, Any] | None:
+    relpath = _raw_pack_index_path(month)
+    try:
+        return _read_json(backend, relpath)
+    except _DataNotFound:
+        return None
 
 
-def _type_has_readable_data(type_info: dict[str, Any]) -> bool:
-    relpath = type_info.get("relpath")
-    return isinstance(relpath, str) and bool(relpath)
+class _RawPackReader:
+    """Serve raw manifests and type files from monthly packs while they still match the latest export.
+
+    A packed day is only used when its commit_id matches the current export: manifests are validated
+    against the month index, and type segments against the manifest being read. Anything newer falls
+    back to the per-day layout.
+    """
+
+    def __init__(self, backend: _StorageBackend, *, end: dt.date) -> None:
+        self._backend = backend
+        self._end = end.isoformat()
+        self._indexes: dict[str, dict[str, Any] | None] = {}
+        self._daily_commit_ids: dict[str, dict[str, str]] = {}
+        self._spans: dict[tuple[str, str], tuple[int, bytes]] = {}
+        self._unreadable: set[tuple[str, str]] = set()
+
+    def _index(self, month: str) -> dict[str, Any] | None:
+        if month not in self._indexes:
+            self._indexes[month] = _read_raw_pack_index(month, self._backend)
+        return self._indexes[month]
+
+    def month_commit_ids(self, month: str) -> dict[str, str]:
+        if month not in self._daily_commit_ids:
+            commit_ids: dict[str, str] = {}
+            month_index = _read_month_index(month, self._backend)
+            days = month_index.get("days") if month_index else None
+            for item in days if isinstance(days, list) else []:
+                if isinstance(item, dict) and isinstance(item.get("date"), str) and isinstance(item.get("commit_id"), str):
+                    commit_ids[item["date"]] = item["commit_id"]
+            self._daily_commit_ids[month] = commit_ids
+        return self._daily_commit_ids[month]
+
+    def manifest(self, day: dt.date) -> dict[str, Any] | None:
+        month = day.isoformat()[:7]
+        index = self._index(month)
+        manifests = index.get("manifests") if index else None
+        if not isinstance(manifests, dict):
+            return None
+        manifest = manifests.get(day.isoformat())
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("commit_id"), str):
+            return None
+        if self.month_commit_ids(month).get(day.isoformat()) != manifest["commit_id"]:
+            return None
+        return manifest
+
+    def _segments(self, month: str, type_key: str) -> tuple[str, dict[str, dict[str, Any]]] | None:
+        index = self._index(month)
+        types = index.get("types") if index else None
+        entry = types.get(type_key) if isinstance(types, dict) else None
+        if not isinstance(entry, dict):
+            return None
+        relpath = entry.get("relpath")
+        days = entry.get("days")
+        if not isinstance(relpath, str) or not isinstance(days, dict):
+            return None
+        return relpath, {key: value for key, value in days.items() if isinstance(value, dict)}
+
+    def covers(self, day: dt.date, type_key: str, *, commit_id: Any) -> bool:
+        if (day.isoformat()[:7], type_key) in self._unreadable:
+            return False
+        packed = self._segments(day.isoformat()[:7], type_key)
+        segment = packed[1].get(day.isoformat()) if packed is not None else None
+        return segment is not None and isinstance(commit_id, str) and segment.get("commit_id") == commit_id
+
+    def iter_lines(self, day: dt.date, type_key: str, *, commit_id: Any, min_records: int) -> Iterator[bytes] | None:
+        """Lines of one packed day, or None when the day is not served from a pack.
+
+        Raises _DataNotFound when the index lists a pack that is missing or shorter than indexed;
+        the pack is then skipped for the rest of this reader's lifetime.
+        """
+        month = day.isoformat()[:7]
+        packed = self._segments(month, type_key) if (month, type_key) not in self._unreadable else None
+        if packed is None:
+            return None
+        relpath, segments = packed
+        segment = segments.get(day.isoformat())
+        if segment is None or not isinstance(commit_id, str) or segment.get("commit_id") != commit_id:
+            return None
+        offset = int(segment["offset"])
+        length = int(segment["length"])
+
+        span = self._spans.get((month, type_key))
+        if span is None or not (span[0] <= offset and offset + length <= span[0] + len(span[1])):
+            try:
+                span = self._fetch_span(relpath, segments, first_date=day.isoformat(), min_records=min_records)
+            except _DataNotFound:
+                self._unreadable.add((month, type_key))
+                raise
+            self._spans[(month, type_key)] = span
+        span_start, data = span
+        chunk = data[offset - span_start : offset - span_start + length]
+        encoding = _raw_type_encoding(segment)
+        return _iter_lines(_decoded_chunks([chunk], encoding=encoding, relpath=relpath))
+
+    def _fetch_span(
+        self,
+        relpath: str,
+        segments: dict[str, dict[str, Any]],
+        *,
+        first_date: str,
+        min_records: int,
+    ) -> tuple[int, bytes]:
+        # Coalesce consecutive requested days into one Range read, sized by record_count so a
+        # small page does not pull the whole month.
+        ordered = [(date, segments[date]) for date in sorted(segments) if first_date <= date <= self._end]
+        start = int(ordered[0][1]["offset"])
+        end = start
+        records = 0
+        for _, segment in ordered:
+            segment_offset = int(segment["offset"])
+            if segment_offset != end:
+                break
+            end = segment_offset + int(segment["length"])
+            records += int(segment.get("record_count") or 0)
+            if records > min_records:
+                break
+        data = self._backend.read_range(relpath, start, end)
+        if len(data) != end - start:
+            raise _DataNotFound(relpath)
+        return start, data
 
 
-def _build_next_samples_cursor(
-    contexts: list[_ManifestContext],
-    *,
-    current_context_index: int,
-    current_type_index: int,
-    next_offset: int,
-    has_more_in_current_type: bool,
-    current_type_key: str,
-    query_signature: str,
-) -> str | None:
-    if has_more_in_current_type:
-        return _encode_cursor(
-            {
-                "v": 1,
-                "query": query_signature,
-                "date": contexts[current_context_index].date.isoformat(),
-                "type_key": current_type_key,
-                "offset": next_offset,
-            }
-        )
+_COLUMNAR_MAGIC = b"NHCOL001"
+# The parse pool is off unless NUCLEUS_HEALTH_PARSE_WORKERS asks for it: benchmarks/parallel_parse.py
+# has not shown a crossover yet (on a single-CPU host a 4-worker pool ran at 0.5-1.1x the inline
+# parse for 5k-100k records). Set the threshold from a multi-core run before enabling it by default.
+# With the pool enabled, files below this many records are still parsed inline.
+_PARALLEL_PARSE_MIN_RECORDS = 20_000
+_PARALLEL_PARSE_MIN_BATCH = 10_000
 
-    current_manifest_types = _manifest_types(contexts[current_context_index].manifest)
-    for type_key in contexts[current_context_index].selected_type_keys[current_type_index + 1 :]:
-        type_info = current_manifest_types.get(type_key)
-        if isinstance(type_info, dict) and _type_has_readable_data(type_info):
-            return _encode_cursor(
-                {
-                    "v": 1,
-                    "query": query_signature,
-                    "date": contexts[current_context_index].date.isoformat(),
-                    "type_key": type_key,
-                    "offset": 0,
-                }
-            )
 
-    for context in contexts[current_context_index + 1 :]:
-        manifest_types = _manifest_types(context.manifest)
-        for type_key in context.selected_type_keys:
-            type_info = manifest_types.get(type_key)
-            if isinstance(type_info, dict) and _type_has_readable_data(type_info):
-                return _encode_cursor(
-                    {
-                        "v": 1,
-                        "query": query_signature,
-                        "date": context.date.isoformat(),
-                        "type_key": type_key,
-                        "offset": 0,
-                    }
-                )
-    return None
+@lru_cache(maxsize=1)
+def _parse_workers() -> int:
+    raw = (os.getenv("NUCLEUS_HEALTH_PARSE_WORKERS") or "").strip()
+    try:
+        return max(int(raw), 0) if raw else 1
+    except ValueError:
+        return 1
 
 
-def _public_sample_catalog() -> dict[str, Any]:
-    return {
-        "kinds": [kind.value for kind in HealthSampleKind],
-        "tags": [tag.value for tag in HealthSampleTag],
-        "sample_types": [
-            {
-                "type_key": entry.type_key,
-                "kind": entry.kind.value,
-                "tags": [tag.value for tag in entry.tags],
-                "description": entry.description,
+@lru_cache(maxsize=1)
+def _parse_pool() -> ProcessPoolExecutor | None:
+    # Spawned (not forked) workers: the server may hold sockets and threads that must not be
+    # duplicated, and health_parse keeps their imports to the standard library.
+    workers = _parse_workers()
+    if workers < 2:
+        return None
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+
+class _ColumnarSamples:
+    """Array-backed view of one raw type file.
+
+    Numeric columns are typed memoryviews (int64 times in epoch ms, float64 values with NaN for
+    missing, int32 ids into ``strings`` with -1 for missing). The original sample lines are kept
+    alongside so paging can return records verbatim without parsing the lines it skips.
+    """
+
+    def __init__(self, buffer: Any, header: dict[str, Any]) -> None:
+        body = memoryview(buffer)[header["body_start"] :]
+        self._buffer = buffer
+        self._body = body
+        self.count: int = header["count"]
+        self.strings: list[str] = header["strings"]
+        self.columns: dict[str, memoryview] = {
+            name: body[spec["offset"] : spec["offset"] + spec["length"]].cast(spec["typecode"])
+            for name, spec in header["columns"].items()
+        }
+        records = header["records"]
+        self._records = body[records["offset"] : records["offset"] + records["length"]]
+
+    def close(self) -> None:
+        try:
+            for view in (*self.columns.values(), self._records, self._body):
+                view.release()
+            if isinstance(self._buffer, mmap.mmap):
+                self._buffer.close()
+        except BufferError:
+            # A caller still holds a view (e.g. a NumPy array over a column); the mapping is
+            # unmapped when that view is collected.
+            pass
+
+    def __enter__(self) -> _ColumnarSamples:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def string(self, index: int) -> str | None:
+        return None if index < 0 else self.strings[index]
+
+    def record(self, index: int) -> dict[str, Any]:
+        offsets = self.columns["record_offset"]
+        return json.loads(bytes(self._records[offsets[index] : offsets[index + 1]]))
+
+    def iter_samples(
+        self,
+        *,
+        offset: int,
+        predicate: _SamplePredicate | None = None,
+        day_tz: dt.tzinfo = dt.timezone.utc,
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield (index, record) from ``offset`` on, decoding only the records that match."""
+        matches = predicate.columnar_matcher(self, day_tz=day_tz) if predicate is not None else None
+        for index in range(offset, self.count):
+            if matches is None or matches(index):
+                yield index, self.record(index)
+
+
+def _parse_columnar_chunks(lines: Callable[[], Iterator[bytes]], *, record_count: int) -> list[ColumnarChunk]:
+    pool = _parse_pool() if record_count >= _PARALLEL_PARSE_MIN_RECORDS else None
+    if pool is None:
+        with closing(lines()) as source:
+            return [parse_columnar_lines(source)]
+
+    # Batches are submitted while the file is still streaming in and merged in submission order,
+    # so record indexes (and therefore cursors) match the inline parse exactly. Only the futures
+    # hold the batches; if the pool breaks, the file is read again and parsed inline.
+    batch_size = max(_PARALLEL_PARSE_MIN_BATCH, -(-record_count // _parse_workers()))
+    futures = []
+    try:
+        with closing(lines()) as source:
+            pending: list[bytes] = []
+            for line in source:
+                pending.append(line)
+                if len(pending) >= batch_size:
+                    futures.append(pool.submit(parse_columnar_bytes, b"\n".join(pending)))
+                    pending = []
+            if pending:
+                futures.append(pool.submit(parse_columnar_bytes, b"\n".join(pending)))
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool.cache_clear()
+        with closing(lines()) as source:
+            return [parse_columnar_lines(source)]
+
+
+def _merge_columnar_chunks(chunks: list[ColumnarChunk]) -> ColumnarChunk:
+    if len(chunks) == 1:
+        return chunks[0]
+    columns: dict[str, array] = {name: array(typecode) for name, typecode in COLUMNAR_NUMERIC_FIELDS}
+    for name in COLUMNAR_STRING_FIELDS:
+        columns[name] = array("i")
+    columns["record_offset"] = array("q", [0])
+    interned: dict[str, int] = {}
+    records = bytearray()
+    for chunk_columns, strings, chunk_records in chunks:
+        remap = [interned.setdefault(value, len(interned)) for value in strings]
+        for name, _ in COLUMNAR_NUMERIC_FIELDS:
+            columns[name].extend(chunk_columns[name])
+        for name in COLUMNAR_STRING_FIELDS:
+            columns[name].extend(array("i", [remap[index] if index >= 0 else index for index in chunk_columns[name]]))
+        base = len(records)
+        columns["record_offset"].extend(array("q", [offset + base for offset in chunk_columns["record_offset"][1:]]))
+        records.extend(chunk_records)
+    return columns, list(interned), bytes(records)
+
+
+def _build_columnar(
+    lines: Callable[[], Iterator[bytes]], *, meta: dict[str, Any], record_count: int = 0
+) -> bytes:
+    chunk_columns, strings, records = _merge_columnar_chunks(_parse_columnar_chunks(lines, record_count=record_count))
+    columns: list[tuple[str, array]] = [
+        *((name, chunk_columns[name]) for name, _ in COLUMNAR_NUMERIC_FIELDS),
+        *((name, chunk_columns[name]) for name in COLUMNAR_STRING_FIELDS),
+        ("record_offset", chunk_columns["record_offset"]),
+    ]
+
+    # Sections are 8-byte aligned (offsets relative to the aligned end of the header) so the
+    # mmap'd columns can be cast in place.
+    def aligned(size: int) -> int:
+        return (size + 7) & ~7
+
+    column_specs: dict[str, dict[str, Any]] = {}
+    cursor = 0
+    for name, column in columns:
+        length = len(column) * column.itemsize
+        column_specs[name] = {"offset": cursor, "length": length, "typecode": column.typecode}
+        cursor = aligned(cursor + length)
+    records_spec = {"offset": cursor, "length": len(records)}
+
+    header = {
+        **meta,
+        "byteorder": sys.byteorder,
+        "count": len(chunk_columns["start_ms"]),
+        "strings": strings,
+        "columns": column_specs,
+        "records": records_spec,
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    body_start = aligned(len(_COLUMNAR_MAGIC) + 8 + len(header_bytes))
+
+    out = bytearray(_COLUMNAR_MAGIC)
+    out.extend(len(header_bytes).to_bytes(8, "little"))
+    out.extend(header_bytes)
+    for name, column in columns:
+        out.extend(b"\0" * (body_start + column_specs[name]["offset"] - len(out)))
+        out.extend(column.tobytes())
+    out.extend(b"\0" * (body_start + records_spec["offset"] - len(out)))
+    out.extend(records)
+    return bytes(out)
+
+
+def _columnar_header(buffer: Any) -> dict[str, Any] | None:
+    if len(buffer) < len(_COLUMNAR_MAGIC) + 8 or bytes(buffer[: len(_COLUMNAR_MAGIC)]) != _COLUMNAR_MAGIC:
+        return None
+    header_start = len(_COLUMNAR_MAGIC) + 8
+    header_length = int.from_bytes(bytes(buffer[len(_COLUMNAR_MAGIC) : header_start]), "little")
+    try:
+        header = json.loads(bytes(buffer[header_start : header_start + header_length]))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(header, dict) or header.get("byteorder") != sys.byteorder:
+        return None
+    header["body_start"] = (header_start + header_length + 7) & ~7
+    return header
+
+
+def _columnar_cache_path(cache_root: Path, date: dt.date, type_key: str) -> Path:
+    return cache_root / "columnar" / date.isoformat() / f"{type_key}.col"
+
+
+def _columnar_pending_path(cache_root: Path, date: dt.date, type_key: str) -> Path:
+    return cache_root / "columnar" / date.isoformat() / f"{type_key}.pending"
+
+
+def _load_columnar(path: Path, *, meta: dict[str, Any]) -> _ColumnarSamples | None:
+    try:
+        with path.open("rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    header = _columnar_header(buffer)
+    if header is None or any(header.get(key) != value for key, value in meta.items()):
+        buffer.close()
+        return None
+    return _ColumnarSamples(buffer, header)
+
+
+def _columnar_meta(*, type_key: str, type_info: dict[str, Any], commit_id: str) -> dict[str, Any]:
+    return {"version": 1, "commit_id": commit_id, "relpath": type_info.get("relpath"), "type_key": type_key}
+
+
+def _cached_columnar(
+    cache_root: Path,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+) -> _ColumnarSamples | None:
+    """Load the columnar cache for one raw type file only if it is already current; never build it."""
+    if not isinstance(commit_id, str):
+        return None
+    meta = _columnar_meta(type_key=type_key, type_info=type_info, commit_id=commit_id)
+    return _load_columnar(_columnar_cache_path(cache_root, date, type_key), meta=meta)
+
+
+def _columnar_samples(
+    cache_root: Path,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    lines: Callable[[], Iterator[bytes]],
+    full_read: bool,
+) -> _ColumnarSamples | None:
+    """Load the columnar cache for one raw type file, building it from ``lines`` on a miss.
+
+    Building reads the whole file. Callers that scan the file in full anyway pass ``full_read``
+    and build on the first miss; readers that may stop early (a page, a time window) return None
+    on the first miss, so they keep streaming, and build on the second.
+    """
+    if not isinstance(commit_id, str):
+        return None
+    meta = _columnar_meta(type_key=type_key, type_info=type_info, commit_id=commit_id)
+    path = _columnar_cache_path(cache_root, date, type_key)
+    cached = _load_columnar(path, meta=meta)
+    if cached is not None:
+        return cached
+
+    pending_path = _columnar_pending_path(cache_root, date, type_key)
+    meta_bytes = json.dumps(meta, sort_keys=True).encode("utf-8")
+    if not full_read:
+        try:
+            seen_before = pending_path.read_bytes() == meta_bytes
+        except OSError:
+            seen_before = False
+        if not seen_before:
+            _write_cache_file(pending_path, meta_bytes)
+            return None
+
+    data = _build_columnar(lines, meta=meta, record_count=int(type_info.get("record_count") or 0))
+    if _write_cache_file(path, data):
+        pending_path.unlink(missing_ok=True)
+        cached = _load_columnar(path, meta=meta)
+        if cached is not None:
+            return cached
+    header = _columnar_header(data)
+    return None if header is None else _ColumnarSamples(data, header)
+
+
+def _open_raw_type_lines(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    min_records: int,
+) -> Iterator[bytes]:
+    try:
+        packed_lines = pack_reader.iter_lines(date, type_key, commit_id=commit_id, min_records=min_records)
+    except _DataNotFound:
+        # The pack index outlived its pack; the per-day file is still authoritative.
+        packed_lines = None
+    return packed_lines or _iter_raw_lines(backend, type_info)
+
+
+def _raw_type_columnar(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    full_read: bool,
+    min_records: int = 0,
+) -> _ColumnarSamples | None:
+    # The build reads this whole file, but a packed Range read may still coalesce later days the
+    # caller is about to ask for (``min_records``).
+    return _columnar_samples(
+        cache_root,
+        date=date,
+        type_key=type_key,
+        type_info=type_info,
+        commit_id=commit_id,
+        full_read=full_read,
+        lines=lambda: _open_raw_type_lines(
+            backend,
+            pack_reader,
+            date=date,
+            type_key=type_key,
+            type_info=type_info,
+            commit_id=commit_id,
+            min_records=max(min_records, int(type_info.get("record_count") or 0)),
+        ),
+    )
+
+
+_TIME_INDEX_VERSION = 1
+_TIME_INDEX_BLOCK_RECORDS = 256
+
+
+def _time_index_path(cache_root: Path, date: dt.date, type_key: str) -> Path:
+    return cache_root / "time_index" / date.isoformat() / f"{type_key}.json"
+
+
+def _build_time_index(data: bytes) -> dict[str, Any]:
+    """Sparse timestamp → byte offset index over an identity-encoded raw JSONL file.
+
+    Each block covers up to ``_TIME_INDEX_BLOCK_RECORDS`` samples and records its byte offset, the
+    index of its first sample, and the earliest start / latest end inside it. Blocks bound their
+    samples rather than assuming the file is sorted, so an unsorted file only costs extra reads.
+    """
+    blocks: list[list[Any]] = []
+    sample_index = 0
+    position = 0
+    for raw_line in data.split(b"\n"):
+        line_start = position
+        position += len(raw_line) + 1
+        line = raw_line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(value, dict) or value.get("record") != "sample":
+            continue
+        if sample_index % _TIME_INDEX_BLOCK_RECORDS == 0:
+            blocks.append([line_start, sample_index, None, None])
+        start_ms = _iso_to_epoch_ms(value.get("start"))
+        if start_ms != _COLUMNAR_MISSING_TIME:
+            block = blocks[-1]
+            end_ms = max(start_ms, _iso_to_epoch_ms(value.get("end")))
+            block[2] = start_ms if block[2] is None else min(block[2], start_ms)
+            block[3] = end_ms if block[3] is None else max(block[3], end_ms)
+        sample_index += 1
+    return {"size": len(data), "count": sample_index, "blocks": blocks}
+
+
+def _time_index(
+    backend: _StorageBackend,
+    cache_root: Path,
+    *,
+    date: dt.date,
+    type_key: str,
+    relpath: str,
+) -> tuple[dict[str, Any], bytes | None]:
+    """Return the time index for ``relpath`` (keyed by its ETag), plus the file body when it had to be fetched."""
+    etag = backend.etag(relpath)
+    path = _time_index_path(cache_root, date, type_key)
+    try:
+        cached = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        cached = None
+    if (
+        isinstance(cached, dict)
+        and cached.get("version") == _TIME_INDEX_VERSION
+        and cached.get("etag") == etag
+        and cached.get("relpath") == relpath
+    ):
+        return cached, None
+
+    data = backend.read_bytes(relpath)
+    index = {"version": _TIME_INDEX_VERSION, "etag": etag, "relpath": relpath, **_build_time_index(data)}
+    _write_cache_file(path, json.dumps(index, separators=(",", ":")).encode("utf-8"))
+    return index, data
+
+
+def _time_window_samples(
+    backend: _StorageBackend,
+    cache_root: Path,
+    *,
+    date: dt.date,
+    type_key: str,
+    relpath: str,
+    offset: int,
+    predicate: _SamplePredicate,
+    day_tz: dt.tzinfo,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield matching (index, record) pairs of one identity-encoded raw file for a start_time/end_time window.
+
+    Only blocks of the time index that overlap the window are fetched, with one Range read per run
+    of adjacent blocks. Runs are fetched lazily, so a consumer that stops early stops reading.
+    """
+    index, data = _time_index(backend, cache_root, date=date, type_key=type_key, relpath=relpath)
+    window_start, window_end = predicate.window or (_COLUMNAR_MISSING_TIME, 2**63 - 1)
+    blocks = index["blocks"]
+    spans: list[list[int]] = []
+    for position, (byte_offset, first_sample, min_start, max_end) in enumerate(blocks):
+        following = blocks[position + 1] if position + 1 < len(blocks) else None
+        next_sample = following[1] if following else index["count"]
+        if next_sample <= offset or min_start is None or min_start >= window_end or max_end < window_start:
+            continue
+        byte_end = following[0] if following else index["size"]
+        if spans and spans[-1][1] == byte_offset:
+            spans[-1][1] = byte_end
+        else:
+            spans.append([byte_offset, byte_end, first_sample])
+
+    for byte_start, byte_end, first_sample in spans:
+        chunk = data[byte_start:byte_end] if data is not None else backend.read_range(relpath, byte_start, byte_end)
+        yield from _filter_samples(
+            _iter_jsonl_samples(chunk.split(b"\n"), first_index=first_sample),
+            offset=offset,
+            predicate=predicate,
+            day_tz=day_tz,
+        )
+
+
+def _use_time_index(
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    predicate: _SamplePredicate | None,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+) -> bool:
+    # A time window on a plain per-day file is served by Range reads through the sparse time
+    # index instead of downloading the day to build the columnar cache.
+    return (
+        cache_root is not None
+        and predicate is not None
+        and predicate.window is not None
+        and _raw_type_encoding(type_info) == "identity"
+        and not pack_reader.covers(date, type_key, commit_id=commit_id)
+    )
+
+
+def _iter_type_samples(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    offset: int,
+    predicate: _SamplePredicate | None,
+    day_tz: dt.tzinfo,
+    min_records: int,
+) -> Generator[tuple[int, dict[str, Any]], None, None]:
+    """Yield matching (index, record) pairs of one raw type file from ``offset`` on, in file order.
+
+    ``min_records`` sizes packed Range reads; pass the record count when matches may be sparse.
+    """
+    time_indexed = _use_time_index(
+        pack_reader, cache_root, predicate, date=date, type_key=type_key, type_info=type_info, commit_id=commit_id
+    )
+    columnar = None
+    if cache_root is not None and time_indexed:
+        columnar = _cached_columnar(cache_root, date=date, type_key=type_key, type_info=type_info, commit_id=commit_id)
+    elif cache_root is not None:
+        columnar = _raw_type_columnar(
+            backend,
+            pack_reader,
+            cache_root,
+            date=date,
+            type_key=type_key,
+            type_info=type_info,
+            commit_id=commit_id,
+            full_read=False,
+            min_records=min_records,
+        )
+    if columnar is not None:
+        with columnar:
+            yield from columnar.iter_samples(offset=offset, predicate=predicate, day_tz=day_tz)
+    elif time_indexed and cache_root is not None and predicate is not None:
+        yield from _time_window_samples(
+            backend,
+            cache_root,
+            date=date,
+            type_key=type_key,
+            relpath=type_info["relpath"],
+            offset=offset,
+            predicate=predicate,
+            day_tz=day_tz,
+        )
+    else:
+        lines = _open_raw_type_lines(
+            backend,
+            pack_reader,
+            date=date,
+            type_key=type_key,
+            type_info=type_info,
+            commit_id=commit_id,
+            min_records=min_records,
+        )
+        with closing(lines):
+            yield from _filter_samples(
+                _iter_jsonl_samples(lines), offset=offset, predicate=predicate, day_tz=day_tz
+            )
+
+
+def _compact_raw_month_impl(*, month: str, dry_run: bool, backend: _StorageBackend) -> dict[str, Any]:
+    year, month_number = _parse_yyyy_mm(month)
+    month = f"{year:04d}-{month_number:02d}"
+    first_day = dt.date(year, month_number, 1)
+    next_month = dt.date(year + (month_number == 12), month_number % 12 + 1, 1)
+    if next_month > dt.datetime.now(dt.timezone.utc).date():
+        _raise("INVALID_ARGUMENTS", f"month {month} is not finished yet; only completed months can be packed.")
+
+    manifests: dict[str, dict[str, Any]] = {}
+    for day in _iter_dates(first_day, next_month - dt.timedelta(days=1)):
+        try:
+            manifests[day.isoformat()] = _read_raw_manifest(day, backend)
+        except _DataNotFound:
+            continue
+    if not manifests:
+        _raise("DATA_NOT_FOUND", f"No raw manifests found for {month}.")
+
+    type_keys = sorted({type_key for manifest in manifests.values() for type_key in _manifest_types(manifest)})
+    packed_types: dict[str, dict[str, Any]] = {}
+    total_bytes = 0
+    for type_key in type_keys:
+        days: dict[str, dict[str, Any]] = {}
+        # Each day's object is streamed into a spooled file, so at most one chunk is in memory.
+        with tempfile.TemporaryFile() as pack:
+            for date_value, manifest in manifests.items():
+                type_info = _manifest_types(manifest).get(type_key)
+                if not type_info or not _type_has_readable_data(type_info):
+                    continue
+                offset = pack.tell()
+                try:
+                    for chunk in backend.iter_bytes(type_info["relpath"]):
+                        pack.write(chunk)
+                except _DataNotFound:
+                    pack.seek(offset)
+                    pack.truncate()
+                    continue
+                # Each day keeps its stored encoding; gzip/zstd members stay independently decodable.
+                days[date_value] = {
+                    "offset": offset,
+                    "length": pack.tell() - offset,
+                    "encoding": _raw_type_encoding(type_info),
+                    "record_count": int(type_info.get("record_count") or 0),
+                    "commit_id": manifest.get("commit_id"),
+                }
+            if not days:
+                continue
+            size = pack.tell()
+            relpath = _raw_pack_type_path(month, type_key)
+            if not dry_run:
+                backend.write_file(relpath, pack)
+        packed_types[type_key] = {"relpath": relpath, "size": size, "days": days}
+        total_bytes += size
+
+    index = {
+        "schema_version": "health.raw.pack.v1",
+        "month": month,
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "manifests": manifests,
+        "types": packed_types,
+    }
+    index_relpath = _raw_pack_index_path(month)
+    if not dry_run:
+        # The index is written last so readers never see offsets into a pack that is not there yet.
+        backend.write_bytes(
+            index_relpath,
+            json.dumps(index, separators=(",", ":"), sort_keys=True).encode("utf-8"),
+            content_type="application/json",
+        )
+
+    return {
+        "month": month,
+        "storage_backend": backend.backend,
+        "dry_run": dry_run,
+        "index_relpath": index_relpath,
+        "dates_packed": sorted(manifests),
+        "types": {
+            type_key: {"relpath": entry["relpath"], "days": len(entry["days"]), "size": entry["size"]}
+            for type_key, entry in packed_types.items()
+        },
+        "total_bytes": total_bytes,
+    }
+
+
+@dataclass(frozen=True)
+class _ManifestContext:
+    date: dt.date
+    relpath: str
+    manifest: dict[str, Any]
+    selected_type_keys: list[str]
+
+
+def _type_has_readable_data(type_info: dict[str, Any]) -> bool:
+    relpath = type_info.get("relpath")
+    return isinstance(relpath, str) and bool(relpath)
+
+
+def _build_next_samples_cursor(
+    contexts: list[_ManifestContext],
+    *,
+    current_context_index: int,
+    current_type_index: int,
+    next_offset: int,
+    has_more_in_current_type: bool,
+    current_type_key: str,
+    query_signature: str,
+) -> str | None:
+    if has_more_in_current_type:
+        return _encode_cursor(
+            {
+                "v": 1,
+                "query": query_signature,
+                "date": contexts[current_context_index].date.isoformat(),
+                "type_key": current_type_key,
+                "offset": next_offset,
+            }
+        )
+
+    current_manifest_types = _manifest_types(contexts[current_context_index].manifest)
+    for type_key in contexts[current_context_index].selected_type_keys[current_type_index + 1 :]:
+        type_info = current_manifest_types.get(type_key)
+        if isinstance(type_info, dict) and _type_has_readable_data(type_info):
+            return _encode_cursor(
+                {
+                    "v": 1,
+                    "query": query_signature,
+                    "date": contexts[current_context_index].date.isoformat(),
+                    "type_key": type_key,
+                    "offset": 0,
+                }
+            )
+
+    for context in contexts[current_context_index + 1 :]:
+        manifest_types = _manifest_types(context.manifest)
+        for type_key in context.selected_type_keys:
+            type_info = manifest_types.get(type_key)
+            if isinstance(type_info, dict) and _type_has_readable_data(type_info):
+                return _encode_cursor(
+                    {
+                        "v": 1,
+                        "query": query_signature,
+                        "date": context.date.isoformat(),
+                        "type_key": type_key,
+                        "offset": 0,
+                    }
+                )
+    return None
+
+
+def _public_sample_catalog() -> dict[str, Any]:
+    return {
+        "kinds": [kind.value for kind in HealthSampleKind],
+        "tags": [tag.value for tag in HealthSampleTag],
+        "sample_types": [
+            {
+                "type_key": entry.type_key,
+                "kind": entry.kind.value,
+                "tags": [tag.value for tag in entry.tags],
+                "description": entry.description,
                 "unit": entry.unit,
                 "related_metric_keys": list(entry.related_metric_keys),
                 "aggregate_hint": entry.aggregate_hint,
@@ -1119,6 +2453,92 @@ def _public_sample_catalog() -> dict[str, Any]:
     }
 
 
+def _timestamp_parts(value: Any) -> tuple[int | None, int | None]:
+    """(epoch ms, UTC offset in minutes) of an ISO timestamp; naive timestamps are read as UTC."""
+    if not isinstance(value, str):
+        return None, None
+    try:
+        parsed = dt.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return None, None
+    offset = parsed.utcoffset()
+    if offset is None:
+        return round(parsed.replace(tzinfo=dt.timezone.utc).timestamp() * 1000), None
+    return round(parsed.timestamp() * 1000), int(offset.total_seconds()) // 60
+
+
+def _columnar_samples_payload(samples: list[dict[str, Any]]) -> dict[str, Any]:
+    """Encode a page of sample records as per-type column arrays.
+
+    ``start``/``end`` become ``start_ms`` (epoch milliseconds, each value a delta from the previous
+    non-null one), ``duration_ms`` and ``utc_offset_minutes``. A field with one value across a type
+    moves to ``constants``; string fields that repeat are ids into the shared ``strings`` table and
+    are listed in ``dictionary_columns``. Row order within a type is kept.
+    """
+    strings: list[str] = []
+    string_ids: dict[str, int] = {}
+    timestamps: dict[Any, tuple[int | None, int | None]] = {}
+    by_type: dict[str, list[dict[str, Any]]] = {}
+    for sample in samples:
+        by_type.setdefault(str(sample.get("key")), []).append(sample)
+
+    types: list[dict[str, Any]] = []
+    for type_key, records in by_type.items():
+        columns: dict[str, list[Any]] = {"start_ms": [], "duration_ms": [], "utc_offset_minutes": []}
+        deltas, durations, offsets = columns["start_ms"], columns["duration_ms"], columns["utc_offset_minutes"]
+        previous = 0
+        for record in records:
+            # Timestamps repeat (start == end for point samples), so each string is parsed once.
+            start_text, end_text = record.get("start"), record.get("end")
+            start_ms, offset = timestamps.get(start_text) or timestamps.setdefault(start_text, _timestamp_parts(start_text))
+            end_ms = (timestamps.get(end_text) or timestamps.setdefault(end_text, _timestamp_parts(end_text)))[0]
+            offsets.append(offset)
+            if start_ms is None:
+                deltas.append(None)
+                durations.append(None)
+                continue
+            deltas.append(start_ms - previous)
+            durations.append(None if end_ms is None else end_ms - start_ms)
+            previous = start_ms
+        for field in dict.fromkeys(chain.from_iterable(records)):
+            if field not in columns and field not in ("start", "end"):
+                columns[field] = [record.get(field) for record in records]
+
+        constants: dict[str, Any] = {}
+        dictionary_columns: list[str] = []
+        for field, values in list(columns.items()):
+            if field == "start_ms":
+                continue
+            first = values[0]
+            if all(value == first for value in values):
+                constants[field] = columns.pop(field)[0]
+                continue
+            texts = [value for value in values if isinstance(value, str)]
+            if texts and len(texts) + values.count(None) == len(values) and len(set(texts)) * 2 <= len(texts):
+                encoded: list[int | None] = []
+                for value in values:
+                    if value is None:
+                        encoded.append(None)
+                        continue
+                    string_id = string_ids.get(value)
+                    if string_id is None:
+                        string_id = string_ids[value] = len(strings)
+                        strings.append(value)
+                    encoded.append(string_id)
+                columns[field] = encoded
+                dictionary_columns.append(field)
+        types.append(
+            {
+                "type_key": type_key,
+                "count": len(records),
+                "constants": constants,
+                "dictionary_columns": dictionary_columns,
+                "columns": columns,
+            }
+        )
+    return {"strings": strings, "types": types}
+
+
 def _read_samples_impl(
     *,
     start_date: str,
@@ -1131,6 +2551,11 @@ def _read_samples_impl(
     manifest_only: bool,
     include_manifests: bool,
     storage_backend: _StorageBackendName,
+    where: list[str] | None = None,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    order: Literal["type", "time"] = "type",
+    format: Literal["records", "columnar"] = "records",
 ) -> dict[str, Any]:
     start = _parse_ymd(start_date)
     end = _parse_ymd(end_date)
@@ -1140,21 +2565,41 @@ def _read_samples_impl(
         _raise("INVALID_ARGUMENTS", "raw sample range too large (max 31 days).")
 
     requested_type_keys = _normalize_type_keys(type_keys)
+    window: tuple[int, int] | None = None
+    if start_time or end_time:
+        window = (
+            _parse_instant_ms(start_time, name="start_time") if start_time else _COLUMNAR_MISSING_TIME,
+            _parse_instant_ms(end_time, name="end_time") if end_time else 2**63 - 1,
+        )
+        if window[0] >= window[1]:
+            _raise("INVALID_ARGUMENTS", "start_time must be earlier than end_time.")
+    predicate = _SamplePredicate(where or [], window=window) if (where or window) else None
     query_signature = _selection_signature(
         start_date=start_date,
         end_date=end_date,
         type_keys=requested_type_keys,
         tags=tags,
         kinds=kinds,
+        where=predicate.clauses if predicate is not None else None,
+        window=list(window) if window else None,
+        order=order,
     )
 
     cursor_date: str | None = None
     cursor_type_key: str | None = None
     cursor_offset = 0
+    cursor_positions: dict[str, int] = {}
     if cursor:
         payload = _decode_cursor(cursor)
         if payload.get("v") != 1 or payload.get("query") != query_signature:
             _raise("INVALID_ARGUMENTS", "cursor does not match this query.")
+        raw_positions = payload.get("positions") or {}
+        if not isinstance(raw_positions, dict) or not all(
+            isinstance(key, str) and isinstance(value, int) and not isinstance(value, bool)
+            for key, value in raw_positions.items()
+        ):
+            _raise("INVALID_ARGUMENTS", "invalid cursor positions")
+        cursor_positions = raw_positions
         raw_cursor_date = payload.get("date")
         raw_cursor_type_key = payload.get("type_key")
         if raw_cursor_date is not None and not isinstance(raw_cursor_date, str):
@@ -1176,13 +2621,18 @@ def _read_samples_impl(
     missing_dates: list[str] = []
     manifest_views: list[dict[str, Any]] = []
 
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+
     for day in _iter_dates(start, end):
         relpath = _raw_manifest_path(day)
-        try:
-            manifest = _read_raw_manifest(day, backend)
-        except _DataNotFound:
-            missing_dates.append(day.isoformat())
-            continue
+        manifest = pack_reader.manifest(day)
+        if manifest is None:
+            try:
+                manifest = _read_raw_manifest(day, backend)
+            except _DataNotFound:
+                missing_dates.append(day.isoformat())
+                continue
         selected_type_keys = _select_manifest_type_keys(
             manifest,
             requested_type_keys=requested_type_keys,
@@ -1210,7 +2660,19 @@ def _read_samples_impl(
     samples: list[dict[str, Any]] = []
     next_cursor: str | None = None
 
-    if not manifest_only and max_records > 0:
+    if not manifest_only and max_records > 0 and order == "time":
+        samples, positions = _merge_samples_by_time(
+            backend,
+            pack_reader,
+            cache_root,
+            contexts,
+            positions=cursor_positions,
+            max_records=max_records,
+            predicate=predicate,
+        )
+        if positions is not None:
+            next_cursor = _encode_cursor({"v": 1, "query": query_signature, "positions": positions})
+    elif not manifest_only and max_records > 0:
         for context_index, context in enumerate(contexts):
             if cursor_date and context.date.isoformat() < cursor_date:
                 continue
@@ -1244,16 +2706,30 @@ def _read_samples_impl(
                     )
                     break
 
+                commit_id = context.manifest.get("commit_id")
+                matches = _iter_type_samples(
+                    backend,
+                    pack_reader,
+                    cache_root,
+                    date=context.date,
+                    type_key=type_key,
+                    type_info=type_info,
+                    commit_id=commit_id,
+                    offset=offset,
+                    predicate=predicate,
+                    day_tz=_manifest_tz(context.manifest, context.date),
+                    min_records=offset + remaining if predicate is None else int(type_info.get("record_count") or 0),
+                )
                 try:
-                    raw = backend.read_bytes(relpath)
+                    with closing(matches):
+                        page_samples, next_offset, has_more_in_current_type = _page_samples(
+                            matches,
+                            offset=offset,
+                            max_records=remaining,
+                        )
                 except _DataNotFound:
                     continue
 
-                page_samples, next_offset, has_more_in_current_type = _parse_jsonl_page(
-                    raw,
-                    offset=offset,
-                    max_records=remaining,
-                )
                 samples.extend(page_samples)
 
                 if len(samples) >= max_records:
@@ -1277,14 +2753,155 @@ def _read_samples_impl(
         "selected_type_keys": requested_type_keys or None,
         "selected_tags": [tag.value for tag in (tags or [])] or None,
         "selected_kinds": [kind.value for kind in (kinds or [])] or None,
+        "selected_where": (predicate.clauses or None) if predicate is not None else None,
+        "order": order,
+        "start_time": start_time,
+        "end_time": end_time,
         "manifests": manifest_views if (include_manifests or manifest_only) else [],
-        "samples": samples,
+        "format": format,
+        **({"sample_columns": _columnar_samples_payload(samples)} if format == "columnar" else {"samples": samples}),
         "missing_dates": missing_dates,
         "truncated": next_cursor is not None,
         "next_cursor": next_cursor,
     }
 
 
+def _stream_start_bound(
+    cache_root: Path | None,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    offset: int,
+) -> int:
+    """Lower bound on the start of every sample from ``offset`` on, from local caches only.
+
+    The columnar file gives the exact minimum; a time index (checked against the manifest's record
+    count) gives its blocks' earliest start. Samples without a start sort first in the merge; they
+    are in the columnar minimum as the missing-time sentinel. Without either cache the bound is
+    unknown (a day's file can hold samples that started well before its midnight), so the sentinel
+    is returned and the stream is opened up front.
+    """
+    fallback = _COLUMNAR_MISSING_TIME
+    if cache_root is None:
+        return fallback
+    columnar = _cached_columnar(cache_root, date=date, type_key=type_key, type_info=type_info, commit_id=commit_id)
+    if columnar is not None:
+        with columnar:
+            if offset >= columnar.count:
+                return fallback
+            return min(columnar.columns["start_ms"][offset:])
+
+    try:
+        index = json.loads(_time_index_path(cache_root, date, type_key).read_bytes())
+    except (OSError, ValueError):
+        return fallback
+    if (
+        not isinstance(index, dict)
+        or index.get("version") != _TIME_INDEX_VERSION
+        or index.get("relpath") != type_info.get("relpath")
+        or index.get("count") != int(type_info.get("record_count") or 0)
+    ):
+        return fallback
+    blocks = index["blocks"]
+    starts = [
+        _COLUMNAR_MISSING_TIME if block[2] is None else block[2]
+        for position, block in enumerate(blocks)
+        if (blocks[position + 1][1] if position + 1 < len(blocks) else index["count"]) > offset
+    ]
+    return min(starts, default=fallback)
+
+
+def _merge_samples_by_time(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    contexts: list[_ManifestContext],
+    *,
+    positions: dict[str, int],
+    max_records: int,
+    predicate: _SamplePredicate | None,
+) -> tuple[list[dict[str, Any]], dict[str, int] | None]:
+    """K-way merge the selected (date, type) sample streams into one page ordered by start time.
+
+    Each stream is read in file order and contributes one head record to a heap, so memory is bounded
+    by the number of open streams. Streams are opened lazily once the heap reaches their lower bound
+    (see ``_stream_start_bound``); with warm caches only a day or two of files are open at a time, and
+    streams without a cached bound are opened up front. ``positions`` maps
+    ``"{date}/{type_key}"`` to the next sample index of that stream (-1 once exhausted); the updated
+    map is returned for the cursor, or None when every stream is exhausted.
+    """
+    positions = dict(positions)
+    pending: list[tuple[int, int, str, _ManifestContext, str, dict[str, Any]]] = []
+    for context in contexts:
+        manifest_types = _manifest_types(context.manifest)
+        for type_key in context.selected_type_keys:
+            type_info = manifest_types.get(type_key)
+            stream_key = f"{context.date.isoformat()}/{type_key}"
+            if not isinstance(type_info, dict) or not _type_has_readable_data(type_info) or positions.get(stream_key, 0) < 0:
+                continue
+            bound = _stream_start_bound(
+                cache_root,
+                date=context.date,
+                type_key=type_key,
+                type_info=type_info,
+                commit_id=context.manifest.get("commit_id"),
+                offset=positions.get(stream_key, 0),
+            )
+            pending.append((bound, len(pending), stream_key, context, type_key, type_info))
+    pending.sort(key=lambda item: item[:2], reverse=True)
+
+    heap: list[tuple[int, int, int, dict[str, Any]]] = []
+    streams: dict[int, tuple[str, Generator[tuple[int, dict[str, Any]], None, None]]] = {}
+
+    def advance(ordinal: int) -> None:
+        stream_key, stream = streams[ordinal]
+        try:
+            index, record = next(stream)
+        except (StopIteration, _DataNotFound):
+            positions[stream_key] = -1
+            del streams[ordinal]
+            return
+        positions[stream_key] = index
+        heapq.heappush(heap, (_iso_to_epoch_ms(record.get("start")), ordinal, index, record))
+
+    samples: list[dict[str, Any]] = []
+    try:
+        while len(samples) < max_records:
+            while pending and (not heap or pending[-1][0] <= heap[0][0]):
+                _, ordinal, stream_key, context, type_key, type_info = pending.pop()
+                streams[ordinal] = (
+                    stream_key,
+                    _iter_type_samples(
+                        backend,
+                        pack_reader,
+                        cache_root,
+                        date=context.date,
+                        type_key=type_key,
+                        type_info=type_info,
+                        commit_id=context.manifest.get("commit_id"),
+                        offset=positions.get(stream_key, 0),
+                        predicate=predicate,
+                        day_tz=_manifest_tz(context.manifest, context.date),
+                        min_records=int(type_info.get("record_count") or 0),
+                    ),
+                )
+                advance(ordinal)
+            if not heap:
+                break
+            _, ordinal, _, record = heapq.heappop(heap)
+            samples.append(record)
+            advance(ordinal)
+    finally:
+        for _, stream in streams.values():
+            stream.close()
+
+    if not heap and not pending:
+        return samples, None
+    return samples, {key: value for key, value in sorted(positions.items()) if value != 0}
+
+
 def _metric_diagnosis(
     *,
     metric_key: str,
@@ -1329,730 +2946,4384 @@ def _metric_diagnosis(
     return "raw_no_data", "Related raw types are present but contain no records for this day."
 
 
-def _inspect_day_impl(
-    *,
-    date: str,
-    metric_keys: list[str] | None,
-    type_keys: list[str] | None,
-    storage_backend: _StorageBackendName,
-) -> dict[str, Any]:
-    day = _parse_ymd(date)
-    backend = _resolve_storage_backend(storage_backend)
+_AGGREGATE_STATISTICS: tuple[str, ...] = ("count", "sum", "mean", "min", "max", "last")
+_AGGREGATE_DEFAULT_STATISTICS: dict[str | None, tuple[str, ...]] = {
+    "sum_per_day": ("sum", "count"),
+    "activity_summary_context": ("sum", "count"),
+    "average_per_day": ("mean", "min", "max", "count"),
+    "latest_sample": ("last", "min", "max", "count"),
+    "latest_components": ("last", "count"),
+    "session_records": ("count", "sum"),
+    None: ("mean", "min", "max", "count"),
+}
+_AGGREGATE_MAX_BUCKETS_PER_TYPE = 10_000
+
+
+class _SampleBucket:
+    __slots__ = ("count", "total", "min", "max", "last", "last_start_ms", "sketch", "intervals")
+
+    def __init__(self, *, with_sketch: bool) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.last: Any = None
+        self.last_start_ms = _COLUMNAR_MISSING_TIME
+        self.sketch = _QuantileSketch() if with_sketch else None
+        # Category intervals clipped to the bucket; minutes are attributed by _sleep_stage_minutes.
+        self.intervals: list[tuple[int, int, str]] = []
+
+    def add(self, value: float, start_ms: int) -> None:
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if start_ms >= self.last_start_ms:
+            self.last = value
+            self.last_start_ms = start_ms
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+    def merge(self, other: _SampleBucket) -> None:
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if other.last is not None and other.last_start_ms >= self.last_start_ms:
+            self.last = other.last
+            self.last_start_ms = other.last_start_ms
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        self.intervals.extend(other.intervals)
+
+
+def _parse_aggregate_statistics(statistics: list[str] | None, aggregate_hint: str | None) -> list[str]:
+    if not statistics:
+        return list(_AGGREGATE_DEFAULT_STATISTICS.get(aggregate_hint, _AGGREGATE_DEFAULT_STATISTICS[None]))
+    parsed: list[str] = []
+    for raw in statistics:
+        name = raw.strip().lower()
+        if name in _AGGREGATE_STATISTICS:
+            pass
+        elif name.startswith("p") and name[1:].isdigit() and 1 <= int(name[1:]) <= 99:
+            name = f"p{int(name[1:])}"
+        else:
+            _raise("INVALID_ARGUMENTS", f"unsupported statistic: {raw} (use count, sum, mean, min, max, last, or p1..p99).")
+        if name not in parsed:
+            parsed.append(name)
+    return parsed
 
-    try:
-        snapshot = _read_daily_snapshot(day, backend)
-    except _DataNotFound:
-        _raise("DATA_NOT_FOUND", f"No daily metrics found for {date}.")
 
-    try:
-        manifest = _read_raw_manifest(day, backend)
-    except _DataNotFound:
-        _raise("DATA_NOT_FOUND", f"No raw manifest found for {date}.")
+def _manifest_day_start(manifest: dict[str, Any], date: dt.date) -> dt.datetime:
+    day = manifest.get("day")
+    start = day.get("start") if isinstance(day, dict) else None
+    if isinstance(start, str):
+        try:
+            parsed = dt.datetime.fromisoformat(start[:-1] + "+00:00" if start.endswith("Z") else start)
+        except ValueError:
+            parsed = None
+        if parsed is not None and parsed.tzinfo is not None:
+            return parsed
+    return dt.datetime(date.year, date.month, date.day, tzinfo=dt.timezone.utc)
 
-    requested_metrics = _normalize_type_keys(metric_keys)
-    requested_types = _normalize_type_keys(type_keys)
 
-    if requested_metrics:
-        metric_keys_to_inspect = requested_metrics
-    elif requested_types:
-        metric_keys_to_inspect = [
-            metric_key
-            for metric_key, source in _METRIC_SOURCE_CATALOG.items()
-            if set(source.related_type_keys).intersection(requested_types)
-        ]
-    else:
-        metric_keys_to_inspect = list(_METRIC_SOURCE_CATALOG.keys())
+def _manifest_day_start_ms(manifest: dict[str, Any], date: dt.date) -> int:
+    return (_manifest_day_start(manifest, date) - _EPOCH) // dt.timedelta(milliseconds=1)
 
-    metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
-    metric_status = snapshot.get("metric_status") if isinstance(snapshot.get("metric_status"), dict) else {}
-    metric_units = snapshot.get("metric_units") if isinstance(snapshot.get("metric_units"), dict) else {}
-    manifest_types = _manifest_types(manifest)
 
-    inspection: list[dict[str, Any]] = []
-    for metric_key in metric_keys_to_inspect:
-        source = _METRIC_SOURCE_CATALOG.get(metric_key)
-        if source is None:
-            continue
-        related_raw_types = {
-            type_key: manifest_types[type_key]
-            for type_key in source.related_type_keys
-            if type_key in manifest_types and (not requested_types or type_key in requested_types)
-        }
-        diagnosis_code, diagnosis_message = _metric_diagnosis(
-            metric_key=metric_key,
-            metric_status=metric_status.get(metric_key) if isinstance(metric_status.get(metric_key), str) else None,
-            related_raw_types=related_raw_types,
-        )
-        inspection.append(
-            {
-                "metric_key": metric_key,
-                "value": metrics.get(metric_key),
-                "status": metric_status.get(metric_key),
-                "unit": metric_units.get(metric_key),
-                "source_model": source.source_model,
-                "aggregate_hint": source.aggregate_hint,
-                "description": source.description,
-                "related_type_keys": list(source.related_type_keys),
-                "related_raw_types": related_raw_types,
-                "diagnosis": {
-                    "code": diagnosis_code,
-                    "message": diagnosis_message,
-                },
-            }
-        )
+def _manifest_tz(manifest: dict[str, Any], date: dt.date) -> dt.tzinfo:
+    # The collector's IANA zone when it is known here, else the fixed offset of the day's start.
+    day = manifest.get("day")
+    name = day.get("timezone") if isinstance(day, dict) else None
+    if isinstance(name, str) and name:
+        try:
+            return ZoneInfo(name)
+        except (ValueError, ZoneInfoNotFoundError):
+            pass
+    return _manifest_day_start(manifest, date).tzinfo or dt.timezone.utc
 
-    manifest_view = _public_raw_manifest(
-        manifest,
-        backend_name=backend.backend,
-        relpath=_raw_manifest_path(day),
-        type_keys=requested_types or None,
-    )
 
-    return {
-        "date": date,
-        "storage_backend": backend.backend,
-        "snapshot": _public_daily_snapshot(snapshot, backend.backend),
-        "manifest": manifest_view,
-        "metrics": inspection,
-    }
+def _local_midnight_ms(tz: dt.tzinfo, date: dt.date) -> int:
+    return (dt.datetime(date.year, date.month, date.day, tzinfo=tz) - _EPOCH) // dt.timedelta(milliseconds=1)
 
 
-@dataclass(frozen=True)
-class _MetricObservation:
-    date: str
-    value: float
+def _read_raw_manifests(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    *,
+    start: dt.date,
+    end: dt.date,
+) -> tuple[list[tuple[dt.date, dict[str, Any]]], list[str]]:
+    manifests: list[tuple[dt.date, dict[str, Any]]] = []
+    missing_dates: list[str] = []
+    for day in _iter_dates(start, end):
+        manifest = pack_reader.manifest(day)
+        if manifest is None:
+            try:
+                manifest = _read_raw_manifest(day, backend)
+            except _DataNotFound:
+                missing_dates.append(day.isoformat())
+                continue
+        manifests.append((day, manifest))
+    return manifests, missing_dates
 
 
-def _read_range_metrics_impl(
+def _iter_sample_points(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+    with_components: bool,
+) -> Iterator[tuple[int, int, float | None, str | None, Any]]:
+    """Yield (start_ms, end_ms, value, category_label, components) per sample without building records."""
+    columnar = None
+    if cache_root is not None and not with_components:
+        columnar = _raw_type_columnar(
+            backend,
+            pack_reader,
+            cache_root,
+            date=date,
+            type_key=type_key,
+            type_info=type_info,
+            commit_id=commit_id,
+            full_read=True,
+        )
+    if columnar is not None:
+        with columnar:
+            columns = columnar.columns
+            start_ms, end_ms, values, labels = columns["start_ms"], columns["end_ms"], columns["value"], columns["category_label"]
+            for index in range(columnar.count):
+                value = values[index]
+                yield start_ms[index], end_ms[index], None if math.isnan(value) else value, columnar.string(labels[index]), None
+        return
+
+    lines = _open_raw_type_lines(
+        backend,
+        pack_reader,
+        date=date,
+        type_key=type_key,
+        type_info=type_info,
+        commit_id=commit_id,
+        min_records=int(type_info.get("record_count") or 0),
+    )
+    with closing(lines):
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict) or record.get("record") != "sample":
+                continue
+            label = record.get("category_label")
+            yield (
+                _iso_to_epoch_ms(record.get("start")),
+                _iso_to_epoch_ms(record.get("end")),
+                _coerce_numeric(record.get("value")),
+                label if isinstance(label, str) else None,
+                record.get("components"),
+            )
+
+
+def _aggregate_samples_impl(
     *,
     start_date: str,
     end_date: str,
+    type_keys: list[str],
+    bucket_minutes: int,
+    statistics: list[str] | None,
     storage_backend: _StorageBackendName,
 ) -> dict[str, Any]:
     start = _parse_ymd(start_date)
     end = _parse_ymd(end_date)
     if start > end:
         _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
-
     span = (end - start).days + 1
-    if span > 366:
-        _raise("INVALID_ARGUMENTS", "range too large (max 366 days).")
+    if span > 31:
+        _raise("INVALID_ARGUMENTS", "raw sample range too large (max 31 days).")
+    requested_type_keys = _normalize_type_keys(type_keys)
+    if not requested_type_keys:
+        _raise("INVALID_ARGUMENTS", "type_keys must not be empty.")
+    if not (1 <= bucket_minutes <= 1440) or 1440 % bucket_minutes:
+        _raise("INVALID_ARGUMENTS", "bucket_minutes must divide 1440 (e.g. 5, 15, 60, 1440).")
+    if span * (1440 // bucket_minutes) > _AGGREGATE_MAX_BUCKETS_PER_TYPE:
+        _raise(
+            "INVALID_ARGUMENTS",
+            f"too many buckets (max {_AGGREGATE_MAX_BUCKETS_PER_TYPE} per type); use a shorter range or larger bucket_minutes.",
+        )
 
     backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+    bucket_ms = bucket_minutes * 60_000
+    manifests, missing_dates = _read_raw_manifests(backend, pack_reader, start=start, end=end)
+    # Day files also hold samples overlapping their local midnight, so points outside the requested
+    # range are dropped and category intervals are clipped to it.
+    range_start_ms = range_end_ms = 0
+    if manifests:
+        first_day, first_manifest = manifests[0]
+        last_day, last_manifest = manifests[-1]
+        range_start_ms = _local_midnight_ms(_manifest_day_start(first_manifest, first_day).tzinfo or dt.timezone.utc, start)
+        range_end_ms = _local_midnight_ms(
+            _manifest_day_start(last_manifest, last_day).tzinfo or dt.timezone.utc, end + dt.timedelta(days=1)
+        )
 
-    snapshots_by_date: dict[str, dict[str, Any]] = {}
-    for month in _iter_months(start, end):
-        month_index = _read_month_index(month, backend)
-        if not month_index:
-            continue
-        days = month_index.get("days")
-        if not isinstance(days, list):
-            continue
-        for item in days:
-            if not isinstance(item, dict):
+    type_payloads: list[dict[str, Any]] = []
+    for type_key in requested_type_keys:
+        catalog_entry = _SAMPLE_CATALOG_BY_KEY.get(type_key)
+        aggregate_hint = catalog_entry.aggregate_hint if catalog_entry else None
+        kind = catalog_entry.kind if catalog_entry else None
+        type_statistics = _parse_aggregate_statistics(statistics, aggregate_hint)
+        percentiles = [name for name in type_statistics if name.startswith("p")]
+        by_category = kind == HealthSampleKind.category
+        by_duration = kind == HealthSampleKind.workout
+        with_components = aggregate_hint == "latest_components"
+
+        buckets: dict[int, _SampleBucket] = {}
+        bucket_tz: dict[int, dt.tzinfo] = {}
+        # A sample overlapping midnight is exported into both day files; identities of the samples
+        # that cross a day file's bounds are kept so the second copy is skipped.
+        crossing: set[tuple[int, int, float | None, str | None]] = set()
+        records_scanned = 0
+        dates_read: list[str] = []
+        for day, manifest in manifests:
+            type_info = _manifest_types(manifest).get(type_key)
+            if not isinstance(type_info, dict) or not _type_has_readable_data(type_info):
                 continue
-            date_value = item.get("date")
-            if isinstance(date_value, str):
-                snapshots_by_date[date_value] = item
-
-    data: list[dict[str, Any]] = []
-    missing_dates: list[str] = []
-
-    cursor = start
-    while cursor <= end:
-        ymd = cursor.isoformat()
-        snapshot = snapshots_by_date.get(ymd)
-        if snapshot is None:
-            missing_dates.append(ymd)
-        else:
-            data.append(_public_daily_snapshot(snapshot, backend.backend))
-        cursor += dt.timedelta(days=1)
+            day_start = _manifest_day_start(manifest, day)
+            day_tz = day_start.tzinfo or dt.timezone.utc
+            anchor_ms = (day_start - _EPOCH) // dt.timedelta(milliseconds=1)
+            next_anchor_ms = _local_midnight_ms(day_tz, day + dt.timedelta(days=1))
+            # Each day is folded into its own buckets and merged once it has been read in full, so
+            # a file that disappears mid-read leaves no partial buckets behind.
+            day_buckets: dict[int, _SampleBucket] = {}
+            day_crossing: set[tuple[int, int, float | None, str | None]] = set()
+            day_records = 0
+            try:
+                points = _iter_sample_points(
+                    backend,
+                    pack_reader,
+                    cache_root,
+                    date=day,
+                    type_key=type_key,
+                    type_info=type_info,
+                    commit_id=manifest.get("commit_id"),
+                    with_components=with_components,
+                )
+                for start_ms, end_ms, value, label, components in points:
+                    if start_ms == _COLUMNAR_MISSING_TIME:
+                        continue
+                    day_records += 1
+                    if start_ms < anchor_ms or end_ms > next_anchor_ms:
+                        identity = (start_ms, end_ms, value, label)
+                        if identity in crossing:
+                            continue
+                        day_crossing.add(identity)
+                    in_range = range_start_ms <= start_ms < range_end_ms
+                    if not in_range and not by_category:
+                        continue
+                    # Buckets are aligned to the manifest's local midnight, so hourly and daily
+                    # buckets follow the collector's timezone.
+                    bucket_start = anchor_ms + ((start_ms - anchor_ms) // bucket_ms) * bucket_ms
+                    bucket = day_buckets.get(bucket_start) if in_range else None
+                    if bucket is None and in_range:
+                        bucket = day_buckets[bucket_start] = _SampleBucket(with_sketch=bool(percentiles))
+                    if by_category:
+                        if bucket is not None:
+                            bucket.count += 1
+                        if end_ms == _COLUMNAR_MISSING_TIME or end_ms <= start_ms:
+                            continue
+                        key = label or "unknown"
+                        # Split the in-range part of the interval across every bucket it overlaps.
+                        cursor = max(start_ms, range_start_ms)
+                        end_ms = min(end_ms, range_end_ms)
+                        while cursor < end_ms:
+                            slot = anchor_ms + ((cursor - anchor_ms) // bucket_ms) * bucket_ms
+                            slot_end = min(slot + bucket_ms, end_ms)
+                            target = day_buckets.get(slot)
+                            if target is None:
+                                target = day_buckets[slot] = _SampleBucket(with_sketch=False)
+                            target.intervals.append((cursor, slot_end, key))
+                            cursor = slot_end
+                        continue
+                    if by_duration:
+                        value = None if end_ms == _COLUMNAR_MISSING_TIME else (end_ms - start_ms) / 60_000
+                    if value is None:
+                        if with_components and isinstance(components, dict):
+                            bucket.count += 1
+                            if start_ms >= bucket.last_start_ms:
+                                bucket.last = components
+                                bucket.last_start_ms = start_ms
+                        continue
+                    bucket.add(value, start_ms)
+            except _DataNotFound:
+                continue
+            crossing |= day_crossing
+            for bucket_start, bucket in day_buckets.items():
+                if bucket_start in buckets:
+                    buckets[bucket_start].merge(bucket)
+                else:
+                    buckets[bucket_start] = bucket
+                    bucket_tz[bucket_start] = day_tz
+            records_scanned += day_records
+            dates_read.append(day.isoformat())
+
+        bucket_payload: list[dict[str, Any]] = []
+        for bucket_start in sorted(buckets):
+            bucket = buckets[bucket_start]
+            tz = bucket_tz[bucket_start]
+            item: dict[str, Any] = {
+                "start": dt.datetime.fromtimestamp(bucket_start / 1000, tz=tz).isoformat(),
+                "end": dt.datetime.fromtimestamp((bucket_start + bucket_ms) / 1000, tz=tz).isoformat(),
+            }
+            if by_category:
+                item["count"] = bucket.count
+                # Overlapping intervals (several sources, or a sample exported into two day files)
+                # count once, for the highest-priority category.
+                minutes = _sleep_stage_minutes(bucket.intervals)
+                item["minutes_by_category"] = {key: _rounded(value) for key, value in sorted(minutes.items())}
+                bucket_payload.append(item)
+                continue
+            for name in type_statistics:
+                if name == "count":
+                    item["count"] = bucket.count
+                elif name == "sum":
+                    item["sum"] = _rounded(bucket.total) if bucket.count else None
+                elif name == "mean":
+                    item["mean"] = _rounded(bucket.total / bucket.count) if bucket.count else None
+                elif name == "min":
+                    item["min"] = _rounded(bucket.min)
+                elif name == "max":
+                    item["max"] = _rounded(bucket.max)
+                elif name == "last":
+                    item["last"] = bucket.last if isinstance(bucket.last, dict) else _rounded(bucket.last)
+                elif bucket.sketch is not None:
+                    item[name] = _rounded(bucket.sketch.quantile(int(name[1:]) / 100))
+            bucket_payload.append(item)
+
+        type_payloads.append(
+            {
+                "type_key": type_key,
+                "aggregate_hint": aggregate_hint,
+                "unit": "min" if by_category or by_duration else (catalog_entry.unit if catalog_entry else None),
+                "statistics": ["count", "minutes_by_category"] if by_category else type_statistics,
+                "percentiles_approximate": bool(percentiles) and not by_category,
+                "dates_read": dates_read,
+                "records_scanned": records_scanned,
+                "buckets": bucket_payload,
+            }
+        )
 
     return {
         "start_date": start_date,
         "end_date": end_date,
         "storage_backend": backend.backend,
-        "data": data,
+        "bucket_minutes": bucket_minutes,
         "missing_dates": missing_dates,
+        "types": type_payloads,
     }
 
 
-def _coerce_numeric(value: Any) -> float | None:
-    if isinstance(value, bool):
-        return None
-    if isinstance(value, (int, float)):
-        result = float(value)
-        if math.isfinite(result):
-            return result
-    return None
+_DownsamplePoint = tuple[int, float, dt.tzinfo]
+
+
+class _LttbDownsampler:
+    """Streaming Largest-Triangle-Three-Buckets over points arriving in time order.
+
+    Buckets are fixed by point index from the expected point count (the manifests' record_count), so
+    only the bucket being filled and the one waiting for its neighbour's average are held in memory.
+    If the stream runs past the expected count, the points kept so far are merged pairwise and the
+    bucket size doubles, so the output stays near ``target_points``. The first and last points are
+    always kept.
+    """
+
+    def __init__(self, target_points: int, expected_points: int) -> None:
+        self.buckets = target_points - 2
+        self.every = max((expected_points - 2) / self.buckets, 1.0)
+        self.points: list[_DownsamplePoint] = []
+        self._held: _DownsamplePoint | None = None
+        self._placed = 0
+        self._bucket_index = 0
+        self._filling: list[_DownsamplePoint] = []
+        self._waiting: list[_DownsamplePoint] = []
+
+    def _bucket_of(self, placed: int) -> int:
+        # Same boundaries as batch LTTB: bucket i starts at point int(i * every).
+        bucket_index = int(placed / self.every)
+        if int((bucket_index + 1) * self.every) <= placed:
+            bucket_index += 1
+        return bucket_index
+
+    def add(self, point: _DownsamplePoint) -> None:
+        if not self.points:
+            self.points.append(point)
+            return
+        # Hold one point back: the stream's final point is kept as-is rather than bucketed.
+        if self._held is not None:
+            bucket_index = self._bucket_of(self._placed)
+            if bucket_index >= self.buckets:
+                self._compact(next_point=(self._held[0], self._held[1]))
+                bucket_index = self._bucket_of(self._placed)
+            if bucket_index != self._bucket_index and self._filling:
+                self._close_bucket()
+            self._bucket_index = bucket_index
+            self._filling.append(self._held)
+            self._placed += 1
+        self._held = point
+
+    def _close_bucket(self) -> None:
+        if self._waiting:
+            self._select(self._waiting, _mean_point(self._filling))
+        self._waiting, self._filling = self._filling, []
+
+    def _select(self, bucket: list[_DownsamplePoint], next_point: tuple[float, float]) -> None:
+        self.points.append(_largest_triangle(self.points[-1], bucket, next_point))
+
+    def _compact(self, *, next_point: tuple[float, float]) -> None:
+        """Settle the open buckets, then merge the kept points pairwise and double the bucket size."""
+        if self._waiting:
+            self._select(self._waiting, _mean_point(self._filling) if self._filling else next_point)
+        if self._filling:
+            self._select(self._filling, next_point)
+        self._waiting, self._filling = [], []
+        first, rest = self.points[0], self.points[1:]
+        self.points = [first]
+        for index in range(0, len(rest), 2):
+            following = rest[index + 2 : index + 4]
+            self._select(rest[index : index + 2], _mean_point(following) if following else next_point)
+        self.every *= 2
+
+    def finish(self) -> list[_DownsamplePoint]:
+        if self._held is None:
+            return self.points
+        if self._filling:
+            self._close_bucket()
+        if self._waiting:
+            self._select(self._waiting, (self._held[0], self._held[1]))
+            self._waiting = []
+        self.points.append(self._held)
+        self._held = None
+        return self.points
+
+
+def _largest_triangle(
+    anchor: _DownsamplePoint, bucket: list[_DownsamplePoint], next_point: tuple[float, float]
+) -> _DownsamplePoint:
+    anchor_t, anchor_v, _ = anchor
+    next_t, next_v = next_point
+    return max(
+        bucket,
+        key=lambda point: abs((anchor_t - next_t) * (point[1] - anchor_v) - (anchor_t - point[0]) * (next_v - anchor_v)),
+    )
 
 
-def _rounded(value: float | None) -> float | None:
-    if value is None:
-        return None
-    rounded = round(value, 2)
-    if rounded == -0.0:
-        return 0.0
-    return rounded
+def _mean_point(points: list[_DownsamplePoint]) -> tuple[float, float]:
+    return sum(point[0] for point in points) / len(points), sum(point[1] for point in points) / len(points)
+
+
+class _MinMaxDownsampler:
+    """Min/max envelope: per index bucket keep the lowest and highest point, in time order.
+
+    Once the stream runs past the expected point count, adjacent buckets are merged pairwise (their
+    min and max are exact) and the bucket size doubles, so at most ``target_points`` are returned.
+    """
+
+    def __init__(self, target_points: int, expected_points: int) -> None:
+        self.max_buckets = max(target_points // 2, 1)
+        self.every = max(expected_points / self.max_buckets, 1.0)
+        self._buckets: list[tuple[_DownsamplePoint, _DownsamplePoint]] = []
+        self._seen = 0
+        self._bucket_index = 0
+        self._low: _DownsamplePoint | None = None
+        self._high: _DownsamplePoint | None = None
+
+    def add(self, point: _DownsamplePoint) -> None:
+        bucket_index = int(self._seen / self.every)
+        self._seen += 1
+        if bucket_index != self._bucket_index:
+            self._flush()
+            if len(self._buckets) >= self.max_buckets:
+                self._compact()
+                bucket_index = int((self._seen - 1) / self.every)
+            self._bucket_index = bucket_index
+        if self._low is None or point[1] < self._low[1]:
+            self._low = point
+        if self._high is None or point[1] > self._high[1]:
+            self._high = point
+
+    def _flush(self) -> None:
+        if self._low is None or self._high is None:
+            return
+        self._buckets.append((self._low, self._high))
+        self._low = self._high = None
+
+    def _compact(self) -> None:
+        merged: list[tuple[_DownsamplePoint, _DownsamplePoint]] = []
+        for index in range(0, len(self._buckets), 2):
+            pair = self._buckets[index : index + 2]
+            merged.append(
+                (min((low for low, _ in pair), key=lambda point: point[1]), max((high for _, high in pair), key=lambda point: point[1]))
+            )
+        self._buckets = merged
+        self.every *= 2
+
+    def finish(self) -> list[_DownsamplePoint]:
+        self._flush()
+        points: list[_DownsamplePoint] = []
+        for low, high in self._buckets:
+            if low is high:
+                points.append(low)
+            else:
+                points.extend(sorted((low, high), key=lambda point: point[0]))
+        self._buckets = []
+        return points
 
 
-def _metric_unit_from_snapshots(snapshots: list[dict[str, Any]], metric_key: str) -> str | None:
-    for snapshot in snapshots:
-        metric_units = snapshot.get("metric_units")
-        if not isinstance(metric_units, dict):
+def _downsample_samples_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    type_key: str,
+    target_points: int,
+    method: Literal["lttb", "minmax"],
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if (end - start).days + 1 > 31:
+        _raise("INVALID_ARGUMENTS", "raw sample range too large (max 31 days).")
+    type_key = type_key.strip()
+    catalog_entry = _SAMPLE_CATALOG_BY_KEY.get(type_key)
+    if catalog_entry is not None and catalog_entry.kind != HealthSampleKind.quantity:
+        _raise("INVALID_ARGUMENTS", f"{type_key} is a {catalog_entry.kind.value} type; downsampling needs a quantity series.")
+
+    backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+    manifests, missing_dates = _read_raw_manifests(backend, pack_reader, start=start, end=end)
+    readable = [
+        (day, manifest, type_info)
+        for day, manifest in manifests
+        if isinstance(type_info := _manifest_types(manifest).get(type_key), dict) and _type_has_readable_data(type_info)
+    ]
+    expected_points = sum(int(type_info.get("record_count") or 0) for _, _, type_info in readable)
+    downsampler = (_LttbDownsampler if method == "lttb" else _MinMaxDownsampler)(target_points, expected_points)
+
+    records_scanned = 0
+    points_in = 0
+    dates_read: list[str] = []
+    for day, manifest, type_info in readable:
+        tz = _manifest_day_start(manifest, day).tzinfo or dt.timezone.utc
+        try:
+            for start_ms, _, value, _, _ in _iter_sample_points(
+                backend,
+                pack_reader,
+                cache_root,
+                date=day,
+                type_key=type_key,
+                type_info=type_info,
+                commit_id=manifest.get("commit_id"),
+                with_components=False,
+            ):
+                records_scanned += 1
+                if start_ms == _COLUMNAR_MISSING_TIME or value is None:
+                    continue
+                points_in += 1
+                downsampler.add((start_ms, value, tz))
+        except _DataNotFound:
             continue
-        unit = metric_units.get(metric_key)
-        if isinstance(unit, str) and unit:
-            return unit
-    return None
+        dates_read.append(day.isoformat())
 
+    points = downsampler.finish()
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "type_key": type_key,
+        "unit": catalog_entry.unit if catalog_entry else None,
+        "method": method,
+        "target_points": target_points,
+        "records_scanned": records_scanned,
+        "points_in": points_in,
+        "dates_read": dates_read,
+        "missing_dates": missing_dates,
+        "columns": ["time", "value"],
+        "points": [
+            [dt.datetime.fromtimestamp(start_ms / 1000, tz=tz).isoformat(), _rounded(value)]
+            for start_ms, value, tz in points
+        ],
+    }
 
-def _metric_status_counts(snapshots: list[dict[str, Any]], metric_key: str) -> dict[str, int]:
-    counts: dict[str, int] = {}
-    for snapshot in snapshots:
-        metric_status = snapshot.get("metric_status")
-        if not isinstance(metric_status, dict):
-            continue
-        status = metric_status.get(metric_key)
-        if not isinstance(status, str) or not status:
-            continue
-        counts[status] = counts.get(status, 0) + 1
-    return dict(sorted(counts.items()))
 
+# When intervals from several sources overlap, the time goes to the highest-priority stage, so a
+# phone's in_bed record never double-counts a watch's stage records.
+_SLEEP_STAGE_PRIORITY: dict[str, int] = {
+    "asleep_deep": 6,
+    "asleep_rem": 5,
+    "asleep_core": 4,
+    "asleep_unspecified": 3,
+    "awake": 2,
+    "in_bed": 1,
+}
+_SLEEP_MAX_GAP_MINUTES = 60
+
+
+def _sleep_stage_minutes(intervals: list[tuple[int, int, str]]) -> dict[str, float]:
+    """Sweep the interval boundaries once, attributing each elementary segment to its top stage."""
+    events: list[tuple[int, int, str]] = []
+    for start_ms, end_ms, label in intervals:
+        events.append((start_ms, 1, label))
+        events.append((end_ms, -1, label))
+    events.sort(key=lambda event: event[0])
+    active: dict[str, int] = {}
+    minutes: dict[str, float] = {}
+    previous_ms: int | None = None
+    for time_ms, delta, label in events:
+        if previous_ms is not None and time_ms > previous_ms and active:
+            top = max(active, key=lambda name: _SLEEP_STAGE_PRIORITY.get(name, 0))
+            minutes[top] = minutes.get(top, 0.0) + (time_ms - previous_ms) / 60_000
+        previous_ms = time_ms
+        count = active.get(label, 0) + delta
+        if count:
+            active[label] = count
+        else:
+            active.pop(label, None)
+    return minutes
 
-def _metric_value_is_plausible(snapshot: dict[str, Any], metric_key: str, value: float) -> bool:
-    metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
-    if metric_key == "steps":
-        return 0 <= value <= 100_000
-    if metric_key == "resting_hr_avg":
-        return 20 <= value <= 220
-    if metric_key == "hrv_sdnn_avg":
-        return 0 < value <= 300
-    if metric_key == "vo2_max":
-        return 5 <= value <= 100
-    if metric_key == "oxygen_saturation_pct":
-        return 70 <= value <= 100
-    if metric_key == "respiratory_rate_avg":
-        return 5 <= value <= 40
-    if metric_key == "sleep_asleep_minutes":
-        in_bed = _coerce_numeric(metrics.get("sleep_in_bed_minutes"))
-        if not 60 <= value <= 1080:
-            return False
-        if in_bed is not None and value > in_bed + 60:
-            return False
-        return True
-    if metric_key == "sleep_in_bed_minutes":
-        asleep = _coerce_numeric(metrics.get("sleep_asleep_minutes"))
-        if not 60 <= value <= 1440:
-            return False
-        if asleep is not None and asleep > value + 60:
-            return False
-        return True
-    if metric_key == "body_mass_kg":
-        return 20 <= value <= 500
-    if metric_key == "body_fat_percentage":
-        return 1 <= value <= 80
-    if metric_key in {"blood_pressure_systolic_mmhg", "blood_pressure_diastolic_mmhg"}:
-        return 20 <= value <= 300
-    if metric_key == "blood_glucose_mg_dl":
-        return 20 <= value <= 500
-    if metric_key in {"wrist_temperature_celsius", "body_temperature_celsius", "basal_body_temperature_celsius"}:
-        return 25 <= value <= 45
-    return True
 
+def _sleep_sessions_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    max_gap_minutes: int,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if (end - start).days + 1 > 31:
+        _raise("INVALID_ARGUMENTS", "sleep session range too large (max 31 nights).")
 
-def _metric_observations(
-    snapshots: list[dict[str, Any]],
-    metric_key: str,
-) -> tuple[list[_MetricObservation], list[dict[str, Any]]]:
-    observations: list[_MetricObservation] = []
-    excluded_dates: list[dict[str, Any]] = []
-    for snapshot in snapshots:
-        metrics = snapshot.get("metrics")
-        if not isinstance(metrics, dict):
-            continue
-        value = _coerce_numeric(metrics.get(metric_key))
-        if value is None:
+    # The collector exports every sleep sample overlapping a day into that day's file, so a night
+    # ending on D is fully covered by the files for D-1 and D.
+    backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+    manifests, missing_dates = _read_raw_manifests(backend, pack_reader, start=start - dt.timedelta(days=1), end=end)
+
+    # Samples of a night spanning midnight appear in both day files; each is kept once, with the
+    # timezone of the first file it was read from.
+    unique: dict[tuple[int, int, str], dt.tzinfo] = {}
+    dates_read: list[str] = []
+    for day, manifest in manifests:
+        type_info = _manifest_types(manifest).get("sleep_analysis")
+        if not isinstance(type_info, dict) or not _type_has_readable_data(type_info):
             continue
-        if not _metric_value_is_plausible(snapshot, metric_key, value):
-            excluded_dates.append(
-                {
-                    "date": snapshot.get("date"),
-                    "value": _rounded(value),
-                    "reason": "implausible_value",
-                }
-            )
+        tz = _manifest_day_start(manifest, day).tzinfo or dt.timezone.utc
+        try:
+            for start_ms, end_ms, _, label, _ in _iter_sample_points(
+                backend,
+                pack_reader,
+                cache_root,
+                date=day,
+                type_key="sleep_analysis",
+                type_info=type_info,
+                commit_id=manifest.get("commit_id"),
+                with_components=False,
+            ):
+                if start_ms == _COLUMNAR_MISSING_TIME or end_ms == _COLUMNAR_MISSING_TIME or end_ms <= start_ms:
+                    continue
+                unique.setdefault((start_ms, end_ms, label or "unknown"), tz)
+        except _DataNotFound:
             continue
-        date_value = snapshot.get("date")
-        if not isinstance(date_value, str):
+        dates_read.append(day.isoformat())
+
+    intervals = sorted((*key, tz) for key, tz in unique.items())
+    gap_ms = max_gap_minutes * 60_000
+    groups: list[list[tuple[int, int, str, dt.tzinfo]]] = []
+    group_end = _COLUMNAR_MISSING_TIME
+    for interval in intervals:
+        if not groups or interval[0] > group_end + gap_ms:
+            groups.append([])
+            group_end = interval[1]
+        groups[-1].append(interval)
+        group_end = max(group_end, interval[1])
+
+    sessions: list[dict[str, Any]] = []
+    for group in groups:
+        session_start = group[0][0]
+        session_end = max(item[1] for item in group)
+        tz = max(group, key=lambda item: item[1])[3]
+        wake_date = dt.datetime.fromtimestamp(session_end / 1000, tz=tz).date()
+        if not (start <= wake_date <= end):
             continue
-        observations.append(_MetricObservation(date=date_value, value=value))
-    return observations, excluded_dates
+        stages = _sleep_stage_minutes([(item[0], item[1], item[2]) for item in group])
+        asleep = sum(value for key, value in stages.items() if key.startswith("asleep_"))
+        covered = sum(stages.values())
+        sessions.append(
+            {
+                "wake_date": wake_date.isoformat(),
+                "start": dt.datetime.fromtimestamp(session_start / 1000, tz=tz).isoformat(),
+                "end": dt.datetime.fromtimestamp(session_end / 1000, tz=tz).isoformat(),
+                "duration_minutes": _rounded((session_end - session_start) / 60_000),
+                "recorded_minutes": _rounded(covered),
+                "asleep_minutes": _rounded(asleep),
+                "awake_minutes": _rounded(stages.get("awake", 0.0)),
+                "efficiency": _rounded(asleep / covered) if covered else None,
+                "stages": {key: _rounded(value) for key, value in sorted(stages.items())},
+                "sample_count": len(group),
+                "main": False,
+            }
+        )
 
+    # The longest session per wake date is the night; the rest are naps or fragments.
+    longest: dict[str, dict[str, Any]] = {}
+    for session in sessions:
+        current = longest.get(session["wake_date"])
+        if current is None or session["duration_minutes"] > current["duration_minutes"]:
+            longest[session["wake_date"]] = session
+    for session in longest.values():
+        session["main"] = True
 
-def _segment_ranges(start: dt.date, end: dt.date, segment_count: int) -> list[tuple[dt.date, dt.date]]:
-    dates = _iter_dates(start, end)
-    if not dates:
-        return []
-    bounded_count = max(1, min(segment_count, len(dates)))
-    base_size = len(dates) // bounded_count
-    remainder = len(dates) % bounded_count
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "max_gap_minutes": max_gap_minutes,
+        "dates_read": dates_read,
+        "missing_dates": [date for date in missing_dates if date >= start_date],
+        "sessions": sessions,
+    }
 
-    segments: list[tuple[dt.date, dt.date]] = []
-    index = 0
-    for segment_index in range(bounded_count):
-        size = base_size + (1 if segment_index < remainder else 0)
-        segment_dates = dates[index : index + size]
-        segments.append((segment_dates[0], segment_dates[-1]))
-        index += size
-    return segments
 
+_SKETCH_CACHE_VERSION = 1
+_DEFAULT_PERCENTILES: tuple[str, ...] = ("p5", "p25", "p50", "p75", "p95")
 
-def _quartile_summary(values: list[float]) -> tuple[float, float, float] | None:
-    if len(values) < 4:
-        return None
-    try:
-        q1, q2, q3 = quantiles(values, n=4, method="inclusive")
-    except StatisticsError:
-        return None
-    return q1, q2, q3
 
+def _sketch_cache_path(cache_root: Path, date: dt.date, type_key: str) -> Path:
+    return cache_root / "sketches" / date.isoformat() / f"{type_key}.json"
 
-def _segment_mean(
-    observations: list[_MetricObservation],
-    segment_start: dt.date,
-    segment_end: dt.date,
-) -> tuple[int, float | None]:
-    segment_start_str = segment_start.isoformat()
-    segment_end_str = segment_end.isoformat()
-    values = [item.value for item in observations if segment_start_str <= item.date <= segment_end_str]
-    if not values:
-        return 0, None
-    return len(values), mean(values)
 
+def _type_day_sketch(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    *,
+    date: dt.date,
+    type_key: str,
+    type_info: dict[str, Any],
+    commit_id: Any,
+) -> tuple[dict[str, Any], bool]:
+    """Return (count/sum/min/max plus quantile sketch of one raw type file's values, served from cache).
+
+    The summary is built in one streaming pass over the raw file and cached per type per day, keyed
+    by the manifest ``commit_id`` and ``relpath`` like the columnar cache.
+    """
+    relpath = type_info.get("relpath")
+    path = _sketch_cache_path(cache_root, date, type_key) if cache_root is not None and isinstance(commit_id, str) else None
+    if path is not None:
+        try:
+            cached = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            cached = None
+        if (
+            isinstance(cached, dict)
+            and cached.get("version") == _SKETCH_CACHE_VERSION
+            and cached.get("commit_id") == commit_id
+            and cached.get("relpath") == relpath
+        ):
+            return cached, True
+
+    sketch = _QuantileSketch()
+    total = 0.0
+    low: float | None = None
+    high: float | None = None
+    for _, _, value, _, _ in _iter_sample_points(
+        backend,
+        pack_reader,
+        None,
+        date=date,
+        type_key=type_key,
+        type_info=type_info,
+        commit_id=commit_id,
+        with_components=False,
+    ):
+        if value is None:
+            continue
+        sketch.add(value)
+        total += value
+        low = value if low is None or value < low else low
+        high = value if high is None or value > high else high
+    summary = {
+        "version": _SKETCH_CACHE_VERSION,
+        "commit_id": commit_id,
+        "relpath": relpath,
+        "count": sketch.count,
+        "sum": total,
+        "min": low,
+        "max": high,
+        "sketch": sketch.to_json(),
+    }
+    if path is not None:
+        _write_cache_file(path, json.dumps(summary, separators=(",", ":")).encode("utf-8"))
+    return summary, False
+
+
+def _parse_percentiles(percentiles: list[str] | None) -> list[str]:
+    if not percentiles:
+        return list(_DEFAULT_PERCENTILES)
+    parsed: list[str] = []
+    for raw in percentiles:
+        name = raw.strip().lower()
+        if not (name.startswith("p") and name[1:].isdigit() and 1 <= int(name[1:]) <= 99):
+            _raise("INVALID_ARGUMENTS", f"unsupported percentile: {raw} (use p1..p99).")
+        name = f"p{int(name[1:])}"
+        if name not in parsed:
+            parsed.append(name)
+    return parsed
+
+
+def _sample_percentiles_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    type_keys: list[str],
+    percentiles: list[str] | None,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if (end - start).days + 1 > 366:
+        _raise("INVALID_ARGUMENTS", "range too large (max 366 days).")
+    requested_type_keys = _normalize_type_keys(type_keys)
+    if not requested_type_keys:
+        _raise("INVALID_ARGUMENTS", "type_keys must not be empty.")
+    names = _parse_percentiles(percentiles)
 
-def _metric_trend_summary(
-    observations: list[_MetricObservation],
-    segments: list[tuple[dt.date, dt.date]],
-) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-    segment_payload: list[dict[str, Any]] = []
-    segment_stats: list[tuple[int, float | None]] = []
-    for segment_start, segment_end in segments:
-        count, segment_mean_value = _segment_mean(observations, segment_start, segment_end)
-        segment_stats.append((count, segment_mean_value))
-        segment_payload.append(
-            {
-                "start_date": segment_start.isoformat(),
-                "end_date": segment_end.isoformat(),
-                "available_days": count,
-                "mean": _rounded(segment_mean_value),
+    backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+    manifests, missing_dates = _read_raw_manifests(backend, pack_reader, start=start, end=end)
+
+    type_payloads: list[dict[str, Any]] = []
+    for type_key in requested_type_keys:
+        catalog_entry = _SAMPLE_CATALOG_BY_KEY.get(type_key)
+        merged = _QuantileSketch()
+        total = 0.0
+        low: float | None = None
+        high: float | None = None
+        dates_read: list[str] = []
+        days_from_cache = 0
+        for day, manifest in manifests:
+            type_info = _manifest_types(manifest).get(type_key)
+            if not isinstance(type_info, dict) or not _type_has_readable_data(type_info):
+                continue
+            try:
+                summary, from_cache = _type_day_sketch(
+                    backend,
+                    pack_reader,
+                    cache_root,
+                    date=day,
+                    type_key=type_key,
+                    type_info=type_info,
+                    commit_id=manifest.get("commit_id"),
+                )
+            except _DataNotFound:
+                continue
+            dates_read.append(day.isoformat())
+            days_from_cache += from_cache
+            if not summary["count"]:
+                continue
+            merged.merge(_QuantileSketch.from_json(summary["sketch"]))
+            total += summary["sum"]
+            low = summary["min"] if low is None else min(low, summary["min"])
+            high = summary["max"] if high is None else max(high, summary["max"])
+
+        # Sketch buckets carry up to 1% relative error, so clamp to the exact extremes.
+        estimates = {name: merged.quantile(int(name[1:]) / 100) for name in names}
+        type_payloads.append(
+            {
+                "type_key": type_key,
+                "unit": catalog_entry.unit if catalog_entry else None,
+                "count": merged.count,
+                "mean": _rounded(total / merged.count) if merged.count else None,
+                "min": _rounded(low),
+                "max": _rounded(high),
+                "percentiles": {
+                    name: _rounded(min(max(value, low), high)) if value is not None and low is not None and high is not None else None
+                    for name, value in estimates.items()
+                },
+                "dates_read": dates_read,
+                "days_from_cache": days_from_cache,
             }
         )
 
-    valid_segments = [(count, value) for count, value in segment_stats if value is not None]
-    if len(valid_segments) < 2:
-        return segment_payload, {
-            "direction": "insufficient_data",
-            "delta": None,
-            "delta_pct": None,
-        }
-
-    first_count, first_mean = valid_segments[0]
-    last_count, last_mean = valid_segments[-1]
-    if first_count < 2 or last_count < 2:
-        return segment_payload, {
-            "direction": "insufficient_data",
-            "delta": None,
-            "delta_pct": None,
-        }
-
-    median_value = median([item.value for item in observations])
-    spread = max(item.value for item in observations) - min(item.value for item in observations)
-    threshold = max(abs(median_value) * 0.01, spread * 0.1, 0.1)
-    delta = last_mean - first_mean
-    if abs(delta) < threshold:
-        direction = "stable"
-    elif delta > 0:
-        direction = "up"
-    else:
-        direction = "down"
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "relative_accuracy": _QuantileSketch.relative_accuracy,
+        "missing_dates": missing_dates,
+        "types": type_payloads,
+    }
 
-    delta_pct = None
-    if abs(first_mean) > 1e-9:
-        delta_pct = (delta / first_mean) * 100
 
-    return segment_payload, {
-        "direction": direction,
-        "delta": _rounded(delta),
-        "delta_pct": _rounded(delta_pct),
-    }
+_COVERAGE_CACHE_VERSION = 1
+_COVERAGE_MAX_DAYS = 3660
+_MANIFEST_FETCH_WORKERS = 8
 
 
-def _metric_summary(
-    *,
-    metric_key: str,
-    snapshots: list[dict[str, Any]],
-    segments: list[tuple[dt.date, dt.date]],
-    requested_days: int,
-) -> dict[str, Any] | None:
-    observations, excluded_dates = _metric_observations(snapshots, metric_key)
-    if not observations:
-        return None
+def _coverage_cache_path(cache_root: Path, month: str) -> Path:
+    return cache_root / "manifests" / f"{month}.json"
 
-    values = [item.value for item in observations]
-    segment_payload, trend_payload = _metric_trend_summary(observations, segments)
-    min_observation = min(observations, key=lambda item: item.value)
-    max_observation = max(observations, key=lambda item: item.value)
-    latest_observation = max(observations, key=lambda item: item.date)
-    earliest_observation = min(observations, key=lambda item: item.date)
 
+def _manifest_type_summary(manifest: dict[str, Any]) -> dict[str, Any]:
     return {
-        "metric_key": metric_key,
-        "unit": _metric_unit_from_snapshots(snapshots, metric_key),
-        "available_days": len(observations),
-        "requested_days": requested_days,
-        "coverage_ratio": _rounded(len(observations) / requested_days) if requested_days > 0 else None,
-        "status_counts": _metric_status_counts(snapshots, metric_key),
-        "excluded_days": len(excluded_dates),
-        "excluded_dates": excluded_dates[:10],
-        "statistics": {
-            "mean": _rounded(mean(values)),
-            "median": _rounded(median(values)),
-            "min": _rounded(min_observation.value),
-            "min_date": min_observation.date,
-            "max": _rounded(max_observation.value),
-            "max_date": max_observation.date,
-            "earliest": _rounded(earliest_observation.value),
-            "earliest_date": earliest_observation.date,
-            "latest": _rounded(latest_observation.value),
-            "latest_date": latest_observation.date,
+        "commit_id": manifest.get("commit_id") if isinstance(manifest.get("commit_id"), str) else None,
+        "types": {
+            type_key: [
+                info.get("status") if isinstance(info.get("status"), str) else None,
+                int(info.get("record_count") or 0) if _type_has_readable_data(info) else 0,
+            ]
+            for type_key, info in _manifest_types(manifest).items()
         },
-        "trend": trend_payload,
-        "segments": segment_payload,
     }
 
 
-def _notable_reason_text(metric_key: str, direction: str) -> str:
-    if metric_key == "steps":
-        return "Lower-than-usual step volume." if direction == "low" else "Higher-than-usual step volume."
-    if metric_key == "resting_hr_avg":
-        return "Elevated resting heart rate." if direction == "high" else "Lower-than-usual resting heart rate."
-    if metric_key == "hrv_sdnn_avg":
-        return "Suppressed HRV." if direction == "low" else "Higher-than-usual HRV."
-    if metric_key == "oxygen_saturation_pct":
-        return "Lower-than-usual oxygen saturation." if direction == "low" else "Higher-than-usual oxygen saturation."
-    if metric_key == "respiratory_rate_avg":
-        return "Elevated respiratory rate." if direction == "high" else "Lower-than-usual respiratory rate."
-    if metric_key == "sleep_asleep_minutes":
-        return "Short sleep duration." if direction == "low" else "Long sleep duration."
-    return "Notable deviation."
-
-
-def _notable_days(
-    snapshots: list[dict[str, Any]],
-    metric_summaries: list[dict[str, Any]],
-) -> list[dict[str, Any]]:
-    baselines: dict[str, dict[str, float]] = {}
-    for metric_summary in metric_summaries:
-        metric_key = metric_summary["metric_key"]
-        if metric_key not in _NOTABLE_ANALYSIS_METRIC_KEYS:
-            continue
-        observations, _ = _metric_observations(snapshots, metric_key)
-        quartile_summary = _quartile_summary([item.value for item in observations])
-        if quartile_summary is None:
+def _month_manifest_summaries(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    *,
+    month: str,
+    dates: list[dt.date],
+) -> tuple[dict[str, dict[str, Any]], int]:
+    """Return ({date: {commit_id, types: {type_key: [status, record_count]}}}, manifests fetched) for ``dates``.
+
+    Summaries are cached per month and reused while the daily month index still lists the same
+    ``commit_id`` for the day; days the index does not list are treated as not exported, and only a
+    month without an index is probed day by day. Monthly packs answer from their index; the
+    remaining per-day manifests are fetched concurrently. Raw type files are never read.
+    """
+    commit_ids = pack_reader.month_commit_ids(month)
+    path = _coverage_cache_path(cache_root, month) if cache_root is not None else None
+    cached: dict[str, Any] = {}
+    if path is not None:
+        try:
+            loaded = json.loads(path.read_bytes())
+        except (OSError, ValueError):
+            loaded = None
+        if isinstance(loaded, dict) and loaded.get("version") == _COVERAGE_CACHE_VERSION and isinstance(loaded.get("days"), dict):
+            cached = loaded["days"]
+
+    summaries: dict[str, dict[str, Any]] = {}
+    to_fetch: list[dt.date] = []
+    for day in dates:
+        date = day.isoformat()
+        if commit_ids and date not in commit_ids:
             continue
-        q1, q2, q3 = quartile_summary
-        iqr = q3 - q1
-        fallback_scale = max(abs(q2) * 0.05, 1.0)
-        baselines[metric_key] = {
-            "q1": q1,
-            "median": q2,
-            "q3": q3,
-            "scale": iqr if iqr > 0 else fallback_scale,
-        }
-
-    notable_days: list[dict[str, Any]] = []
-    for snapshot in snapshots:
-        metrics = snapshot.get("metrics")
-        if not isinstance(metrics, dict):
+        entry = cached.get(date)
+        if isinstance(entry, dict) and entry.get("commit_id") is not None and entry.get("commit_id") == commit_ids.get(date):
+            summaries[date] = entry
             continue
-        reasons: list[dict[str, Any]] = []
-        score = 0.0
-        for metric_key, baseline in baselines.items():
-            raw_value = _coerce_numeric(metrics.get(metric_key))
-            if raw_value is None or not _metric_value_is_plausible(snapshot, metric_key, raw_value):
-                continue
-            q1 = baseline["q1"]
-            q3 = baseline["q3"]
-            scale = baseline["scale"]
-            lower = q1 - (1.5 * scale)
-            upper = q3 + (1.5 * scale)
-            if raw_value < lower:
-                severity = (lower - raw_value) / scale
-                reasons.append(
-                    {
-                        "metric_key": metric_key,
-                        "direction": "low",
-                        "value": _rounded(raw_value),
-                        "baseline_median": _rounded(baseline["median"]),
-                        "summary": _notable_reason_text(metric_key, "low"),
-                        "severity": _rounded(severity),
-                    }
-                )
-                score += severity
-            elif raw_value > upper:
-                severity = (raw_value - upper) / scale
-                reasons.append(
-                    {
-                        "metric_key": metric_key,
-                        "direction": "high",
-                        "value": _rounded(raw_value),
-                        "baseline_median": _rounded(baseline["median"]),
-                        "summary": _notable_reason_text(metric_key, "high"),
-                        "severity": _rounded(severity),
-                    }
-                )
-                score += severity
-        if reasons:
-            notable_days.append(
-                {
-                    "date": snapshot.get("date"),
-                    "score": _rounded(score),
-                    "reasons": sorted(reasons, key=lambda item: item["severity"] or 0, reverse=True),
-                }
-            )
-
-    notable_days.sort(key=lambda item: (item["score"] or 0), reverse=True)
-    return notable_days[:7]
-
+        manifest = pack_reader.manifest(day)
+        if manifest is not None:
+            summaries[date] = _manifest_type_summary(manifest)
+        else:
+            to_fetch.append(day)
 
-def _analysis_insights(
-    metric_summaries: list[dict[str, Any]],
-    *,
-    missing_dates: list[str],
-    requested_days: int,
-) -> list[str]:
-    insights: list[str] = []
-    metric_summary_by_key = {item["metric_key"]: item for item in metric_summaries}
+    def fetch(day: dt.date) -> dict[str, Any] | None:
+        try:
+            return _manifest_type_summary(_read_raw_manifest(day, backend))
+        except _DataNotFound:
+            return None
 
-    steps_summary = metric_summary_by_key.get("steps")
-    if steps_summary:
-        direction = steps_summary["trend"]["direction"]
-        if direction == "up":
-            insights.append("Step volume trended up in the later segment.")
-        elif direction == "down":
-            insights.append("Step volume trended down in the later segment.")
+    if len(to_fetch) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(to_fetch), _MANIFEST_FETCH_WORKERS)) as pool:
+            fetched = list(pool.map(fetch, to_fetch))
+    else:
+        fetched = [fetch(day) for day in to_fetch]
+    for day, summary in zip(to_fetch, fetched):
+        if summary is not None:
+            summaries[day.isoformat()] = summary
+
+    fresh = {date: summary for date, summary in summaries.items() if cached.get(date) != summary}
+    if path is not None and fresh:
+        _write_cache_file(
+            path,
+            json.dumps(
+                {"version": _COVERAGE_CACHE_VERSION, "month": month, "days": {**cached, **fresh}}, separators=(",", ":")
+            ).encode("utf-8"),
+        )
+    return summaries, len(to_fetch)
 
-    resting_hr_summary = metric_summary_by_key.get("resting_hr_avg")
-    hrv_summary = metric_summary_by_key.get("hrv_sdnn_avg")
-    if resting_hr_summary and hrv_summary:
-        resting_direction = resting_hr_summary["trend"]["direction"]
-        hrv_direction = hrv_summary["trend"]["direction"]
-        if resting_direction == "down" and hrv_direction == "up":
-            insights.append("Recovery markers improved in the later segment: resting HR fell while HRV rose.")
-        elif resting_direction == "up" and hrv_direction == "down":
-            insights.append("Recovery markers weakened in the later segment: resting HR rose while HRV fell.")
-        elif resting_direction == "stable" and hrv_direction == "stable":
-            insights.append("Recovery markers were broadly stable across the range.")
 
-    oxygen_summary = metric_summary_by_key.get("oxygen_saturation_pct")
-    if oxygen_summary:
-        oxygen_stats = oxygen_summary["statistics"]
-        oxygen_min = oxygen_stats.get("min")
-        oxygen_max = oxygen_stats.get("max")
-        if isinstance(oxygen_min, (int, float)) and isinstance(oxygen_max, (int, float)) and oxygen_max - oxygen_min <= 2:
-            insights.append("Oxygen saturation stayed relatively stable.")
+def _date_runs(dates: list[str]) -> list[list[str]]:
+    """Collapse sorted ISO dates into inclusive [first, last] runs of consecutive days."""
+    runs: list[list[str]] = []
+    previous: dt.date | None = None
+    for date in dates:
+        day = dt.date.fromisoformat(date)
+        if previous is not None and (day - previous).days == 1:
+            runs[-1][1] = date
+        else:
+            runs.append([date, date])
+        previous = day
+    return runs
 
-    vo2_summary = metric_summary_by_key.get("vo2_max")
-    if vo2_summary and vo2_summary["available_days"] < 4:
-        insights.append("VO2 max data is sparse; cardio-fitness trend confidence is low.")
 
-    sleep_summaries = [
-        item
-        for item in metric_summaries
-        if item["metric_key"] in {"sleep_asleep_minutes", "sleep_in_bed_minutes"} and item["excluded_days"] > 0
-    ]
-    if sleep_summaries:
-        insights.append("Sleep metrics contain suspect dates and should be interpreted cautiously.")
+def _coverage_report_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    type_keys: list[str] | None,
+    tags: list[HealthSampleTag] | None,
+    kinds: list[HealthSampleKind] | None,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    requested_days = (end - start).days + 1
+    if requested_days > _COVERAGE_MAX_DAYS:
+        _raise("INVALID_ARGUMENTS", f"range too large (max {_COVERAGE_MAX_DAYS} days).")
+    requested_type_keys = _normalize_type_keys(type_keys)
 
-    if missing_dates:
-        insights.append(
-            f"{len(missing_dates)} of {requested_days} requested dates are missing from exported daily snapshots."
+    backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    cache_root = _cache_root()
+    dates_by_month: dict[str, list[dt.date]] = {}
+    for day in _iter_dates(start, end):
+        dates_by_month.setdefault(day.isoformat()[:7], []).append(day)
+
+    summaries: dict[str, dict[str, Any]] = {}
+    manifests_fetched = 0
+    for month, dates in dates_by_month.items():
+        month_summaries, fetched = _month_manifest_summaries(backend, pack_reader, cache_root, month=month, dates=dates)
+        summaries.update(month_summaries)
+        manifests_fetched += fetched
+
+    covered: dict[str, list[str]] = {}
+    record_counts: dict[str, int] = {}
+    status_counts: dict[str, dict[str, int]] = {}
+    for date in sorted(summaries):
+        types = summaries[date]["types"]
+        selected = _select_manifest_type_keys(
+            {"types": {type_key: {} for type_key in types}},
+            requested_type_keys=requested_type_keys,
+            tags=tags,
+            kinds=kinds,
         )
+        for type_key in selected:
+            status, record_count = types[type_key]
+            counts = status_counts.setdefault(type_key, {})
+            counts[status or "unknown"] = counts.get(status or "unknown", 0) + 1
+            record_counts[type_key] = record_counts.get(type_key, 0) + record_count
+            covered.setdefault(type_key, [])
+            if record_count > 0:
+                covered[type_key].append(date)
+
+    missing_dates = [day.isoformat() for day in _iter_dates(start, end) if day.isoformat() not in summaries]
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "days_requested": requested_days,
+        "days_with_manifest": len(summaries),
+        "missing_runs": _date_runs(missing_dates),
+        "manifests_fetched": manifests_fetched,
+        "types": [
+            {
+                "type_key": type_key,
+                "days_with_data": len(covered[type_key]),
+                "record_count": record_counts[type_key],
+                "status_counts": dict(sorted(status_counts[type_key].items())),
+                "coverage_runs": _date_runs(covered[type_key]),
+            }
+            for type_key in sorted(covered)
+        ],
+    }
 
-    return insights
 
+_PRESIGN_MAX_DAYS = 31
+_PRESIGN_MAX_EXPIRES_S = 7 * 24 * 3600
 
-def _analyze_range_impl(
+
+def _presign_objects_impl(
     *,
     start_date: str,
     end_date: str,
-    metric_keys: list[str] | None,
-    segment_count: int,
+    type_keys: list[str] | None,
+    tags: list[HealthSampleTag] | None,
+    kinds: list[HealthSampleKind] | None,
+    expires_s: int,
+    include_manifests: bool,
     storage_backend: _StorageBackendName,
 ) -> dict[str, Any]:
     start = _parse_ymd(start_date)
     end = _parse_ymd(end_date)
     if start > end:
         _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
-    if not (1 <= segment_count <= 12):
-        _raise("INVALID_ARGUMENTS", "segment_count must be between 1 and 12.")
+    if (end - start).days + 1 > _PRESIGN_MAX_DAYS:
+        _raise("INVALID_ARGUMENTS", f"presign range too large (max {_PRESIGN_MAX_DAYS} days).")
+    if not 1 <= expires_s <= _PRESIGN_MAX_EXPIRES_S:
+        _raise("INVALID_ARGUMENTS", f"expires_s must be between 1 and {_PRESIGN_MAX_EXPIRES_S}.")
+    requested_type_keys = _normalize_type_keys(type_keys)
 
-    range_payload = _read_range_metrics_impl(
-        start_date=start_date,
-        end_date=end_date,
-        storage_backend=storage_backend,
-    )
-    snapshots = range_payload["data"]
-    missing_dates = range_payload["missing_dates"]
-    requested_days = (end - start).days + 1
-    segments = _segment_ranges(start, end, segment_count)
+    backend = _resolve_storage_backend(storage_backend)
+    pack_reader = _RawPackReader(backend, end=end)
+    manifests: dict[dt.date, dict[str, Any] | None] = {}
+    to_fetch: list[dt.date] = []
+    for day in _iter_dates(start, end):
+        manifest = pack_reader.manifest(day)
+        if manifest is not None:
+            manifests[day] = manifest
+        else:
+            to_fetch.append(day)
 
-    requested_metric_keys = _normalize_type_keys(metric_keys) if metric_keys else list(_DEFAULT_ANALYSIS_METRIC_KEYS)
-    metric_summaries: list[dict[str, Any]] = []
-    for metric_key in requested_metric_keys:
-        summary = _metric_summary(
-            metric_key=metric_key,
-            snapshots=snapshots,
-            segments=segments,
-            requested_days=requested_days,
-        )
-        if summary is not None:
-            metric_summaries.append(summary)
+    def fetch(day: dt.date) -> dict[str, Any] | None:
+        try:
+            return _read_raw_manifest(day, backend)
+        except _DataNotFound:
+            return None
 
-    collectors = sorted(
-        {
-            collector.get("collector_id")
-            for snapshot in snapshots
-            for collector in [snapshot.get("collector")]
-            if isinstance(collector, dict) and isinstance(collector.get("collector_id"), str)
-        }
-    )
-    device_ids = sorted(
-        {
-            collector.get("device_id")
-            for snapshot in snapshots
-            for collector in [snapshot.get("collector")]
-            if isinstance(collector, dict) and isinstance(collector.get("device_id"), str)
-        }
-    )
-    commit_ids = sorted(
-        {
-            commit_id
-            for snapshot in snapshots
-            for commit_id in [snapshot.get("commit_id")]
-            if isinstance(commit_id, str)
-        }
-    )
+    if len(to_fetch) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(to_fetch), _MANIFEST_FETCH_WORKERS)) as pool:
+            manifests.update(zip(to_fetch, pool.map(fetch, to_fetch)))
+    else:
+        manifests.update((day, fetch(day)) for day in to_fetch)
+
+    # Every URL shares one signing instant so the whole batch expires together.
+    now = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+    dates: list[dict[str, Any]] = []
+    missing_dates: list[str] = []
+    object_count = 0
+    for day in sorted(manifests):
+        manifest = manifests[day]
+        if manifest is None:
+            missing_dates.append(day.isoformat())
+            continue
+        manifest_types = _manifest_types(manifest)
+        objects: list[dict[str, Any]] = []
+        for type_key in _select_manifest_type_keys(
+            manifest,
+            requested_type_keys=requested_type_keys,
+            tags=tags,
+            kinds=kinds,
+        ):
+            type_info = manifest_types.get(type_key)
+            if not isinstance(type_info, dict) or not _type_has_readable_data(type_info):
+                continue
+            objects.append(
+                {
+                    "type_key": type_key,
+                    "relpath": type_info["relpath"],
+                    "encoding": _raw_type_encoding(type_info),
+                    "record_count": int(type_info.get("record_count") or 0),
+                    "url": backend.presign_get(type_info["relpath"], expires_s=expires_s, now=now),
+                }
+            )
+        entry: dict[str, Any] = {
+            "date": day.isoformat(),
+            "commit_id": manifest.get("commit_id"),
+            "types": objects,
+        }
+        if include_manifests:
+            relpath = _raw_manifest_path(day)
+            entry["manifest"] = {"relpath": relpath, "url": backend.presign_get(relpath, expires_s=expires_s, now=now)}
+            object_count += 1
+        object_count += len(objects)
+        dates.append(entry)
 
     return {
         "start_date": start_date,
         "end_date": end_date,
-        "storage_backend": range_payload["storage_backend"],
-        "read_strategy": {
-            "uses_month_indexes_only": True,
-            "raw_samples_read": False,
-        },
-        "days_requested": requested_days,
-        "days_available": len(snapshots),
+        "storage_backend": backend.backend,
+        "expires_at": (now + dt.timedelta(seconds=expires_s)).isoformat().replace("+00:00", "Z"),
+        "object_count": object_count,
         "missing_dates": missing_dates,
-        "collector_ids": collectors,
-        "device_ids": device_ids,
-        "latest_commit_id": commit_ids[-1] if commit_ids else None,
-        "segment_count": len(segments),
-        "metrics": metric_summaries,
-        "notable_days": _notable_days(snapshots, metric_summaries),
-        "insights": _analysis_insights(
-            metric_summaries,
-            missing_dates=missing_dates,
-            requested_days=requested_days,
+        "dates": dates,
+    }
+
+
+_RECOMPUTE_MAX_WORKERS = 8
+_SLEEP_ASLEEP_LABELS = frozenset({"asleep_unspecified", "asleep_core", "asleep_deep", "asleep_rem"})
+_BLOOD_PRESSURE_COMPONENTS = {
+    "blood_pressure_systolic_mmhg": "systolic_mmhg",
+    "blood_pressure_diastolic_mmhg": "diastolic_mmhg",
+}
+
+
+@dataclass
+class _RawTypeDayStats:
+    """One pass over a raw type file, holding what every aggregate_hint needs for that day."""
+
+    samples: int = 0
+    in_day_count: int = 0
+    in_day_sum: float = 0.0
+    latest_key: tuple[int, int] | None = None
+    latest_value: float | None = None
+    latest_components: Any = None
+    asleep_ms: int = 0
+    in_bed_ms: int = 0
+    saw_asleep: bool = False
+    saw_in_bed: bool = False
+
+
+def _manifest_day_window_ms(manifest: dict[str, Any], date: dt.date) -> tuple[int, int]:
+    start_ms = _manifest_day_start_ms(manifest, date)
+    day = manifest.get("day")
+    end_ms = _iso_to_epoch_ms(day.get("end")) if isinstance(day, dict) else _COLUMNAR_MISSING_TIME
+    return start_ms, end_ms if end_ms != _COLUMNAR_MISSING_TIME else start_ms + 86_400_000
+
+
+def _raw_type_day_stats(
+    backend: _StorageBackend,
+    pack_reader: _RawPackReader,
+    cache_root: Path | None,
+    *,
+    date: dt.date,
+    manifest: dict[str, Any],
+    type_key: str,
+    type_info: dict[str, Any],
+) -> _RawTypeDayStats:
+    # Mirrors the collector: sums and averages use samples strictly inside the day window, "latest"
+    # is the sample with the greatest (start, end), and sleep minutes clip each sample to the day.
+    day_start_ms, day_end_ms = _manifest_day_window_ms(manifest, date)
+    stats = _RawTypeDayStats()
+    for start_ms, end_ms, value, label, components in _iter_sample_points(
+        backend,
+        pack_reader,
+        cache_root,
+        date=date,
+        type_key=type_key,
+        type_info=type_info,
+        commit_id=manifest.get("commit_id"),
+        with_components=type_key == "blood_pressure",
+    ):
+        if start_ms == _COLUMNAR_MISSING_TIME:
+            continue
+        stats.samples += 1
+        end_ms = start_ms if end_ms == _COLUMNAR_MISSING_TIME else end_ms
+        if value is not None and day_start_ms <= start_ms and end_ms <= day_end_ms:
+            stats.in_day_count += 1
+            stats.in_day_sum += value
+        if (value is not None or components is not None) and (stats.latest_key is None or (start_ms, end_ms) > stats.latest_key):
+            stats.latest_key = (start_ms, end_ms)
+            stats.latest_value = value
+            stats.latest_components = components
+        if label is not None:
+            overlap = min(end_ms, day_end_ms) - max(start_ms, day_start_ms)
+            if overlap > 0 and label in _SLEEP_ASLEEP_LABELS:
+                stats.saw_asleep = True
+                stats.asleep_ms += overlap
+            elif overlap > 0 and label == "in_bed":
+                stats.saw_in_bed = True
+                stats.in_bed_ms += overlap
+    return stats
+
+
+def _recompute_raw_metrics(
+    backend: _StorageBackend,
+    *,
+    date: dt.date,
+    manifest: dict[str, Any],
+    metric_keys: list[str],
+) -> dict[str, dict[str, Any]]:
+    """Recompute ``raw_aggregate`` metrics for one day from its raw files.
+
+    Each related type file is read once, whatever the number of metrics it feeds (blood pressure and
+    sleep feed two each), and the files are fetched concurrently.
+    """
+    pack_reader = _RawPackReader(backend, end=date)
+    cache_root = _cache_root()
+    manifest_types = _manifest_types(manifest)
+    sources = {
+        metric_key: _METRIC_SOURCE_CATALOG[metric_key]
+        for metric_key in metric_keys
+        if metric_key in _METRIC_SOURCE_CATALOG and _METRIC_SOURCE_CATALOG[metric_key].source_model == "raw_aggregate"
+    }
+    type_keys = sorted(
+        {
+            type_key
+            for source in sources.values()
+            for type_key in source.related_type_keys
+            if isinstance(manifest_types.get(type_key), dict) and _type_has_readable_data(manifest_types[type_key])
+        }
+    )
+
+    def scan(type_key: str) -> _RawTypeDayStats | None:
+        try:
+            return _raw_type_day_stats(
+                backend,
+                pack_reader,
+                cache_root,
+                date=date,
+                manifest=manifest,
+                type_key=type_key,
+                type_info=manifest_types[type_key],
+            )
+        except _DataNotFound:
+            return None
+
+    if len(type_keys) > 1:
+        pack_reader.manifest(date)  # warm the shared month index before the workers race for it
+        with ThreadPoolExecutor(max_workers=min(len(type_keys), _RECOMPUTE_MAX_WORKERS)) as pool:
+            type_stats = dict(zip(type_keys, pool.map(scan, type_keys)))
+    else:
+        type_stats = {type_key: scan(type_key) for type_key in type_keys}
+
+    results: dict[str, dict[str, Any]] = {}
+    for metric_key, source in sources.items():
+        stats = type_stats.get(source.related_type_keys[0])
+        value: float | None = None
+        used = 0
+        if stats is not None:
+            hint = source.aggregate_hint
+            if hint == "sum_per_day" and stats.in_day_count:
+                value, used = stats.in_day_sum, stats.in_day_count
+            elif hint == "average_per_day" and stats.in_day_count:
+                value, used = stats.in_day_sum / stats.in_day_count, stats.in_day_count
+            elif hint == "latest_sample" and stats.latest_value is not None:
+                value, used = stats.latest_value, 1
+            elif hint == "latest_components" and isinstance(stats.latest_components, dict):
+                value = _coerce_numeric(stats.latest_components.get(_BLOOD_PRESSURE_COMPONENTS.get(metric_key, "")))
+                used = int(value is not None)
+            elif hint == "category_minutes_per_day":
+                asleep = metric_key == "sleep_asleep_minutes"
+                if stats.saw_asleep if asleep else stats.saw_in_bed:
+                    value = (stats.asleep_ms if asleep else stats.in_bed_ms) / 60_000
+                    used = stats.samples
+        results[metric_key] = {
+            "value": _rounded(value),
+            "status": "ok" if value is not None else "no_data",
+            "samples_scanned": stats.samples if stats is not None else 0,
+            "samples_used": used,
+        }
+    return results
+
+
+def _inspect_day_impl(
+    *,
+    date: str,
+    metric_keys: list[str] | None,
+    type_keys: list[str] | None,
+    storage_backend: _StorageBackendName,
+    recompute: bool = False,
+) -> dict[str, Any]:
+    return _memoized_inspect_day(
+        _resolve_storage_backend(storage_backend),
+        day=_parse_ymd(date),
+        requested_metrics=_normalize_type_keys(metric_keys),
+        requested_types=_normalize_type_keys(type_keys),
+        recompute=recompute,
+    )
+
+
+def _memoized_inspect_day(
+    backend: _StorageBackend,
+    *,
+    day: dt.date,
+    requested_metrics: list[str],
+    requested_types: list[str],
+    recompute: bool,
+) -> dict[str, Any]:
+    def compute() -> dict[str, Any]:
+        return _inspect_day_result(
+            backend,
+            day=day,
+            requested_metrics=requested_metrics,
+            requested_types=requested_types,
+            recompute=recompute,
+        )
+
+    try:
+        # The result depends on the daily snapshot and the raw manifest; the raw type files a
+        # recompute reads are pinned by the manifest's commit_id.
+        tokens: list[Any] = [backend.etag(_daily_date_path(day)), backend.etag(_raw_manifest_path(day))]
+    except _DataNotFound:
+        return compute()
+    memo_key = _result_memo_key(
+        "inspect_day",
+        backend,
+        {
+            "date": day.isoformat(),
+            "metric_keys": requested_metrics,
+            "type_keys": requested_types,
+            "recompute": recompute,
+        },
+    )
+    return _memoized_result(memo_key, tokens, compute)[0]
+
+
+_BATCH_MAX_DATES = 100
+_BATCH_MAX_WORKERS = 8
+
+
+def _parse_batch_dates(dates: list[str]) -> list[dt.date]:
+    days = list(dict.fromkeys(_parse_ymd(value.strip()) for value in dates))
+    if not days:
+        _raise("INVALID_ARGUMENTS", "dates must not be empty.")
+    if len(days) > _BATCH_MAX_DATES:
+        _raise("INVALID_ARGUMENTS", f"too many dates (max {_BATCH_MAX_DATES}).")
+    return days
+
+
+def _batch_error(date: str, exc: Exception) -> dict[str, Any]:
+    if isinstance(exc, _DataNotFound):
+        return {"date": date, "code": "DATA_NOT_FOUND", "message": f"No data found for {date}."}
+    code, separator, message = str(exc).partition(": ")
+    if not separator or not code.isupper():
+        code, message = "INTERNAL", str(exc)
+    return {"date": date, "code": code, "message": message}
+
+
+def _run_batch(days: list[dt.date], read: Callable[[dt.date], dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Run ``read`` for every day concurrently; return (results, per-date errors), both in request order."""
+
+    def attempt(day: dt.date) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        try:
+            return read(day), None
+        except (ToolError, _DataNotFound) as exc:
+            return None, _batch_error(day.isoformat(), exc)
+
+    if len(days) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(days), _BATCH_MAX_WORKERS)) as pool:
+            outcomes = list(pool.map(attempt, days))
+    else:
+        outcomes = [attempt(day) for day in days]
+    return (
+        [result for result, _ in outcomes if result is not None],
+        [error for _, error in outcomes if error is not None],
+    )
+
+
+def _inspect_day_batch_impl(
+    *,
+    dates: list[str],
+    metric_keys: list[str] | None,
+    type_keys: list[str] | None,
+    storage_backend: _StorageBackendName,
+    recompute: bool = False,
+) -> dict[str, Any]:
+    days = _parse_batch_dates(dates)
+    backend = _resolve_storage_backend(storage_backend)
+    requested_metrics = _normalize_type_keys(metric_keys)
+    requested_types = _normalize_type_keys(type_keys)
+
+    results, errors = _run_batch(
+        days,
+        lambda day: _memoized_inspect_day(
+            backend,
+            day=day,
+            requested_metrics=requested_metrics,
+            requested_types=requested_types,
+            recompute=recompute,
         ),
+    )
+    return {
+        "storage_backend": backend.backend,
+        "data": results,
+        "errors": errors,
+    }
+
+
+def _inspect_day_result(
+    backend: _StorageBackend,
+    *,
+    day: dt.date,
+    requested_metrics: list[str],
+    requested_types: list[str],
+    recompute: bool,
+) -> dict[str, Any]:
+    date = day.isoformat()
+    try:
+        snapshot = _read_daily_snapshot(day, backend)
+    except _DataNotFound:
+        _raise("DATA_NOT_FOUND", f"No daily metrics found for {date}.")
+
+    try:
+        manifest = _read_raw_manifest(day, backend)
+    except _DataNotFound:
+        _raise("DATA_NOT_FOUND", f"No raw manifest found for {date}.")
+
+    if requested_metrics:
+        metric_keys_to_inspect = requested_metrics
+    elif requested_types:
+        metric_keys_to_inspect = [
+            metric_key
+            for metric_key, source in _METRIC_SOURCE_CATALOG.items()
+            if set(source.related_type_keys).intersection(requested_types)
+        ]
+    else:
+        metric_keys_to_inspect = list(_METRIC_SOURCE_CATALOG.keys())
+
+    metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
+    metric_status = snapshot.get("metric_status") if isinstance(snapshot.get("metric_status"), dict) else {}
+    metric_units = snapshot.get("metric_units") if isinstance(snapshot.get("metric_units"), dict) else {}
+    manifest_types = _manifest_types(manifest)
+    recomputed = (
+        _recompute_raw_metrics(backend, date=day, manifest=manifest, metric_keys=metric_keys_to_inspect) if recompute else {}
+    )
+
+    inspection: list[dict[str, Any]] = []
+    for metric_key in metric_keys_to_inspect:
+        source = _METRIC_SOURCE_CATALOG.get(metric_key)
+        if source is None:
+            continue
+        related_raw_types = {
+            type_key: manifest_types[type_key]
+            for type_key in source.related_type_keys
+            if type_key in manifest_types and (not requested_types or type_key in requested_types)
+        }
+        diagnosis_code, diagnosis_message = _metric_diagnosis(
+            metric_key=metric_key,
+            metric_status=metric_status.get(metric_key) if isinstance(metric_status.get(metric_key), str) else None,
+            related_raw_types=related_raw_types,
+        )
+        inspection.append(
+            {
+                "metric_key": metric_key,
+                "value": metrics.get(metric_key),
+                "status": metric_status.get(metric_key),
+                "unit": metric_units.get(metric_key),
+                "source_model": source.source_model,
+                "aggregate_hint": source.aggregate_hint,
+                "description": source.description,
+                "related_type_keys": list(source.related_type_keys),
+                "related_raw_types": related_raw_types,
+                "diagnosis": {
+                    "code": diagnosis_code,
+                    "message": diagnosis_message,
+                },
+            }
+        )
+        if metric_key in recomputed:
+            entry = recomputed[metric_key]
+            stored = _coerce_numeric(metrics.get(metric_key))
+            entry["delta"] = _rounded(entry["value"] - stored) if entry["value"] is not None and stored is not None else None
+            inspection[-1]["recomputed"] = entry
+
+    manifest_view = _public_raw_manifest(
+        manifest,
+        backend_name=backend.backend,
+        relpath=_raw_manifest_path(day),
+        type_keys=requested_types or None,
+    )
+
+    return {
+        "date": date,
+        "storage_backend": backend.backend,
+        "snapshot": _public_daily_snapshot(snapshot, backend.backend),
+        "manifest": manifest_view,
+        "metrics": inspection,
+    }
+
+
+_VERIFY_MAX_DAYS = 92
+_VERIFY_MAX_WORKERS = 8
+
+
+def _count_raw_lines(backend: _StorageBackend, type_info: dict[str, Any]) -> tuple[int, int]:
+    """Stream one raw type file and return (sample records, unparseable lines) without holding it."""
+    samples = 0
+    invalid = 0
+    for line in _iter_raw_lines(backend, type_info):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError:
+            invalid += 1
+            continue
+        if isinstance(value, dict) and value.get("record") == "sample":
+            samples += 1
+    return samples, invalid
+
+
+def _verify_day_documents(
+    backend: _StorageBackend,
+    day: dt.date,
+    index_entry: dict[str, Any] | None,
+) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    """Check one day's snapshot, raw manifest, and month-index entry against each other.
+
+    Returns the raw manifest (None when missing) and the issues found.
+    """
+    date = day.isoformat()
+    issues: list[dict[str, Any]] = []
+    try:
+        snapshot: dict[str, Any] | None = _read_daily_snapshot(day, backend)
+    except _DataNotFound:
+        snapshot = None
+    try:
+        manifest: dict[str, Any] | None = _read_raw_manifest(day, backend)
+    except _DataNotFound:
+        manifest = None
+    if snapshot is None and manifest is None and index_entry is None:
+        return None, issues
+
+    if snapshot is None:
+        issues.append({"date": date, "check": "snapshot_missing"})
+    if manifest is None:
+        issues.append({"date": date, "check": "manifest_missing"})
+    if index_entry is None:
+        issues.append({"date": date, "check": "month_index_missing_day"})
+    elif snapshot is not None:
+        differing = sorted(key for key in set(snapshot) | set(index_entry) if snapshot.get(key) != index_entry.get(key))
+        if differing:
+            issues.append({"date": date, "check": "month_index_mismatch", "fields": differing})
+
+    commit_ids = {
+        name: document.get("commit_id")
+        for name, document in (("snapshot", snapshot), ("month_index", index_entry), ("manifest", manifest))
+        if document is not None
+    }
+    if len(set(map(str, commit_ids.values()))) > 1:
+        issues.append({"date": date, "check": "commit_mismatch", "commit_ids": commit_ids})
+    if snapshot is not None and snapshot.get("raw_manifest_relpath") not in (None, _raw_manifest_path(day)):
+        issues.append({"date": date, "check": "manifest_relpath_mismatch", "relpath": snapshot.get("raw_manifest_relpath")})
+    return manifest, issues
+
+
+def _verify_type_file(
+    backend: _StorageBackend,
+    *,
+    date: str,
+    type_key: str,
+    type_info: dict[str, Any],
+    count_samples: bool,
+) -> tuple[int, list[dict[str, Any]]]:
+    relpath = type_info["relpath"]
+    try:
+        if not count_samples:
+            backend.etag(relpath)
+            return 0, []
+        samples, invalid = _count_raw_lines(backend, type_info)
+    except _DataNotFound:
+        return 0, [{"date": date, "check": "relpath_missing", "type_key": type_key, "relpath": relpath}]
+    except ToolError as exc:
+        return 0, [{"date": date, "check": "decode_error", "type_key": type_key, "relpath": relpath, "message": str(exc)}]
+
+    issues: list[dict[str, Any]] = []
+    expected = int(type_info.get("record_count") or 0)
+    if samples != expected:
+        issues.append(
+            {"date": date, "check": "record_count_mismatch", "type_key": type_key, "expected": expected, "actual": samples}
+        )
+    if invalid:
+        issues.append({"date": date, "check": "invalid_lines", "type_key": type_key, "count": invalid})
+    return samples, issues
+
+
+def _verify_export_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    type_keys: list[str] | None,
+    count_samples: bool,
+    max_issues: int,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if (end - start).days + 1 > _VERIFY_MAX_DAYS:
+        _raise("INVALID_ARGUMENTS", f"verify range too large (max {_VERIFY_MAX_DAYS} days).")
+    requested_type_keys = set(_normalize_type_keys(type_keys))
+
+    backend = _resolve_storage_backend(storage_backend)
+    days = _iter_dates(start, end)
+    index_entries: dict[str, dict[str, Any]] = {}
+    months_without_index: list[str] = []
+    for month in dict.fromkeys(day.isoformat()[:7] for day in days):
+        month_index = _read_month_index(month, backend)
+        entries = month_index.get("days") if month_index else None
+        if not isinstance(entries, list):
+            months_without_index.append(month)
+            continue
+        for entry in entries:
+            if isinstance(entry, dict) and isinstance(entry.get("date"), str):
+                index_entries[entry["date"]] = entry
+
+    issues: list[dict[str, Any]] = []
+    issue_counts: dict[str, int] = {}
+
+    def record(found: list[dict[str, Any]]) -> None:
+        for issue in found:
+            issue_counts[issue["check"]] = issue_counts.get(issue["check"], 0) + 1
+            if len(issues) < max_issues:
+                issues.append(issue)
+
+    files: list[tuple[str, str, dict[str, Any]]] = []
+    dates_present: list[str] = []
+    samples_counted = 0
+    with ThreadPoolExecutor(max_workers=_VERIFY_MAX_WORKERS) as pool:
+        for day, (manifest, day_issues) in zip(
+            days, pool.map(lambda day: _verify_day_documents(backend, day, index_entries.get(day.isoformat())), days)
+        ):
+            if manifest is None and not day_issues:
+                continue
+            dates_present.append(day.isoformat())
+            record(day_issues)
+            for type_key, type_info in sorted(_manifest_types(manifest or {}).items()):
+                if requested_type_keys and type_key not in requested_type_keys:
+                    continue
+                if _type_has_readable_data(type_info):
+                    files.append((day.isoformat(), type_key, type_info))
+                elif int(type_info.get("record_count") or 0) > 0:
+                    record([{"date": day.isoformat(), "check": "relpath_missing", "type_key": type_key, "relpath": None}])
+
+        # Each worker streams one file at a time, so memory stays bounded by the in-flight chunks.
+        for samples, file_issues in pool.map(
+            lambda item: _verify_type_file(
+                backend, date=item[0], type_key=item[1], type_info=item[2], count_samples=count_samples
+            ),
+            files,
+        ):
+            samples_counted += samples
+            record(file_issues)
+
+    issues.sort(key=lambda issue: (issue["date"], issue["check"], issue.get("type_key") or ""))
+    present = set(dates_present)
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "ok": not issue_counts,
+        "days_checked": len(days),
+        "missing_runs": _date_runs([day.isoformat() for day in days if day.isoformat() not in present]),
+        "months_without_index": months_without_index,
+        "files_checked": len(files),
+        "samples_counted": samples_counted if count_samples else None,
+        "issue_counts": dict(sorted(issue_counts.items())),
+        "issues": issues,
+        "issues_truncated": sum(issue_counts.values()) > len(issues),
     }
 
 
+def _project_metric_fields(snapshot: dict[str, Any], metric_keys: list[str]) -> dict[str, Any]:
+    projected = dict(snapshot)
+    for field in ("metrics", "metric_status", "metric_units"):
+        values = snapshot.get(field)
+        if isinstance(values, dict):
+            projected[field] = {key: values[key] for key in metric_keys if key in values}
+    return projected
+
+
+def _metric_matrix_payload(snapshots: list[dict[str, Any]], metric_keys: list[str]) -> dict[str, Any]:
+    """One dates array plus one value column per metric; units are shared (latest day that reports one)."""
+    keys = list(metric_keys)
+    if not keys:
+        for snapshot in snapshots:
+            metrics = snapshot.get("metrics")
+            if isinstance(metrics, dict):
+                keys.extend(key for key in metrics if isinstance(key, str))
+        keys = list(dict.fromkeys(keys))
+    values: dict[str, list[Any]] = {key: [] for key in keys}
+    units: dict[str, str | None] = dict.fromkeys(keys)
+    for snapshot in snapshots:
+        metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
+        metric_units = snapshot.get("metric_units") if isinstance(snapshot.get("metric_units"), dict) else {}
+        for key in keys:
+            values[key].append(metrics.get(key))
+            if isinstance(metric_units.get(key), str):
+                units[key] = metric_units[key]
+    return {"dates": [snapshot.get("date") for snapshot in snapshots], "units": units, "values": values}
+
+
+def _read_range_metrics_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    storage_backend: _StorageBackendName,
+    metric_keys: list[str] | None = None,
+    format: Literal["records", "matrix"] = "records",
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+
+    span = (end - start).days + 1
+    if span > 366:
+        _raise("INVALID_ARGUMENTS", "range too large (max 366 days).")
+
+    backend = _resolve_storage_backend(storage_backend)
+
+    snapshots_by_date: dict[str, dict[str, Any]] = {}
+    for month in _iter_months(start, end):
+        month_index = _read_month_index(month, backend)
+        if not month_index:
+            continue
+        days = month_index.get("days")
+        if not isinstance(days, list):
+            continue
+        for item in days:
+            if not isinstance(item, dict):
+                continue
+            date_value = item.get("date")
+            if isinstance(date_value, str):
+                snapshots_by_date[date_value] = item
+
+    snapshots: list[dict[str, Any]] = []
+    missing_dates: list[str] = []
+
+    cursor = start
+    while cursor <= end:
+        ymd = cursor.isoformat()
+        snapshot = snapshots_by_date.get(ymd)
+        if snapshot is None:
+            missing_dates.append(ymd)
+        else:
+            snapshots.append(snapshot)
+        cursor += dt.timedelta(days=1)
+
+    requested_metric_keys = _normalize_type_keys(metric_keys)
+    result: dict[str, Any] = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "format": format,
+    }
+    if format == "matrix":
+        result["matrix"] = _metric_matrix_payload(snapshots, requested_metric_keys)
+    else:
+        result["data"] = [
+            _public_daily_snapshot(
+                _project_metric_fields(snapshot, requested_metric_keys) if requested_metric_keys else snapshot,
+                backend.backend,
+            )
+            for snapshot in snapshots
+        ]
+    result["missing_dates"] = missing_dates
+    return result
+
+
+# A month index holds every exported day of the month, so one index GET beats this many snapshot GETs.
+_BATCH_MONTH_INDEX_MIN_DAYS = 3
+
+
+def _read_daily_metrics_batch_impl(
+    *,
+    dates: list[str],
+    storage_backend: _StorageBackendName,
+    metric_keys: list[str] | None = None,
+) -> dict[str, Any]:
+    days = _parse_batch_dates(dates)
+    backend = _resolve_storage_backend(storage_backend)
+    requested_metric_keys = _normalize_type_keys(metric_keys)
+
+    days_by_month: dict[str, list[dt.date]] = {}
+    for day in days:
+        days_by_month.setdefault(day.isoformat()[:7], []).append(day)
+    indexed_months = [month for month, month_days in days_by_month.items() if len(month_days) >= _BATCH_MONTH_INDEX_MIN_DAYS]
+
+    indexed: dict[str, dict[str, Any]] = {}
+    month_index_reads = 0
+    for month in indexed_months:
+        month_index = _read_month_index(month, backend)
+        month_index_reads += 1
+        items = month_index.get("days") if month_index else None
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and isinstance(item.get("date"), str):
+                indexed[item["date"]] = item
+
+    # Days the month index does not list (or months read day by day) fall back to the per-day snapshot.
+    snapshot_reads = sum(1 for day in days if day.isoformat() not in indexed)
+
+    def read(day: dt.date) -> dict[str, Any]:
+        snapshot = indexed.get(day.isoformat())
+        if snapshot is None:
+            snapshot = _read_daily_snapshot(day, backend)
+        if requested_metric_keys:
+            snapshot = _project_metric_fields(snapshot, requested_metric_keys)
+        return _public_daily_snapshot(snapshot, backend.backend)
+
+    results, errors = _run_batch(days, read)
+    return {
+        "storage_backend": backend.backend,
+        "data": results,
+        "errors": errors,
+        "read_strategy": {
+            "month_index_reads": month_index_reads,
+            "snapshot_reads": snapshot_reads,
+        },
+    }
+
+
+def _rounded(value: float | None) -> float | None:
+    if value is None:
+        return None
+    rounded = round(value, 2)
+    if rounded == -0.0:
+        return 0.0
+    return rounded
+
+
+def _metric_unit_from_snapshots(snapshots: list[dict[str, Any]], metric_key: str) -> str | None:
+    for snapshot in snapshots:
+        metric_units = snapshot.get("metric_units")
+        if not isinstance(metric_units, dict):
+            continue
+        unit = metric_units.get(metric_key)
+        if isinstance(unit, str) and unit:
+            return unit
+    return None
+
+
+# (lower, upper, lower_inclusive); upper bounds are inclusive and unlisted metrics are always plausible.
+_METRIC_PLAUSIBLE_RANGES: dict[str, tuple[float, float, bool]] = {
+    "steps": (0, 100_000, True),
+    "resting_hr_avg": (20, 220, True),
+    "hrv_sdnn_avg": (0, 300, False),
+    "vo2_max": (5, 100, True),
+    "oxygen_saturation_pct": (70, 100, True),
+    "respiratory_rate_avg": (5, 40, True),
+    "sleep_asleep_minutes": (60, 1080, True),
+    "sleep_in_bed_minutes": (60, 1440, True),
+    "body_mass_kg": (20, 500, True),
+    "body_fat_percentage": (1, 80, True),
+    "blood_pressure_systolic_mmhg": (20, 300, True),
+    "blood_pressure_diastolic_mmhg": (20, 300, True),
+    "blood_glucose_mg_dl": (20, 500, True),
+    "wrist_temperature_celsius": (25, 45, True),
+    "body_temperature_celsius": (25, 45, True),
+    "basal_body_temperature_celsius": (25, 45, True),
+}
+# Both sleep metrics are rejected for a day whose asleep minutes exceed in-bed minutes by more than this.
+_SLEEP_IN_BED_SLACK_MINUTES = 60
+_SLEEP_METRIC_KEYS = ("sleep_asleep_minutes", "sleep_in_bed_minutes")
+
+
+def _metric_value_is_plausible(metric_key: str, value: float, *, asleep: float, in_bed: float) -> bool:
+    # NaN compares false, so a missing sleep counterpart never rejects a value.
+    bounds = _METRIC_PLAUSIBLE_RANGES.get(metric_key)
+    if bounds is not None:
+        lower, upper, lower_inclusive = bounds
+        if not ((value >= lower if lower_inclusive else value > lower) and value <= upper):
+            return False
+    if metric_key in _SLEEP_METRIC_KEYS and asleep > in_bed + _SLEEP_IN_BED_SLACK_MINUTES:
+        return False
+    return True
+
+
+class _MetricMatrix:
+    """Daily snapshots loaded once as a dates × metrics float64 matrix.
+
+    Absent or non-numeric values are NaN. Masks are computed with NumPy when it is installed and
+    over per-metric ``array("d")`` columns otherwise; either way callers get row indexes and plain
+    floats, so results do not depend on which path ran. Rows keep snapshot order.
+    """
+
+    def __init__(self, snapshots: list[dict[str, Any]], metric_keys: Iterable[str]) -> None:
+        keys = list(dict.fromkeys(metric_keys))
+        if any(key in _SLEEP_METRIC_KEYS for key in keys):
+            keys = list(dict.fromkeys([*keys, *_SLEEP_METRIC_KEYS]))
+        self.dates: list[Any] = [snapshot.get("date") for snapshot in snapshots]
+        self._column_index = {key: index for index, key in enumerate(keys)}
+        self._masks: dict[str, tuple[list[int], list[int]]] = {}
+
+        table: list[list[float]] = []
+        for snapshot in snapshots:
+            metrics = snapshot.get("metrics")
+            if not isinstance(metrics, dict):
+                metrics = {}
+            row: list[float] = []
+            for key in keys:
+                value = _coerce_numeric(metrics.get(key))
+                row.append(math.nan if value is None else value)
+            table.append(row)
+
+        self._values: Any
+        if _np is not None:
+            self._values = _np.array(table, dtype=_np.float64).reshape(len(table), len(keys))
+            self._dated = _np.array([isinstance(date, str) for date in self.dates], dtype=bool)
+        else:
+            self._values = [array("d", (row[index] for row in table)) for index in range(len(keys))]
+        self._columns: dict[str, list[float]] = {}
+
+    def values(self, metric_key: str) -> list[float]:
+        column = self._columns.get(metric_key)
+        if column is None:
+            index = self._column_index[metric_key]
+            column = self._values[:, index].tolist() if _np is not None else self._values[index].tolist()
+            self._columns[metric_key] = column
+        return column
+
+    def _usable(self, metric_key: str) -> tuple[list[int], list[int]]:
+        # (observed rows: plausible and dated, excluded rows: present but implausible)
+        cached = self._masks.get(metric_key)
+        if cached is not None:
+            return cached
+        bounds = _METRIC_PLAUSIBLE_RANGES.get(metric_key)
+        if _np is not None:
+            column = self._values[:, self._column_index[metric_key]]
+            present = ~_np.isnan(column)
+            plausible = present.copy()
+            if bounds is not None:
+                lower, upper, lower_inclusive = bounds
+                plausible &= (column >= lower if lower_inclusive else column > lower) & (column <= upper)
+            if metric_key in _SLEEP_METRIC_KEYS:
+                asleep = self._values[:, self._column_index["sleep_asleep_minutes"]]
+                in_bed = self._values[:, self._column_index["sleep_in_bed_minutes"]]
+                plausible &= ~(asleep > in_bed + _SLEEP_IN_BED_SLACK_MINUTES)
+            cached = (
+                _np.flatnonzero(plausible & self._dated).tolist(),
+                _np.flatnonzero(present & ~plausible).tolist(),
+            )
+        else:
+            column = self._values[self._column_index[metric_key]]
+            if metric_key in _SLEEP_METRIC_KEYS:
+                asleep = self._values[self._column_index["sleep_asleep_minutes"]]
+                in_bed = self._values[self._column_index["sleep_in_bed_minutes"]]
+            else:
+                asleep = in_bed = column
+            observed: list[int] = []
+            excluded: list[int] = []
+            for row, value in enumerate(column):
+                if math.isnan(value):
+                    continue
+                if _metric_value_is_plausible(metric_key, value, asleep=asleep[row], in_bed=in_bed[row]):
+                    if isinstance(self.dates[row], str):
+                        observed.append(row)
+                else:
+                    excluded.append(row)
+            cached = (observed, excluded)
+        self._masks[metric_key] = cached
+        return cached
+
+    def observed_rows(self, metric_key: str) -> list[int]:
+        return self._usable(metric_key)[0]
+
+    def table(self, metric_keys: list[str]) -> Any:
+        """The given metrics as a dates × metrics ndarray with NumPy, else as a list of float columns."""
+        indexes = [self._column_index[key] for key in metric_keys]
+        if _np is not None:
+            return self._values[:, indexes]
+        return [self._values[index].tolist() for index in indexes]
+
+    def excluded_rows(self, metric_key: str) -> list[int]:
+        return self._usable(metric_key)[1]
+
+
+class _MetricPartial:
+    """Mergeable aggregate of one metric over consecutive days.
+
+    ``total`` is an exact Fraction, so ``float(total / count)`` equals ``statistics.mean`` over the
+    same values; min/max keep the earliest date on ties, like a left-to-right scan. Partials must be
+    merged in date order.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = Fraction(0)
+        self.values: list[float] = []
+        self.min: tuple[float, str] | None = None
+        self.max: tuple[float, str] | None = None
+        self.first: tuple[float, str] | None = None
+        self.last: tuple[float, str] | None = None
+        self.excluded: list[tuple[str, float]] = []
+        self.status_counts: dict[str, int] = {}
+        self.unit: str | None = None
+
+    def merge(self, other: _MetricPartial) -> None:
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        self.unit = self.unit or other.unit
+        self.excluded.extend(other.excluded)
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.values.extend(other.values)
+        if self.min is None or (other.min is not None and other.min[0] < self.min[0]):
+            self.min = other.min
+        if self.max is None or (other.max is not None and other.max[0] > self.max[0]):
+            self.max = other.max
+        if self.first is None:
+            self.first = other.first
+        self.last = other.last
+
+    def mean(self) -> float | None:
+        return float(self.total / self.count) if self.count else None
+
+
+class _MonthMetricColumn:
+    """One metric's day partials for a month, with exact prefix sums so any day range is a slice."""
+
+    def __init__(self, days: dict[str, dict[str, Any]], metric_key: str) -> None:
+        self.dates: list[str] = []
+        self.values: list[float] = []
+        self.prefix: list[Fraction] = [Fraction(0)]
+        self.excluded: list[tuple[str, float]] = []
+        self.status_dates: list[str] = []
+        self.statuses: list[str] = []
+        self.unit_dates: list[str] = []
+        self.units: list[str] = []
+        for date, day in days.items():
+            status = day["status"].get(metric_key)
+            if status is not None:
+                self.status_dates.append(date)
+                self.statuses.append(status)
+            unit = day["units"].get(metric_key)
+            if unit is not None:
+                self.unit_dates.append(date)
+                self.units.append(unit)
+            excluded = day["excluded"].get(metric_key)
+            if excluded is not None:
+                self.excluded.append((date, excluded))
+            value = day["values"].get(metric_key)
+            if value is not None:
+                self.dates.append(date)
+                self.values.append(value)
+                self.prefix.append(self.prefix[-1] + Fraction(value))
+
+    def partial(self, start: str, end: str) -> _MetricPartial:
+        partial = _MetricPartial()
+        lo = bisect_left(self.status_dates, start)
+        hi = bisect_right(self.status_dates, end, lo)
+        for status in self.statuses[lo:hi]:
+            partial.status_counts[status] = partial.status_counts.get(status, 0) + 1
+        lo = bisect_left(self.unit_dates, start)
+        if lo < len(self.unit_dates) and self.unit_dates[lo] <= end:
+            partial.unit = self.units[lo]
+        partial.excluded = [item for item in self.excluded if start <= item[0] <= end]
+
+        lo = bisect_left(self.dates, start)
+        hi = bisect_right(self.dates, end, lo)
+        if lo >= hi:
+            return partial
+        values = self.values[lo:hi]
+        partial.count = hi - lo
+        partial.total = self.prefix[hi] - self.prefix[lo]
+        partial.values = values
+        min_index = values.index(min(values))
+        max_index = values.index(max(values))
+        partial.min = (values[min_index], self.dates[lo + min_index])
+        partial.max = (values[max_index], self.dates[lo + max_index])
+        partial.first = (values[0], self.dates[lo])
+        partial.last = (values[-1], self.dates[hi - 1])
+        return partial
+
+
+_ANALYSIS_MEMO_VERSION = 1
+# In-process memos: (backend namespace, month) -> (month index ETag, day partials), and
+# (month, ETag, metric) -> column.
+_ANALYSIS_MONTH_DAYS: dict[tuple[str, str], tuple[str, dict[str, dict[str, Any]]]] = {}
+_MONTH_METRIC_COLUMNS: dict[tuple[str, str, str], _MonthMetricColumn] = {}
+_MONTH_METRIC_COLUMNS_MAX = 4096
+
+
+_RESULT_MEMO_VERSION = 1
+# Memoized tool results are kept to this many bytes of JSON, both in memory and in {cache}/results/.
+_RESULT_MEMO_MAX_BYTES = 64 << 20
+
+
+class _ResultMemo:
+    """In-process LRU of whole tool results: key -> (freshness tokens, result), bounded in bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[list[Any], dict[str, Any], int]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> tuple[list[Any], dict[str, Any]] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, key: str, tokens: list[Any], result: dict[str, Any], *, size: int) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (tokens, result, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_RESULT_MEMO = _ResultMemo(_RESULT_MEMO_MAX_BYTES)
+
+
+def _result_memo_key(tool: str, backend: _StorageBackend, arguments: dict[str, Any]) -> str:
+    return json.dumps({"tool": tool, "namespace": backend.namespace, **arguments}, sort_keys=True, separators=(",", ":"))
+
+
+def _result_memo_path(cache_root: Path, key: str) -> Path:
+    return cache_root / "results" / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+
+def _prune_result_memos(directory: Path, *, max_bytes: int) -> None:
+    """Delete the least recently used result files until ``directory`` fits in ``max_bytes``."""
+    entries: list[tuple[float, int, Path]] = []
+    for path in directory.glob("*.json"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def _memoized_result(key: str, tokens: list[Any], compute: Callable[[], dict[str, Any]]) -> tuple[dict[str, Any], bool]:
+    """Return (result, served from the memo) for normalized arguments ``key``.
+
+    ``tokens`` are the ETags of every object the result depends on; a stored result is reused only
+    while they all match. Results live in memory and, when the cache is enabled, under
+    ``{cache}/results/``; both evict least recently used results past ``_RESULT_MEMO_MAX_BYTES``.
+    Memoized results are shared, so callers must not mutate them.
+    """
+    cached = _RESULT_MEMO.get(key)
+    if cached is not None and cached[0] == tokens:
+        return cached[1], True
+
+    cache_root = _cache_root()
+    path = _result_memo_path(cache_root, key) if cache_root is not None else None
+    if cached is None and path is not None:
+        try:
+            raw = path.read_bytes()
+            loaded = json.loads(raw)
+        except (OSError, ValueError):
+            raw, loaded = b"", None
+        if (
+            isinstance(loaded, dict)
+            and loaded.get("version") == _RESULT_MEMO_VERSION
+            and loaded.get("key") == key
+            and loaded.get("tokens") == tokens
+            and isinstance(loaded.get("result"), dict)
+        ):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            _RESULT_MEMO.put(key, tokens, loaded["result"], size=len(raw))
+            return loaded["result"], True
+
+    result = compute()
+    payload = json.dumps({"version": _RESULT_MEMO_VERSION, "key": key, "tokens": tokens, "result": result}).encode("utf-8")
+    _RESULT_MEMO.put(key, tokens, result, size=len(payload))
+    if path is not None and len(payload) <= _RESULT_MEMO_MAX_BYTES and _write_cache_file(path, payload):
+        _prune_result_memos(path.parent, max_bytes=_RESULT_MEMO_MAX_BYTES)
+    return result, False
+
+
+def _analysis_memo_path(cache_root: Path, backend: _StorageBackend, month: str) -> Path:
+    namespace = hashlib.sha256(backend.namespace.encode("utf-8")).hexdigest()[:16]
+    return cache_root / "analysis" / namespace / f"{month}.json"
+
+
+def _analysis_day_partials(snapshots: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Per-day analysis inputs: each metric's plausible value (or excluded value), status, and unit."""
+    keys = list(_DEFAULT_ANALYSIS_METRIC_KEYS)
+    for snapshot in snapshots:
+        metrics = snapshot.get("metrics")
+        if isinstance(metrics, dict):
+            keys.extend(key for key in metrics if isinstance(key, str))
+    matrix = _MetricMatrix(snapshots, keys)
+
+    days: list[dict[str, Any]] = []
+    for snapshot in snapshots:
+        collector = snapshot.get("collector") if isinstance(snapshot.get("collector"), dict) else {}
+        metric_status = snapshot.get("metric_status") if isinstance(snapshot.get("metric_status"), dict) else {}
+        metric_units = snapshot.get("metric_units") if isinstance(snapshot.get("metric_units"), dict) else {}
+        days.append(
+            {
+                "commit_id": snapshot.get("commit_id") if isinstance(snapshot.get("commit_id"), str) else None,
+                "collector_id": collector.get("collector_id") if isinstance(collector.get("collector_id"), str) else None,
+                "device_id": collector.get("device_id") if isinstance(collector.get("device_id"), str) else None,
+                "values": {},
+                "excluded": {},
+                "status": {key: value for key, value in metric_status.items() if isinstance(value, str) and value},
+                "units": {key: value for key, value in metric_units.items() if isinstance(value, str) and value},
+            }
+        )
+    for key in dict.fromkeys(keys):
+        column = matrix.values(key)
+        for row in matrix.observed_rows(key):
+            days[row]["values"][key] = column[row]
+        for row in matrix.excluded_rows(key):
+            days[row]["excluded"][key] = column[row]
+    return {snapshot["date"]: day for snapshot, day in zip(snapshots, days)}
+
+
+def _month_index_etags(backend: _StorageBackend, start: dt.date, end: dt.date) -> dict[str, str | None]:
+    """ETag of each month index covering the range (None when a month has no index), one HEAD per month."""
+    etags: dict[str, str | None] = {}
+    for month in _iter_months(start, end):
+        try:
+            etags[month] = backend.etag(_daily_month_path(month))
+        except _DataNotFound:
+            etags[month] = None
+    return etags
+
+
+def _analysis_month_days(
+    month: str,
+    backend: _StorageBackend,
+    cache_root: Path | None,
+    *,
+    source: str | None = None,
+) -> tuple[str, dict[str, dict[str, Any]], int] | None:
+    """Return (month index ETag, day partials in date order, days recomputed) or None if the month has no index.
+
+    Day partials are memoized on disk per month. When the month index changes, only days whose
+    ``commit_id`` changed are recomputed. Pass ``source`` when the month index ETag is already known.
+    """
+    relpath = _daily_month_path(month)
+    if source is None:
+        try:
+            source = backend.etag(relpath)
+        except _DataNotFound:
+            return None
+
+    memo_key = (backend.namespace, month)
+    cached = _ANALYSIS_MONTH_DAYS.get(memo_key)
+    if cached is not None and cached[0] == source:
+        return source, cached[1], 0
+
+    memo_path = _analysis_memo_path(cache_root, backend, month) if cache_root is not None else None
+    memo: dict[str, Any] | None = None
+    if cached is not None:
+        memo = {"source": cached[0], "days": cached[1]}
+    elif memo_path is not None:
+        try:
+            loaded = json.loads(memo_path.read_bytes())
+        except (OSError, ValueError):
+            loaded = None
+        if isinstance(loaded, dict) and loaded.get("version") == _ANALYSIS_MEMO_VERSION:
+            memo = loaded
+    if memo is not None and memo.get("source") == source:
+        _ANALYSIS_MONTH_DAYS[memo_key] = (source, memo["days"])
+        return source, memo["days"], 0
+
+    month_index = _read_month_index(month, backend)
+    if month_index is None:
+        return None
+    # A day listed under another month's index is kept, as health.read_range_metrics does.
+    snapshots_by_date: dict[str, dict[str, Any]] = {}
+    items = month_index.get("days")
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict) and isinstance(item.get("date"), str):
+            snapshots_by_date[item["date"]] = item
+
+    previous = memo["days"] if memo is not None else {}
+    changed = [
+        snapshot
+        for date, snapshot in sorted(snapshots_by_date.items())
+        if previous.get(date, {}).get("commit_id") is None or previous[date]["commit_id"] != snapshot.get("commit_id")
+    ]
+    recomputed = _analysis_day_partials(changed)
+    days = {date: recomputed[date] if date in recomputed else previous[date] for date in sorted(snapshots_by_date)}
+    _ANALYSIS_MONTH_DAYS[memo_key] = (source, days)
+
+    if memo_path is not None:
+        _write_cache_file(
+            memo_path,
+            json.dumps({"version": _ANALYSIS_MEMO_VERSION, "month": month, "source": source, "days": days}).encode("utf-8"),
+        )
+    return source, days, len(changed)
+
+
+class _AnalysisWindow:
+    """Day partials for a date range; per-metric aggregates are merged from memoized month columns.
+
+    A day listed under another month's index overrides earlier listings of that date, as in
+    ``health.read_range_metrics``. Month columns would then overlap, so such a window builds its
+    columns over the merged days instead.
+    """
+
+    def __init__(self, months: dict[str, tuple[str, dict[str, dict[str, Any]]]], start: dt.date, end: dt.date) -> None:
+        self._months = months
+        self.start = start
+        self.end = end
+        merged: dict[str, dict[str, Any]] = {}
+        misfiled = False
+        for month in _iter_months(start, end):
+            for date, day in months.get(month, ("", {}))[1].items():
+                misfiled = misfiled or date[:7] != month
+                merged[date] = day
+        self._merged = dict(sorted(merged.items())) if misfiled else None
+        self._merged_columns: dict[str, _MonthMetricColumn] = {}
+        start_str, end_str = start.isoformat(), end.isoformat()
+        self.days: list[tuple[str, dict[str, Any]]] = [
+            (date, day) for date, day in sorted(merged.items()) if start_str <= date <= end_str
+        ]
+
+    def _column(self, month: str, metric_key: str) -> _MonthMetricColumn:
+        source, days = self._months[month]
+        key = (month, source, metric_key)
+        column = _MONTH_METRIC_COLUMNS.get(key)
+        if column is None:
+            if len(_MONTH_METRIC_COLUMNS) >= _MONTH_METRIC_COLUMNS_MAX:
+                _MONTH_METRIC_COLUMNS.clear()
+            column = _MONTH_METRIC_COLUMNS[key] = _MonthMetricColumn(days, metric_key)
+        return column
+
+    def metric(self, metric_key: str, start: dt.date | None = None, end: dt.date | None = None) -> _MetricPartial:
+        start = start or self.start
+        end = end or self.end
+        start_str, end_str = start.isoformat(), end.isoformat()
+        if self._merged is not None:
+            column = self._merged_columns.get(metric_key)
+            if column is None:
+                column = self._merged_columns[metric_key] = _MonthMetricColumn(self._merged, metric_key)
+            return column.partial(start_str, end_str)
+        partial = _MetricPartial()
+        for month in _iter_months(start, end):
+            if month in self._months:
+                partial.merge(self._column(month, metric_key).partial(start_str, end_str))
+        return partial
+
+
+def _segment_ranges(start: dt.date, end: dt.date, segment_count: int) -> list[tuple[dt.date, dt.date]]:
+    dates = _iter_dates(start, end)
+    if not dates:
+        return []
+    bounded_count = max(1, min(segment_count, len(dates)))
+    base_size = len(dates) // bounded_count
+    remainder = len(dates) % bounded_count
+
+    segments: list[tuple[dt.date, dt.date]] = []
+    index = 0
+    for segment_index in range(bounded_count):
+        size = base_size + (1 if segment_index < remainder else 0)
+        segment_dates = dates[index : index + size]
+        segments.append((segment_dates[0], segment_dates[-1]))
+        index += size
+    return segments
+
+
+def _quartile_summary(values: list[float]) -> tuple[float, float, float] | None:
+    if len(values) < 4:
+        return None
+    try:
+        q1, q2, q3 = quantiles(values, n=4, method="inclusive")
+    except StatisticsError:
+        return None
+    return q1, q2, q3
+
+
+def _metric_trend_summary(
+    window: _AnalysisWindow,
+    overall: _MetricPartial,
+    metric_key: str,
+    segments: list[tuple[dt.date, dt.date]],
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    segment_payload: list[dict[str, Any]] = []
+    segment_stats: list[tuple[int, float | None]] = []
+    for segment_start, segment_end in segments:
+        segment = window.metric(metric_key, segment_start, segment_end)
+        segment_mean_value = segment.mean()
+        segment_stats.append((segment.count, segment_mean_value))
+        segment_payload.append(
+            {
+                "start_date": segment_start.isoformat(),
+                "end_date": segment_end.isoformat(),
+                "available_days": segment.count,
+                "mean": _rounded(segment_mean_value),
+            }
+        )
+
+    valid_segments = [(count, value) for count, value in segment_stats if value is not None]
+    if len(valid_segments) < 2:
+        return segment_payload, {
+            "direction": "insufficient_data",
+            "delta": None,
+            "delta_pct": None,
+        }
+
+    first_count, first_mean = valid_segments[0]
+    last_count, last_mean = valid_segments[-1]
+    if first_count < 2 or last_count < 2:
+        return segment_payload, {
+            "direction": "insufficient_data",
+            "delta": None,
+            "delta_pct": None,
+        }
+
+    assert overall.min is not None and overall.max is not None
+    return segment_payload, _trend_payload(
+        first_mean,
+        last_mean,
+        median_value=median(overall.values),
+        spread=overall.max[0] - overall.min[0],
+    )
+
+
+def _trend_payload(first_mean: float, last_mean: float, *, median_value: float, spread: float) -> dict[str, Any]:
+    threshold = max(abs(median_value) * 0.01, spread * 0.1, 0.1)
+    delta = last_mean - first_mean
+    if abs(delta) < threshold:
+        direction = "stable"
+    elif delta > 0:
+        direction = "up"
+    else:
+        direction = "down"
+
+    delta_pct = None
+    if abs(first_mean) > 1e-9:
+        delta_pct = (delta / first_mean) * 100
+
+    return {
+        "direction": direction,
+        "delta": _rounded(delta),
+        "delta_pct": _rounded(delta_pct),
+    }
+
+
+def _metric_summary(
+    *,
+    metric_key: str,
+    window: _AnalysisWindow,
+    segments: list[tuple[dt.date, dt.date]],
+    requested_days: int,
+) -> dict[str, Any] | None:
+    overall = window.metric(metric_key)
+    if overall.count == 0:
+        return None
+    assert overall.min and overall.max and overall.first and overall.last
+
+    segment_payload, trend_payload = _metric_trend_summary(window, overall, metric_key, segments)
+    return {
+        "metric_key": metric_key,
+        "unit": overall.unit,
+        "available_days": overall.count,
+        "requested_days": requested_days,
+        "coverage_ratio": _rounded(overall.count / requested_days) if requested_days > 0 else None,
+        "status_counts": dict(sorted(overall.status_counts.items())),
+        "excluded_days": len(overall.excluded),
+        "excluded_dates": [
+            {
+                "date": date,
+                "value": _rounded(value),
+                "reason": "implausible_value",
+            }
+            for date, value in overall.excluded[:10]
+        ],
+        "statistics": {
+            "mean": _rounded(overall.mean()),
+            "median": _rounded(median(overall.values)),
+            "min": _rounded(overall.min[0]),
+            "min_date": overall.min[1],
+            "max": _rounded(overall.max[0]),
+            "max_date": overall.max[1],
+            "earliest": _rounded(overall.first[0]),
+            "earliest_date": overall.first[1],
+            "latest": _rounded(overall.last[0]),
+            "latest_date": overall.last[1],
+        },
+        "trend": trend_payload,
+        "segments": segment_payload,
+    }
+
+
+def _notable_reason_text(metric_key: str, direction: str) -> str:
+    if metric_key == "steps":
+        return "Lower-than-usual step volume." if direction == "low" else "Higher-than-usual step volume."
+    if metric_key == "resting_hr_avg":
+        return "Elevated resting heart rate." if direction == "high" else "Lower-than-usual resting heart rate."
+    if metric_key == "hrv_sdnn_avg":
+        return "Suppressed HRV." if direction == "low" else "Higher-than-usual HRV."
+    if metric_key == "oxygen_saturation_pct":
+        return "Lower-than-usual oxygen saturation." if direction == "low" else "Higher-than-usual oxygen saturation."
+    if metric_key == "respiratory_rate_avg":
+        return "Elevated respiratory rate." if direction == "high" else "Lower-than-usual respiratory rate."
+    if metric_key == "sleep_asleep_minutes":
+        return "Short sleep duration." if direction == "low" else "Long sleep duration."
+    return "Notable deviation."
+
+
+def _notable_days(
+    window: _AnalysisWindow,
+    metric_summaries: list[dict[str, Any]],
+) -> list[dict[str, Any]]:
+    baselines: dict[str, dict[str, float]] = {}
+    for metric_summary in metric_summaries:
+        metric_key = metric_summary["metric_key"]
+        if metric_key not in _NOTABLE_ANALYSIS_METRIC_KEYS:
+            continue
+        quartile_summary = _quartile_summary(window.metric(metric_key).values)
+        if quartile_summary is None:
+            continue
+        q1, q2, q3 = quartile_summary
+        iqr = q3 - q1
+        fallback_scale = max(abs(q2) * 0.05, 1.0)
+        baselines[metric_key] = {
+            "q1": q1,
+            "median": q2,
+            "q3": q3,
+            "scale": iqr if iqr > 0 else fallback_scale,
+        }
+
+    notable_days: list[dict[str, Any]] = []
+    for date, day in window.days:
+        reasons: list[dict[str, Any]] = []
+        score = 0.0
+        for metric_key, baseline in baselines.items():
+            raw_value = day["values"].get(metric_key)
+            if raw_value is None:
+                continue
+            scale = baseline["scale"]
+            lower = baseline["q1"] - (1.5 * scale)
+            upper = baseline["q3"] + (1.5 * scale)
+            if raw_value < lower:
+                direction = "low"
+                severity = (lower - raw_value) / scale
+            elif raw_value > upper:
+                direction = "high"
+                severity = (raw_value - upper) / scale
+            else:
+                continue
+            reasons.append(
+                {
+                    "metric_key": metric_key,
+                    "direction": direction,
+                    "value": _rounded(raw_value),
+                    "baseline_median": _rounded(baseline["median"]),
+                    "summary": _notable_reason_text(metric_key, direction),
+                    "severity": _rounded(severity),
+                }
+            )
+            score += severity
+        if reasons:
+            notable_days.append(
+                {
+                    "date": date,
+                    "score": _rounded(score),
+                    "reasons": sorted(reasons, key=lambda item: item["severity"] or 0, reverse=True),
+                }
+            )
+
+    notable_days.sort(key=lambda item: (item["score"] or 0), reverse=True)
+    return notable_days[:7]
+
+
+def _analysis_insights(
+    metric_summaries: list[dict[str, Any]],
+    *,
+    missing_dates: list[str],
+    requested_days: int,
+) -> list[str]:
+    insights: list[str] = []
+    metric_summary_by_key = {item["metric_key"]: item for item in metric_summaries}
+
+    steps_summary = metric_summary_by_key.get("steps")
+    if steps_summary:
+        direction = steps_summary["trend"]["direction"]
+        if direction == "up":
+            insights.append("Step volume trended up in the later segment.")
+        elif direction == "down":
+            insights.append("Step volume trended down in the later segment.")
+
+    resting_hr_summary = metric_summary_by_key.get("resting_hr_avg")
+    hrv_summary = metric_summary_by_key.get("hrv_sdnn_avg")
+    if resting_hr_summary and hrv_summary:
+        resting_direction = resting_hr_summary["trend"]["direction"]
+        hrv_direction = hrv_summary["trend"]["direction"]
+        if resting_direction == "down" and hrv_direction == "up":
+            insights.append("Recovery markers improved in the later segment: resting HR fell while HRV rose.")
+        elif resting_direction == "up" and hrv_direction == "down":
+            insights.append("Recovery markers weakened in the later segment: resting HR rose while HRV fell.")
+        elif resting_direction == "stable" and hrv_direction == "stable":
+            insights.append("Recovery markers were broadly stable across the range.")
+
+    oxygen_summary = metric_summary_by_key.get("oxygen_saturation_pct")
+    if oxygen_summary:
+        oxygen_stats = oxygen_summary["statistics"]
+        oxygen_min = oxygen_stats.get("min")
+        oxygen_max = oxygen_stats.get("max")
+        if isinstance(oxygen_min, (int, float)) and isinstance(oxygen_max, (int, float)) and oxygen_max - oxygen_min <= 2:
+            insights.append("Oxygen saturation stayed relatively stable.")
+
+    vo2_summary = metric_summary_by_key.get("vo2_max")
+    if vo2_summary and vo2_summary["available_days"] < 4:
+        insights.append("VO2 max data is sparse; cardio-fitness trend confidence is low.")
+
+    sleep_summaries = [
+        item
+        for item in metric_summaries
+        if item["metric_key"] in {"sleep_asleep_minutes", "sleep_in_bed_minutes"} and item["excluded_days"] > 0
+    ]
+    if sleep_summaries:
+        insights.append("Sleep metrics contain suspect dates and should be interpreted cautiously.")
+
+    if missing_dates:
+        insights.append(
+            f"{len(missing_dates)} of {requested_days} requested dates are missing from exported daily snapshots."
+        )
+
+    return insights
+
+
+def _analyze_range_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    metric_keys: list[str] | None,
+    segment_count: int,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if not (1 <= segment_count <= 12):
+        _raise("INVALID_ARGUMENTS", "segment_count must be between 1 and 12.")
+
+    requested_days = (end - start).days + 1
+    if requested_days > 366:
+        _raise("INVALID_ARGUMENTS", "range too large (max 366 days).")
+
+    backend = _resolve_storage_backend(storage_backend)
+    requested_metric_keys = _normalize_type_keys(metric_keys) if metric_keys else list(_DEFAULT_ANALYSIS_METRIC_KEYS)
+    etags = _month_index_etags(backend, start, end)
+    memo_key = _result_memo_key(
+        "analyze_range",
+        backend,
+        {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "metric_keys": requested_metric_keys,
+            "segment_count": segment_count,
+        },
+    )
+    result, memoized = _memoized_result(
+        memo_key,
+        list(etags.values()),
+        lambda: _analyze_range_result(
+            backend,
+            start_date=start_date,
+            end_date=end_date,
+            metric_keys=requested_metric_keys,
+            segment_count=segment_count,
+            etags=etags,
+        ),
+    )
+    if not memoized:
+        return result
+    return {**result, "read_strategy": {**result["read_strategy"], "days_recomputed": 0, "result_memoized": True}}
+
+
+def _analyze_range_result(
+    backend: _StorageBackend,
+    *,
+    start_date: str,
+    end_date: str,
+    metric_keys: list[str],
+    segment_count: int,
+    etags: dict[str, str | None],
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    requested_days = (end - start).days + 1
+    cache_root = _cache_root()
+    months: dict[str, tuple[str, dict[str, dict[str, Any]]]] = {}
+    days_recomputed = 0
+    for month, source in etags.items():
+        loaded = _analysis_month_days(month, backend, cache_root, source=source) if source is not None else None
+        if loaded is None:
+            continue
+        source, days, recomputed = loaded
+        months[month] = (source, days)
+        days_recomputed += recomputed
+    window = _AnalysisWindow(months, start, end)
+    available_dates = {date for date, _ in window.days}
+    missing_dates = [day.isoformat() for day in _iter_dates(start, end) if day.isoformat() not in available_dates]
+    segments = _segment_ranges(start, end, segment_count)
+
+    metric_summaries: list[dict[str, Any]] = []
+    for metric_key in metric_keys:
+        summary = _metric_summary(
+            metric_key=metric_key,
+            window=window,
+            segments=segments,
+            requested_days=requested_days,
+        )
+        if summary is not None:
+            metric_summaries.append(summary)
+
+    collectors = sorted({day["collector_id"] for _, day in window.days if day["collector_id"] is not None})
+    device_ids = sorted({day["device_id"] for _, day in window.days if day["device_id"] is not None})
+    commit_ids = sorted({day["commit_id"] for _, day in window.days if day["commit_id"] is not None})
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "read_strategy": {
+            "uses_month_indexes_only": True,
+            "raw_samples_read": False,
+            "days_recomputed": days_recomputed,
+            "result_memoized": False,
+        },
+        "days_requested": requested_days,
+        "days_available": len(window.days),
+        "missing_dates": missing_dates,
+        "collector_ids": collectors,
+        "device_ids": device_ids,
+        "latest_commit_id": commit_ids[-1] if commit_ids else None,
+        "segment_count": len(segments),
+        "metrics": metric_summaries,
+        "notable_days": _notable_days(window, metric_summaries),
+        "insights": _analysis_insights(
+            metric_summaries,
+            missing_dates=missing_dates,
+            requested_days=requested_days,
+        ),
+    }
+
+
+_CORRELATION_MAX_LAG_DAYS = 7
+# A pair whose variance is below this fraction of its sum of squares is treated as constant.
+_CORRELATION_ZERO_VARIANCE = 1e-12
+
+
+def _average_ranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    position = 0
+    while position < len(order):
+        tie_end = position
+        while tie_end + 1 < len(order) and values[order[tie_end + 1]] == values[order[position]]:
+            tie_end += 1
+        for index in order[position : tie_end + 1]:
+            ranks[index] = (position + tie_end) / 2 + 1
+        position = tie_end + 1
+    return ranks
+
+
+def _correlation_from_sums(
+    count: float, sum_x: float, sum_y: float, sum_xx: float, sum_yy: float, sum_xy: float, min_overlap: int
+) -> float | None:
+    if count < min_overlap:
+        return None
+    var_x = sum_xx - sum_x * sum_x / count
+    var_y = sum_yy - sum_y * sum_y / count
+    if var_x <= _CORRELATION_ZERO_VARIANCE * sum_xx or var_y <= _CORRELATION_ZERO_VARIANCE * sum_yy:
+        return None
+    r = (sum_xy - sum_x * sum_y / count) / math.sqrt(var_x * var_y)
+    return round(max(-1.0, min(1.0, r)), 4)
+
+
+def _pair_correlation(x: list[float], y: list[float], *, method: str, min_overlap: int) -> tuple[float | None, int]:
+    """Correlate the days where both series are present (pairwise-complete)."""
+    pairs = [(a, b) for a, b in zip(x, y) if not (math.isnan(a) or math.isnan(b))]
+    if not pairs:
+        return None, 0
+    xs = [a for a, _ in pairs]
+    ys = [b for _, b in pairs]
+    if method == "spearman":
+        middle = (len(pairs) + 1) / 2
+        xs = [rank - middle for rank in _average_ranks(xs)]
+        ys = [rank - middle for rank in _average_ranks(ys)]
+    r = _correlation_from_sums(
+        len(pairs),
+        math.fsum(xs),
+        math.fsum(ys),
+        math.fsum(a * a for a in xs),
+        math.fsum(b * b for b in ys),
+        math.fsum(a * b for a, b in zip(xs, ys)),
+        min_overlap,
+    )
+    return r, len(pairs)
+
+
+def _lagged_correlations(
+    table: Any, *, method: str, max_lag: int, min_overlap: int
+) -> list[tuple[list[list[float | None]], list[list[int]]]]:
+    """Return, for each lag k in 0..max_lag, (r, overlap) matrices where [i][j] pairs metric i on day t
+    with metric j on day t + k.
+
+    Columns are centered on their mean first, which leaves correlations unchanged but keeps the
+    one-pass sums well conditioned. Pearson runs as masked matrix products over the whole table when
+    NumPy is installed; Spearman re-ranks each pair's complete days, so it always runs per pair.
+    """
+    if _np is not None and method == "pearson":
+        present = ~_np.isnan(table)
+        counts = present.sum(axis=0)
+        means = _np.where(present, table, 0.0).sum(axis=0) / _np.maximum(counts, 1)
+        centered = _np.where(present, table - means, 0.0)
+        weights = present.astype(_np.float64)
+        rows = table.shape[0]
+        results: list[tuple[list[list[float | None]], list[list[int]]]] = []
+        for lag in range(max_lag + 1):
+            a, b = centered[: rows - lag], centered[lag:]
+            wa, wb = weights[: rows - lag], weights[lag:]
+            count = wa.T @ wb
+            sums = (a.T @ wb, wa.T @ b, (a * a).T @ wb, wa.T @ (b * b), a.T @ b)
+            size = count.shape[0]
+            matrix = [
+                [
+                    _correlation_from_sums(float(count[i, j]), *(float(term[i, j]) for term in sums), min_overlap)
+                    if count[i, j]
+                    else None
+                    for j in range(size)
+                ]
+                for i in range(size)
+            ]
+            results.append((matrix, count.astype(int).tolist()))
+        return results
+
+    columns = table.T.tolist() if _np is not None else table
+    centered_columns: list[list[float]] = []
+    for column in columns:
+        observed = [value for value in column if not math.isnan(value)]
+        mean = math.fsum(observed) / len(observed) if observed else 0.0
+        centered_columns.append([value - mean for value in column])
+    rows = len(centered_columns[0]) if centered_columns else 0
+    results = []
+    for lag in range(max_lag + 1):
+        matrix: list[list[float | None]] = []
+        overlap: list[list[int]] = []
+        for x in centered_columns:
+            matrix.append([])
+            overlap.append([])
+            for y in centered_columns:
+                r, count = _pair_correlation(x[: rows - lag], y[lag:], method=method, min_overlap=min_overlap)
+                matrix[-1].append(r)
+                overlap[-1].append(count)
+        results.append((matrix, overlap))
+    return results
+
+
+def _correlate_metrics_impl(
+    *,
+    start_date: str,
+    end_date: str,
+    metric_keys: list[str] | None,
+    method: Literal["pearson", "spearman"],
+    max_lag_days: int,
+    min_overlap_days: int,
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = _parse_ymd(start_date)
+    end = _parse_ymd(end_date)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_date must be <= end_date.")
+    if not (0 <= max_lag_days <= _CORRELATION_MAX_LAG_DAYS):
+        _raise("INVALID_ARGUMENTS", f"max_lag_days must be between 0 and {_CORRELATION_MAX_LAG_DAYS}.")
+    if min_overlap_days < 3:
+        _raise("INVALID_ARGUMENTS", "min_overlap_days must be >= 3.")
+
+    requested_days = (end - start).days + 1
+    if requested_days > 366:
+        _raise("INVALID_ARGUMENTS", "range too large (max 366 days).")
+
+    requested_metric_keys = _normalize_type_keys(metric_keys)
+    unknown = [key for key in requested_metric_keys if key not in _METRIC_SOURCE_CATALOG]
+    if unknown:
+        _raise("INVALID_ARGUMENTS", f"unknown metric_keys: {', '.join(unknown)}")
+    if metric_keys and len(requested_metric_keys) < 2:
+        _raise("INVALID_ARGUMENTS", "metric_keys must name at least two metrics.")
+
+    backend = _resolve_storage_backend(storage_backend)
+    cache_root = _cache_root()
+    days_by_date: dict[str, dict[str, Any]] = {}
+    days_recomputed = 0
+    for month in _iter_months(start, end):
+        loaded = _analysis_month_days(month, backend, cache_root)
+        if loaded is None:
+            continue
+        _, days, recomputed = loaded
+        days_by_date.update(days)
+        days_recomputed += recomputed
+
+    # One row per calendar day, so a lag of k rows is always k days even across missing exports.
+    dates = [day.isoformat() for day in _iter_dates(start, end)]
+    snapshots = [{"date": date, "metrics": days_by_date[date]["values"] if date in days_by_date else {}} for date in dates]
+    keys = requested_metric_keys or list(_DEFAULT_ANALYSIS_METRIC_KEYS)
+    matrix = _MetricMatrix(snapshots, keys)
+    if not requested_metric_keys:
+        keys = [key for key in keys if len(matrix.observed_rows(key)) >= min_overlap_days]
+
+    lagged = (
+        _lagged_correlations(matrix.table(keys), method=method, max_lag=max_lag_days, min_overlap=min_overlap_days)
+        if keys
+        else []
+    )
+    correlation, overlap = lagged[0] if lagged else ([], [])
+    for index in range(len(keys)):
+        correlation[index][index] = 1.0 if correlation[index][index] is not None else None
+
+    pairs: list[dict[str, Any]] = []
+    for i, key_x in enumerate(keys):
+        for j in range(i + 1, len(keys) if max_lag_days else 0):
+            lags = []
+            for lag in range(-max_lag_days, max_lag_days + 1):
+                lag_matrix, lag_overlap = lagged[abs(lag)]
+                row, column = (i, j) if lag >= 0 else (j, i)
+                lags.append({"lag_days": lag, "r": lag_matrix[row][column], "overlap_days": lag_overlap[row][column]})
+            scored = sorted((item for item in lags if item["r"] is not None), key=lambda item: (-abs(item["r"]), abs(item["lag_days"])))
+            pairs.append(
+                {
+                    "metric_key_x": key_x,
+                    "metric_key_y": keys[j],
+                    "best_lag": scored[0] if scored else None,
+                    "lags": lags,
+                }
+            )
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "storage_backend": backend.backend,
+        "read_strategy": {
+            "uses_month_indexes_only": True,
+            "raw_samples_read": False,
+            "days_recomputed": days_recomputed,
+        },
+        "days_requested": requested_days,
+        "days_available": sum(1 for date in dates if date in days_by_date),
+        "missing_dates": [date for date in dates if date not in days_by_date],
+        "method": method,
+        "min_overlap_days": min_overlap_days,
+        "metric_keys": keys,
+        "correlation": {"matrix": correlation, "overlap_days": overlap},
+        "lagged": pairs,
+    }
+
+
+class _QuantileSketch:
+    """Mergeable log-bucketed quantile sketch (DDSketch style).
+
+    Values are counted in buckets whose bounds grow by ``gamma``, so any quantile is returned with
+    at most ``relative_accuracy`` relative error, and merging two sketches is adding bucket counts.
+    """
+
+    relative_accuracy = 0.01
+
+    def __init__(self) -> None:
+        self._gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self._gamma**key / (self._gamma + 1)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value > 0:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif value < 0:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def merge(self, other: _QuantileSketch) -> None:
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "positive": {str(key): count for key, count in sorted(self.positive.items())},
+            "negative": {str(key): count for key, count in sorted(self.negative.items())},
+            "zero_count": self.zero_count,
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any]) -> _QuantileSketch:
+        sketch = cls()
+        sketch.positive = {int(key): int(count) for key, count in payload.get("positive", {}).items()}
+        sketch.negative = {int(key): int(count) for key, count in payload.get("negative", {}).items()}
+        sketch.zero_count = int(payload.get("zero_count", 0))
+        sketch.count = sketch.zero_count + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+_ROLLUP_VERSION = 1
+_LONG_RANGE_MAX_MONTHS = 240
+_LONG_RANGE_BUCKET_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+
+def _rollup_cache_path(cache_root: Path, month: str) -> Path:
+    return cache_root / "rollups" / f"{month}.json"
+
+
+def _compute_month_rollup(month: str, month_index: dict[str, Any], *, source: str) -> dict[str, Any]:
+    days = month_index.get("days")
+    snapshots = [
+        item
+        for item in (days if isinstance(days, list) else [])
+        if isinstance(item, dict) and isinstance(item.get("date"), str) and item["date"].startswith(month)
+    ]
+    snapshots.sort(key=lambda item: item["date"])
+    matrix = _MetricMatrix(snapshots, _DEFAULT_ANALYSIS_METRIC_KEYS)
+
+    metrics: dict[str, Any] = {}
+    for metric_key in _DEFAULT_ANALYSIS_METRIC_KEYS:
+        rows = matrix.observed_rows(metric_key)
+        excluded_days = len(matrix.excluded_rows(metric_key))
+        if not rows:
+            if excluded_days:
+                metrics[metric_key] = {"count": 0, "excluded_days": excluded_days}
+            continue
+        column = matrix.values(metric_key)
+        values = [column[row] for row in rows]
+        dates = [matrix.dates[row] for row in rows]
+        sketch = _QuantileSketch()
+        for value in values:
+            sketch.add(value)
+        min_index = values.index(min(values))
+        max_index = values.index(max(values))
+        metrics[metric_key] = {
+            "count": len(values),
+            "excluded_days": excluded_days,
+            "sum": math.fsum(values),
+            "sum_sq": math.fsum(value * value for value in values),
+            "min": values[min_index],
+            "min_date": dates[min_index],
+            "max": values[max_index],
+            "max_date": dates[max_index],
+            "first": values[0],
+            "first_date": dates[0],
+            "last": values[-1],
+            "last_date": dates[-1],
+            "unit": _metric_unit_from_snapshots(snapshots, metric_key),
+            "sketch": sketch.to_json(),
+        }
+
+    commit_ids = sorted(item["commit_id"] for item in snapshots if isinstance(item.get("commit_id"), str))
+    return {
+        "version": _ROLLUP_VERSION,
+        "month": month,
+        "source": source,
+        "days_available": len(snapshots),
+        "latest_commit_id": commit_ids[-1] if commit_ids else None,
+        "metrics": metrics,
+    }
+
+
+def _month_rollup(month: str, backend: _StorageBackend, cache_root: Path | None) -> tuple[dict[str, Any] | None, bool]:
+    """Return (rollup, reused); the rollup is None when the month has no index."""
+    relpath = _daily_month_path(month)
+    try:
+        source = backend.etag(relpath)
+    except _DataNotFound:
+        return None, False
+
+    cache_path = _rollup_cache_path(cache_root, month) if cache_root is not None else None
+    if cache_path is not None:
+        try:
+            cached = json.loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            cached = None
+        if isinstance(cached, dict) and cached.get("version") == _ROLLUP_VERSION and cached.get("source") == source:
+            return cached, True
+
+    month_index = _read_month_index(month, backend)
+    if month_index is None:
+        return None, False
+    rollup = _compute_month_rollup(month, month_index, source=source)
+    if cache_path is not None:
+        _write_cache_file(cache_path, json.dumps(rollup, separators=(",", ":")).encode("utf-8"))
+    return rollup, False
+
+
+class _RollupAccumulator:
+    def __init__(self) -> None:
+        self.count = 0
+        self.excluded_days = 0
+        self.sums: list[float] = []
+        self.sums_sq: list[float] = []
+        self.min: tuple[float, str] | None = None
+        self.max: tuple[float, str] | None = None
+        self.first: tuple[float, str] | None = None
+        self.last: tuple[float, str] | None = None
+        self.sketch = _QuantileSketch()
+
+    def add(self, partial: dict[str, Any]) -> None:
+        # Months are merged in date order, so the first/last partials carry the range's edges.
+        self.excluded_days += int(partial.get("excluded_days") or 0)
+        count = int(partial.get("count") or 0)
+        if count == 0:
+            return
+        self.count += count
+        self.sums.append(float(partial["sum"]))
+        self.sums_sq.append(float(partial["sum_sq"]))
+        if self.min is None or partial["min"] < self.min[0]:
+            self.min = (float(partial["min"]), partial["min_date"])
+        if self.max is None or partial["max"] > self.max[0]:
+            self.max = (float(partial["max"]), partial["max_date"])
+        if self.first is None:
+            self.first = (float(partial["first"]), partial["first_date"])
+        self.last = (float(partial["last"]), partial["last_date"])
+        self.sketch.merge(_QuantileSketch.from_json(partial.get("sketch") or {}))
+
+    def mean(self) -> float | None:
+        return math.fsum(self.sums) / self.count if self.count else None
+
+    def stdev(self) -> float | None:
+        if self.count < 2:
+            return None
+        total = math.fsum(self.sums)
+        variance = (math.fsum(self.sums_sq) - total * total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+def _analyze_long_range_impl(
+    *,
+    start_month: str,
+    end_month: str,
+    metric_keys: list[str] | None,
+    bucket: Literal["month", "quarter", "year"],
+    storage_backend: _StorageBackendName,
+) -> dict[str, Any]:
+    start = dt.date(*_parse_yyyy_mm(start_month), 1)
+    end = dt.date(*_parse_yyyy_mm(end_month), 1)
+    if start > end:
+        _raise("INVALID_ARGUMENTS", "start_month must be <= end_month.")
+    months = _iter_months(start, end)
+    if len(months) > _LONG_RANGE_MAX_MONTHS:
+        _raise("INVALID_ARGUMENTS", f"range too large (max {_LONG_RANGE_MAX_MONTHS} months).")
+    if bucket not in _LONG_RANGE_BUCKET_MONTHS:
+        _raise("INVALID_ARGUMENTS", "bucket must be one of: month, quarter, year.")
+
+    backend = _resolve_storage_backend(storage_backend)
+    cache_root = _cache_root()
+    rollups: dict[str, dict[str, Any]] = {}
+    missing_months: list[str] = []
+    reused = 0
+    for month in months:
+        rollup, from_cache = _month_rollup(month, backend, cache_root)
+        if rollup is None:
+            missing_months.append(month)
+            continue
+        rollups[month] = rollup
+        reused += int(from_cache)
+
+    bucket_size = _LONG_RANGE_BUCKET_MONTHS[bucket]
+
+    def bucket_key(month: str) -> str:
+        year, month_number = int(month[:4]), int(month[5:7])
+        first_month = ((month_number - 1) // bucket_size) * bucket_size + 1
+        return f"{year:04d}-{first_month:02d}"
+
+    requested_metric_keys = _normalize_type_keys(metric_keys) if metric_keys else list(_DEFAULT_ANALYSIS_METRIC_KEYS)
+    metric_summaries: list[dict[str, Any]] = []
+    for metric_key in requested_metric_keys:
+        overall = _RollupAccumulator()
+        buckets: dict[str, tuple[list[str], _RollupAccumulator]] = {}
+        unit = None
+        for month in months:
+            partial = rollups.get(month, {}).get("metrics", {}).get(metric_key)
+            if not isinstance(partial, dict):
+                continue
+            unit = unit or partial.get("unit")
+            overall.add(partial)
+            bucket_months, accumulator = buckets.setdefault(bucket_key(month), ([], _RollupAccumulator()))
+            bucket_months.append(month)
+            accumulator.add(partial)
+        if overall.count == 0:
+            continue
+
+        filled = [(bucket_months, accumulator) for bucket_months, accumulator in buckets.values() if accumulator.count]
+        bucket_payload = [
+            {
+                "start_month": bucket_months[0],
+                "end_month": bucket_months[-1],
+                "available_days": accumulator.count,
+                "mean": _rounded(accumulator.mean()),
+                "median": _rounded(accumulator.sketch.quantile(0.5)),
+                "min": _rounded(accumulator.min[0]) if accumulator.min else None,
+                "max": _rounded(accumulator.max[0]) if accumulator.max else None,
+            }
+            for bucket_months, accumulator in filled
+        ]
+
+        # Same first-vs-last rule as analyze_range, with calendar buckets in place of segments.
+        trend: dict[str, Any] = {"direction": "insufficient_data", "delta": None, "delta_pct": None}
+        first_bucket = filled[0][1]
+        last_bucket = filled[-1][1]
+        if len(filled) >= 2 and first_bucket.count >= 2 and last_bucket.count >= 2:
+            trend = _trend_payload(
+                first_bucket.mean() or 0.0,
+                last_bucket.mean() or 0.0,
+                median_value=overall.sketch.quantile(0.5) or 0.0,
+                spread=overall.max[0] - overall.min[0] if overall.max and overall.min else 0.0,
+            )
+
+        metric_summaries.append(
+            {
+                "metric_key": metric_key,
+                "unit": unit,
+                "available_days": overall.count,
+                "excluded_days": overall.excluded_days,
+                "statistics": {
+                    "mean": _rounded(overall.mean()),
+                    "stdev": _rounded(overall.stdev()),
+                    "p10": _rounded(overall.sketch.quantile(0.1)),
+                    "median": _rounded(overall.sketch.quantile(0.5)),
+                    "p90": _rounded(overall.sketch.quantile(0.9)),
+                    "min": _rounded(overall.min[0]) if overall.min else None,
+                    "min_date": overall.min[1] if overall.min else None,
+                    "max": _rounded(overall.max[0]) if overall.max else None,
+                    "max_date": overall.max[1] if overall.max else None,
+                    "earliest": _rounded(overall.first[0]) if overall.first else None,
+                    "earliest_date": overall.first[1] if overall.first else None,
+                    "latest": _rounded(overall.last[0]) if overall.last else None,
+                    "latest_date": overall.last[1] if overall.last else None,
+                },
+                "trend": trend,
+                "buckets": bucket_payload,
+            }
+        )
+
+    commit_ids = sorted(
+        rollup["latest_commit_id"] for rollup in rollups.values() if isinstance(rollup.get("latest_commit_id"), str)
+    )
+    return {
+        "start_month": start_month,
+        "end_month": end_month,
+        "storage_backend": backend.backend,
+        "bucket": bucket,
+        "read_strategy": {
+            "uses_month_rollups": True,
+            "rollups_reused": reused,
+            "rollups_computed": len(rollups) - reused,
+            "raw_samples_read": False,
+        },
+        "months_requested": len(months),
+        "months_available": len(rollups),
+        "days_available": sum(int(rollup.get("days_available") or 0) for rollup in rollups.values()),
+        "missing_months": missing_months,
+        "latest_commit_id": commit_ids[-1] if commit_ids else None,
+        "quantiles_approximate": True,
+        "metrics": metric_summaries,
+    }
+
+
+def _commit_candidates(keys: Iterable[str], since_cursor: str | None) -> list[tuple[str, str]]:
+    candidates: list[tuple[str, str]] = []
+    for key in keys:
+        if not key.endswith(".json"):
+            continue
+        commit_id = key.rsplit("/", maxsplit=1)[-1].removesuffix(".json")
+        if since_cursor and commit_id <= since_cursor:
+            continue
+        candidates.append((commit_id, key))
+    candidates.sort()
+    return candidates
+
+
+def _list_changes_impl(
+    *,
+    since_cursor: str | None,
+    limit: int,
+    include_raw_types: bool,
+    backend: _StorageBackend,
+) -> dict[str, Any]:
+    return _changes_payload(
+        _commit_candidates(backend.list_keys(_commit_prefix()), since_cursor),
+        since_cursor=since_cursor,
+        limit=limit,
+        include_raw_types=include_raw_types,
+        backend=backend,
+    )
+
+
+def _changes_payload(
+    candidates: list[tuple[str, str]],
+    *,
+    since_cursor: str | None,
+    limit: int,
+    include_raw_types: bool,
+    backend: _StorageBackend,
+) -> dict[str, Any]:
+    # Commit ids are in the key names, so only the commits that fit in `limit` are fetched.
+    selected: list[tuple[str, dict[str, Any]]] = []
+    for commit_id, key in candidates:
+        if len(selected) >= limit:
+            break
+        try:
+            selected.append((commit_id, _read_json(backend, key)))
+        except _DataNotFound:
+            continue
+    next_cursor = selected[-1][0] if selected else since_cursor
+
+    changes: list[dict[str, Any]] = []
+    for _, commit in selected:
+        enriched_commit = dict(commit)
+        dates = enriched_commit.get("dates")
+        if include_raw_types and isinstance(dates, list):
+            enriched_dates: list[dict[str, Any]] = []
+            for item in dates:
+                if not isinstance(item, dict):
+                    continue
+                enriched_item = dict(item)
+                relpath = enriched_item.get("raw_manifest_relpath")
+                if isinstance(relpath, str) and relpath:
+                    try:
+                        manifest = _read_json(backend, relpath)
+                    except _DataNotFound:
+                        enriched_item["raw_types"] = None
+                    else:
+                        enriched_item["raw_types"] = _manifest_types(manifest)
+                else:
+                    enriched_item["raw_types"] = None
+                enriched_dates.append(enriched_item)
+            enriched_commit["dates"] = enriched_dates
+        changes.append(enriched_commit)
+
+    return {
+        "storage_backend": backend.backend,
+        "since_cursor": since_cursor,
+        "next_cursor": next_cursor,
+        "changes": changes,
+    }
+
+
+_WAIT_POLL_INITIAL_S = 1.0
+_WAIT_POLL_MAX_S = 10.0
+# A cursor at most this old is caught up by listing its day partitions instead of the whole log.
+_WAIT_PARTITION_LIST_MAX_DAYS = 31
+
+
+async def _wait_for_changes_impl(
+    *,
+    since_cursor: str,
+    timeout_s: int,
+    limit: int,
+    include_raw_types: bool,
+    backend: _StorageBackend,
+) -> dict[str, Any]:
+    """Return commits after ``since_cursor`` as soon as one exists, or an empty page after ``timeout_s``.
+
+    Commit keys are partitioned by the UTC day in their commit_id. The first check covers every
+    partition from the cursor's day to today (or the whole log for an old or opaque cursor); later
+    checks list only yesterday's and today's partitions, with exponential backoff between them.
+    """
+    started = time.monotonic()
+    deadline = started + timeout_s
+    today = dt.datetime.now(dt.timezone.utc).date()
+    try:
+        cursor_day: dt.date | None = dt.datetime.strptime(since_cursor[:8], "%Y%m%d").date()
+    except ValueError:
+        cursor_day = None
+    days: list[dt.date] | None = None
+    if cursor_day is not None and (today - cursor_day).days <= _WAIT_PARTITION_LIST_MAX_DAYS:
+        days = _iter_dates(min(cursor_day, today - dt.timedelta(days=1)), max(cursor_day, today))
+
+    polls = 0
+    interval = _WAIT_POLL_INITIAL_S
+    while True:
+        polls += 1
+        if days is None:
+            keys = await asyncio.to_thread(backend.list_keys, _commit_prefix())
+        else:
+            keys = []
+            for day in days:
+                keys.extend(await asyncio.to_thread(backend.list_keys, _commit_day_prefix(day)))
+        candidates = _commit_candidates(keys, since_cursor)
+        remaining = deadline - time.monotonic()
+        if candidates or remaining <= 0:
+            break
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, _WAIT_POLL_MAX_S)
+        today = dt.datetime.now(dt.timezone.utc).date()
+        days = [today - dt.timedelta(days=1), today]
+
+    payload = await asyncio.to_thread(
+        _changes_payload,
+        candidates,
+        since_cursor=since_cursor,
+        limit=limit,
+        include_raw_types=include_raw_types,
+        backend=backend,
+    )
+    return {
+        **payload,
+        "timed_out": not candidates,
+        "polls": polls,
+        "waited_s": round(time.monotonic() - started, 3),
+    }
+
+
+_WAREHOUSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS ingested_dates (
+    date TEXT PRIMARY KEY,
+    daily_commit_id TEXT,
+    raw_commit_id TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_metrics (
+    date TEXT NOT NULL,
+    metric_key TEXT NOT NULL,
+    value REAL,
+    status TEXT,
+    unit TEXT,
+    commit_id TEXT,
+    PRIMARY KEY (date, metric_key)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    type_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    record_index INTEGER NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    start_ms INTEGER,
+    end_ms INTEGER,
+    value REAL,
+    unit TEXT,
+    category_value INTEGER,
+    category_label TEXT,
+    source_name TEXT,
+    source_bundle_id TEXT,
+    device_model TEXT,
+    components TEXT,
+    PRIMARY KEY (type_key, date, record_index)
+);
+CREATE INDEX IF NOT EXISTS samples_type_start ON samples (type_key, start_time);
+CREATE INDEX IF NOT EXISTS daily_metrics_metric_date ON daily_metrics (metric_key, date);
+"""
+
+_WAREHOUSE_READ_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+_WAREHOUSE_QUERY_TIMEOUT_S = 10.0
+
+
+def _warehouse_path(cache_root: Path) -> Path:
+    return cache_root / "warehouse.sqlite3"
+
+
+def _require_cache_root() -> Path:
+    cache_root = _cache_root()
+    if cache_root is None:
+        _raise("INVALID_ARGUMENTS", "the local health cache is disabled; enable `health.cache` to use this tool.")
+        raise AssertionError("unreachable")
+    return cache_root
+
+
+def _open_warehouse(cache_root: Path) -> sqlite3.Connection:
+    path = _warehouse_path(cache_root)
+    try:
+        _make_private_dirs(path.parent)
+        # SQLite gives its -wal/-shm files the database file's permissions.
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_WAREHOUSE_SCHEMA)
+    except (OSError, sqlite3.Error) as exc:
+        raise ToolError(f"STORAGE_UNAVAILABLE: failed to open health warehouse: {path}: {exc}") from exc
+    return conn
+
+
+def _epoch_ms_to_iso(value: int) -> str | None:
+    if value == _COLUMNAR_MISSING_TIME:
+        return None
+    return (_EPOCH + dt.timedelta(milliseconds=value)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _warehouse_sample_rows(columnar: _ColumnarSamples, *, type_key: str, date: str) -> Iterator[tuple[Any, ...]]:
+    columns = columnar.columns
+    start_ms = columns["start_ms"]
+    end_ms = columns["end_ms"]
+    values = columns["value"]
+    for index in range(columnar.count):
+        value = values[index]
+        components = None
+        if math.isnan(value):
+            value = None
+            record_components = columnar.record(index).get("components")
+            if isinstance(record_components, dict):
+                components = json.dumps(record_components, sort_keys=True)
+        category_value = columns["category_value"][index]
+        yield (
+            type_key,
+            date,
+            index,
+            _epoch_ms_to_iso(start_ms[index]),
+            _epoch_ms_to_iso(end_ms[index]),
+            None if start_ms[index] == _COLUMNAR_MISSING_TIME else start_ms[index],
+            None if end_ms[index] == _COLUMNAR_MISSING_TIME else end_ms[index],
+            value,
+            columnar.string(columns["unit"][index]),
+            None if category_value == _COLUMNAR_MISSING_INT else category_value,
+            columnar.string(columns["category_label"][index]),
+            columnar.string(columns["source_name"][index]),
+            columnar.string(columns["source_bundle_id"][index]),
+            columnar.string(columns["device_model"][index]),
+            components,
+        )
+
+
+def _ingest_warehouse_dates(
+    conn: sqlite3.Connection,
+    *,
+    dates: list[str],
+    backend: _StorageBackend,
+    cache_root: Path,
+    include_raw_samples: bool,
+    type_keys: list[str],
+) -> dict[str, int]:
+    stats = {"dates_imported": 0, "dates_unchanged": 0, "metric_rows": 0, "sample_rows": 0}
+    if not dates:
+        return stats
+    known = {
+        row[0]: (row[1], row[2])
+        for row in conn.execute(
+            f"SELECT date, daily_commit_id, raw_commit_id FROM ingested_dates WHERE date IN ({','.join('?' * len(dates))})",
+            dates,
+        )
+    }
+
+    snapshots: dict[str, dict[str, Any]] = {}
+    for month in sorted({date[:7] for date in dates}):
+        month_index = _read_month_index(month, backend)
+        days = month_index.get("days") if month_index else None
+        for item in days if isinstance(days, list) else []:
+            if isinstance(item, dict) and isinstance(item.get("date"), str):
+                snapshots[item["date"]] = item
+
+    pack_reader = _RawPackReader(backend, end=_parse_ymd(max(dates)))
+    for date_value in dates:
+        day = _parse_ymd(date_value)
+        snapshot = snapshots.get(date_value)
+        manifest: dict[str, Any] | None = None
+        if include_raw_samples:
+            manifest = pack_reader.manifest(day)
+            if manifest is None:
+                try:
+                    manifest = _read_raw_manifest(day, backend)
+                except _DataNotFound:
+                    manifest = None
+
+        daily_commit_id = snapshot.get("commit_id") if snapshot else None
+        raw_commit_id = manifest.get("commit_id") if manifest else None
+        if known.get(date_value) == (daily_commit_id, raw_commit_id):
+            stats["dates_unchanged"] += 1
+            continue
+
+        with conn:
+            conn.execute("DELETE FROM daily_metrics WHERE date = ?", (date_value,))
+            conn.execute("DELETE FROM samples WHERE date = ?", (date_value,))
+            if snapshot:
+                metrics = snapshot.get("metrics") if isinstance(snapshot.get("metrics"), dict) else {}
+                metric_status = snapshot.get("metric_status") if isinstance(snapshot.get("metric_status"), dict) else {}
+                metric_units = snapshot.get("metric_units") if isinstance(snapshot.get("metric_units"), dict) else {}
+                rows = [
+                    (
+                        date_value,
+                        metric_key,
+                        _coerce_numeric(metrics.get(metric_key)),
+                        metric_status.get(metric_key) if isinstance(metric_status.get(metric_key), str) else None,
+                        metric_units.get(metric_key) if isinstance(metric_units.get(metric_key), str) else None,
+                        daily_commit_id,
+                    )
+                    for metric_key in sorted(set(metrics) | set(metric_status))
+                ]
+                conn.executemany("INSERT INTO daily_metrics VALUES (?, ?, ?, ?, ?, ?)", rows)
+                stats["metric_rows"] += len(rows)
+            if manifest:
+                for type_key, type_info in sorted(_manifest_types(manifest).items()):
+                    if type_keys and type_key not in type_keys:
+                        continue
+                    if not _type_has_readable_data(type_info):
+                        continue
+                    try:
+                        columnar = _raw_type_columnar(
+                            backend,
+                            pack_reader,
+                            cache_root,
+                            date=day,
+                            type_key=type_key,
+                            type_info=type_info,
+                            commit_id=raw_commit_id,
+                            full_read=True,
+                        )
+                    except _DataNotFound:
+                        continue
+                    if columnar is None:
+                        continue
+                    with columnar:
+                        cursor = conn.executemany(
+                            "INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            _warehouse_sample_rows(columnar, type_key=type_key, date=date_value),
+                        )
+                    stats["sample_rows"] += max(cursor.rowcount, 0)
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested_dates VALUES (?, ?, ?, ?)",
+                (date_value, daily_commit_id, raw_commit_id, dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")),
+            )
+        stats["dates_imported"] += 1
+    return stats
+
+
+def _warehouse_state(conn: sqlite3.Connection, key: str) -> str | None:
+    row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _sync_warehouse_impl(
+    *,
+    include_raw_samples: bool | None,
+    type_keys: list[str] | None,
+    max_commits: int,
+    rebuild: bool,
+    backend: _StorageBackend,
+) -> dict[str, Any]:
+    """Import dates named in commits after the stored cursor.
+
+    ``include_raw_samples=None`` / ``type_keys=None`` reuse the options of the previous sync so
+    query-time syncs stay consistent with what the warehouse already holds. The warehouse is tied to
+    the store it was first synced from (``backend.namespace``); syncing another store needs ``rebuild``.
+    """
+    cache_root = _require_cache_root()
+    conn = _open_warehouse(cache_root)
+    try:
+        if rebuild:
+            with conn:
+                for table in ("sync_state", "ingested_dates", "daily_metrics", "samples"):
+                    conn.execute(f"DELETE FROM {table}")
+
+        stored_options = json.loads(_warehouse_state(conn, "options") or "{}")
+        if include_raw_samples is None:
+            include_raw_samples = bool(stored_options.get("include_raw_samples", False))
+        requested_type_keys = (
+            _normalize_type_keys(type_keys) if type_keys is not None else list(stored_options.get("type_keys") or [])
+        )
+        options = {"include_raw_samples": include_raw_samples, "type_keys": requested_type_keys}
+        if stored_options and stored_options != options:
+            _raise(
+                "INVALID_ARGUMENTS",
+                "warehouse was synced with different include_raw_samples/type_keys; pass rebuild=true to re-import with the new options.",
+            )
+
+        since_cursor = _warehouse_state(conn, "commit_cursor")
+        if since_cursor is not None and _warehouse_state(conn, "namespace") != backend.namespace:
+            _raise(
+                "INVALID_ARGUMENTS",
+                "warehouse was synced from a different store (endpoint/bucket/prefix); pass rebuild=true to re-import from this one.",
+            )
+        totals = {"commits": 0, "dates_imported": 0, "dates_unchanged": 0, "metric_rows": 0, "sample_rows": 0}
+        cursor = since_cursor
+        while totals["commits"] < max_commits:
+            page = _list_changes_impl(
+                since_cursor=cursor,
+                limit=min(1000, max_commits - totals["commits"]),
+                include_raw_types=False,
+                backend=backend,
+            )
+            if not page["changes"]:
+                break
+            dates = sorted(
+                {
+                    item["date"]
+                    for commit in page["changes"]
+                    for item in (commit.get("dates") if isinstance(commit.get("dates"), list) else [])
+                    if isinstance(item, dict) and isinstance(item.get("date"), str)
+                }
+            )
+            stats = _ingest_warehouse_dates(
+                conn,
+                dates=dates,
+                backend=backend,
+                cache_root=cache_root,
+                include_raw_samples=include_raw_samples,
+                type_keys=requested_type_keys,
+            )
+            for key, value in stats.items():
+                totals[key] += value
+            totals["commits"] += len(page["changes"])
+            cursor = page["next_cursor"]
+            # Advance the stored cursor only after the dates named in this page are imported.
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('commit_cursor', ?)", (cursor,))
+                conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('namespace', ?)", (backend.namespace,))
+                conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('options', ?)", (json.dumps(options),))
+        date_range = conn.execute("SELECT MIN(date), MAX(date), COUNT(*) FROM ingested_dates").fetchone()
+    except sqlite3.Error as exc:
+        raise ToolError(f"STORAGE_UNAVAILABLE: health warehouse sync failed: {exc}") from exc
+    finally:
+        conn.close()
+
+    return {
+        "storage_backend": backend.backend,
+        "warehouse_path": str(_warehouse_path(cache_root)),
+        "since_cursor": since_cursor,
+        "commit_cursor": cursor,
+        "options": options,
+        **totals,
+        "ingested_dates": {"first": date_range[0], "last": date_range[1], "count": date_range[2]},
+    }
+
+
+def _warehouse_authorizer(action: int, *_: Any) -> int:
+    return sqlite3.SQLITE_OK if action in _WAREHOUSE_READ_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _query_warehouse_impl(*, sql: str, params: list[str | int | float | None] | None, max_rows: int) -> dict[str, Any]:
+    cache_root = _require_cache_root()
+    path = _warehouse_path(cache_root)
+    if not path.exists():
+        _raise("DATA_NOT_FOUND", "health warehouse has not been synced yet; run health.sync_warehouse first.")
+
+    conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+    deadline = time.monotonic() + _WAREHOUSE_QUERY_TIMEOUT_S
+    conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+    conn.set_authorizer(_warehouse_authorizer)
+    try:
+        cursor = conn.execute(sql, list(params or []))
+        columns = [item[0] for item in cursor.description or []]
+        rows = cursor.fetchmany(max_rows + 1)
+    except sqlite3.DatabaseError as exc:
+        raise ToolError(f"INVALID_ARGUMENTS: warehouse query failed: {exc}") from exc
+    finally:
+        conn.close()
+
+    return {
+        "columns": columns,
+        "rows": [list(row) for row in rows[:max_rows]],
+        "row_count": min(len(rows), max_rows),
+        "truncated": len(rows) > max_rows,
+    }
+
+
+def compact_raw_month(
+    *,
+    month: str,
+    dry_run: bool = False,
+    storage_backend: _StorageBackendName = "auto",
+) -> dict[str, Any]:
+    """Operator entry point (not an MCP tool): pack one finished month of raw type files."""
+    return _compact_raw_month_impl(
+        month=month,
+        dry_run=dry_run,
+        backend=_resolve_storage_backend(storage_backend),
+    )
+
+
+@health_router.tool(
+    name="health.read_daily_metrics",
+    description="Read one day's exported Health metrics snapshot from an S3-compatible object store.",
+)
+def read_daily_metrics(
+    date: Annotated[str, Field(description="Date (YYYY-MM-DD).")],
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    day = _parse_ymd(date)
+    backend = _resolve_storage_backend(storage_backend)
+
+    try:
+        snapshot = _read_daily_snapshot(day, backend)
+    except _DataNotFound:
+        _raise("DATA_NOT_FOUND", f"No daily metrics found for {date}.")
+
+    return _public_daily_snapshot(snapshot, backend.backend)
+
+
+@health_router.tool(
+    name="health.read_daily_metrics_batch",
+    description="Read exported daily metrics snapshots for a list of possibly non-contiguous dates in one call. Reads run concurrently; dates that fail are reported under errors instead of failing the call.",
+)
+def read_daily_metrics_batch(
+    dates: Annotated[list[str], Field(description="Dates (YYYY-MM-DD), at most 100. Results keep this order.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional daily metric keys to keep; other metrics, statuses, and units are dropped from the response."),
+    ] = None,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _read_daily_metrics_batch_impl(dates=dates, metric_keys=metric_keys, storage_backend=storage_backend)
+
+
+@health_router.tool(
+    name="health.read_range_metrics",
+    description="Read a date range of exported daily metrics using monthly indexes. Missing dates are reported, not treated as an error.",
+)
+def read_range_metrics(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    end_date: Annotated[str, Field(description="End date (YYYY-MM-DD), inclusive.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional daily metric keys to keep; other metrics, statuses, and units are dropped from the response."),
+    ] = None,
+    format: Annotated[
+        Literal["records", "matrix"],
+        Field(
+            description=(
+                "`records` (default) returns one snapshot per day in `data`; `matrix` returns only `matrix`: a dates "
+                "array, one value array per metric (null where a day lacks it), and a shared units header."
+            )
+        ),
+    ] = "records",
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _read_range_metrics_impl(
+        start_date=start_date,
+        end_date=end_date,
+        storage_backend=storage_backend,
+        metric_keys=metric_keys,
+        format=format,
+    )
+
+
+@health_router.tool(
+    name="health.analyze_range",
+    description="Analyze a Health date range using exported daily snapshots only. Returns metric summaries, segment trends, notable days, and brief insights without reading raw samples.",
+)
+def analyze_range(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    end_date: Annotated[str, Field(description="End date (YYYY-MM-DD), inclusive.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional daily metric keys to analyze. Defaults to all known daily metrics with available data."),
+    ] = None,
+    segment_count: Annotated[
+        int,
+        Field(description="How many contiguous segments to split the requested range into for trend comparison.", ge=1, le=12),
+    ] = 3,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _analyze_range_impl(
+        start_date=start_date,
+        end_date=end_date,
+        metric_keys=metric_keys,
+        segment_count=segment_count,
+        storage_backend=storage_backend,
+    )
+
+
+@health_router.tool(
+    name="health.correlate_metrics",
+    description="Correlate daily Health metrics over a date range (Pearson or Spearman, pairwise-complete days) and scan lagged cross-correlation up to ±7 days, e.g. whether short sleep precedes a higher resting heart rate. Uses exported daily snapshots only.",
+)
+def correlate_metrics(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    end_date: Annotated[str, Field(description="End date (YYYY-MM-DD), inclusive.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Daily metric keys to correlate (at least two). Defaults to every metric with at least min_overlap_days observed days."),
+    ] = None,
+    method: Annotated[
+        Literal["pearson", "spearman"],
+        Field(description="Correlation coefficient. Spearman ranks each pair's shared days and is robust to outliers and monotonic non-linear relations."),
+    ] = "pearson",
+    max_lag_days: Annotated[
+        int,
+        Field(
+            description="Largest lag to scan. Lag k pairs metric_key_x on day t with metric_key_y on day t + k, so a positive best lag means x leads y. 0 skips the lag scan.",
+            ge=0,
+            le=_CORRELATION_MAX_LAG_DAYS,
+        ),
+    ] = 7,
+    min_overlap_days: Annotated[
+        int,
+        Field(description="Minimum number of days where both metrics are present for a coefficient to be reported.", ge=3, le=366),
+    ] = 10,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _correlate_metrics_impl(
+        start_date=start_date,
+        end_date=end_date,
+        metric_keys=metric_keys,
+        method=method,
+        max_lag_days=max_lag_days,
+        min_overlap_days=min_overlap_days,
+        storage_backend=storage_backend,
+    )
+
+
+@health_router.tool(
+    name="health.analyze_long_range",
+    description="Analyze months or years of Health daily metrics from cached per-month rollups (count, sum, min/max, quantile sketch). Use for ranges beyond analyze_range's 366-day limit; quantiles are approximate (about 1%).",
+)
+def analyze_long_range(
+    start_month: Annotated[str, Field(description="First month (YYYY-MM).")],
+    end_month: Annotated[str, Field(description="Last month (YYYY-MM), inclusive.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional daily metric keys to analyze. Defaults to all known daily metrics with available data."),
+    ] = None,
+    bucket: Annotated[
+        Literal["month", "quarter", "year"],
+        Field(description="Calendar bucket used for the per-bucket breakdown and the first-vs-last trend."),
+    ] = "month",
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _analyze_long_range_impl(
+        start_month=start_month,
+        end_month=end_month,
+        metric_keys=metric_keys,
+        bucket=bucket,
+        storage_backend=storage_backend,
+    )
+
+
+@health_router.tool(
+    name="health.list_sample_catalog",
+    description="List known Health raw sample types, kinds, tags, and how they relate to daily metrics.",
+)
+def list_sample_catalog() -> dict[str, Any]:
+    return _public_sample_catalog()
+
+
+@health_router.tool(
+    name="health.read_samples",
+    description="Read raw Health samples across one or more dates, filtered by type_keys/tags/kinds, with manifest-aware pagination.",
+)
+def read_samples(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    end_date: Annotated[
+        str | None,
+        Field(description="End date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    type_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional canonical raw type keys such as workout, heart_rate, or blood_pressure."),
+    ] = None,
+    tags: Annotated[
+        list[HealthSampleTag] | None,
+        Field(description="Optional logical tags. Matching is union-based across tags."),
+    ] = None,
+    kinds: Annotated[
+        list[HealthSampleKind] | None,
+        Field(description="Optional record kinds such as quantity, category, workout, or correlation."),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Field(description="Opaque pagination cursor returned by a previous read_samples/read_daily_raw call."),
+    ] = None,
+    max_records: Annotated[
+        int,
+        Field(description="Maximum number of sample records to return.", ge=0, le=50000),
+    ] = 5000,
+    manifest_only: Annotated[
+        bool,
+        Field(description="When true, return only filtered manifest views and no sample payloads."),
+    ] = False,
+    include_manifests: Annotated[
+        bool,
+        Field(description="Include filtered manifest views alongside sample payloads."),
+    ] = True,
+    where: Annotated[
+        list[str] | None,
+        Field(
+            description=(
+                "Optional sample predicates, all of which must match, evaluated while scanning: "
+                "`value>150`, `category_label=asleep_deep|asleep_rem`, `duration_minutes>=20`, "
+                "`time_of_day in 22:00-06:00` (collector-local), `source_name~watch`. Only matching "
+                "samples count toward max_records and the cursor."
+            )
+        ),
+    ] = None,
+    start_time: Annotated[
+        str | None,
+        Field(
+            description=(
+                "Optional ISO 8601 instant with offset (e.g. 2026-03-14T07:10:00+08:00); keep samples "
+                "overlapping [start_time, end_time). Plain raw files are then fetched with Range reads via a cached time index."
+            )
+        ),
+    ] = None,
+    end_time: Annotated[
+        str | None,
+        Field(description="Optional ISO 8601 instant with offset; exclusive end of the time window."),
+    ] = None,
+    order: Annotated[
+        Literal["type", "time"],
+        Field(
+            description=(
+                "`type` (default) pages date by date and type by type; `time` merges all selected types into one "
+                "timeline ordered by sample start, with a cursor that tracks every stream."
+            )
+        ),
+    ] = "type",
+    format: Annotated[
+        Literal["records", "columnar"],
+        Field(
+            description=(
+                "`records` (default) returns one JSON object per sample; `columnar` returns `sample_columns` instead: "
+                "per-type field arrays with delta-encoded start_ms, constant fields hoisted, and repeated strings "
+                "dictionary-encoded. Much smaller for dense types."
+            )
+        ),
+    ] = "records",
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    final_end_date = end_date or start_date
+    return _read_samples_impl(
+        start_date=start_date,
+        end_date=final_end_date,
+        type_keys=type_keys,
+        tags=tags,
+        kinds=kinds,
+        cursor=cursor,
+        max_records=max_records,
+        manifest_only=manifest_only,
+        include_manifests=include_manifests,
+        storage_backend=storage_backend,
+        where=where,
+        start_time=start_time,
+        end_time=end_time,
+        order=order,
+        format=format,
+    )
+
+
+@health_router.tool(
+    name="health.aggregate_samples",
+    description="Fold raw Health samples into fixed time buckets server-side (sum/mean/min/max/count/last/percentiles) instead of paging records. Defaults follow each type's aggregate_hint; sleep-style category types report minutes per category.",
+)
+def aggregate_samples(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    type_keys: Annotated[
+        list[str],
+        Field(description="Canonical raw type keys to aggregate, such as heart_rate or step_count."),
+    ],
+    end_date: Annotated[
+        str | None,
+        Field(description="End date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    bucket_minutes: Annotated[
+        int,
+        Field(description="Bucket width in minutes; must divide 1440. Buckets align to the collector's local midnight.", ge=1, le=1440),
+    ] = 60,
+    statistics: Annotated[
+        list[str] | None,
+        Field(description="Statistics per bucket: count, sum, mean, min, max, last, or pNN (e.g. p50, p95; approximate). Defaults from aggregate_hint."),
+    ] = None,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _aggregate_samples_impl(
+        start_date=start_date,
+        end_date=end_date or start_date,
+        type_keys=type_keys,
+        bucket_minutes=bucket_minutes,
+        statistics=statistics,
+        storage_backend=storage_backend,
+    )
+
+
 @health_router.tool(
-    name="health.read_daily_metrics",
-    description="Read one day's exported Health metrics snapshot from an S3-compatible object store.",
+    name="health.downsample_samples",
+    description="Reduce a dense raw quantity series (e.g. a week of heart_rate) to about target_points representative points with streaming LTTB or a min/max envelope, for charting or describing shape.",
 )
-def read_daily_metrics(
-    date: Annotated[str, Field(description="Date (YYYY-MM-DD).")],
+def downsample_samples(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    type_key: Annotated[str, Field(description="Canonical raw quantity type key, such as heart_rate.")],
+    end_date: Annotated[
+        str | None,
+        Field(description="End date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    target_points: Annotated[
+        int,
+        Field(description="Approximate number of points to return.", ge=3, le=10000),
+    ] = 500,
+    method: Annotated[
+        Literal["lttb", "minmax"],
+        Field(description="`lttb` keeps visually significant points; `minmax` keeps each bucket's low and high (preserves extremes)."),
+    ] = "lttb",
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
     ] = "auto",
 ) -> dict[str, Any]:
-    day = _parse_ymd(date)
-    backend = _resolve_storage_backend(storage_backend)
+    return _downsample_samples_impl(
+        start_date=start_date,
+        end_date=end_date or start_date,
+        type_key=type_key,
+        target_points=target_points,
+        method=method,
+        storage_backend=storage_backend,
+    )
 
-    try:
-        snapshot = _read_daily_snapshot(day, backend)
-    except _DataNotFound:
-        _raise("DATA_NOT_FOUND", f"No daily metrics found for {date}.")
 
-    return _public_daily_snapshot(snapshot, backend.backend)
+@health_router.tool(
+    name="health.sleep_sessions",
+    description="Reconstruct per-night sleep sessions from raw sleep_analysis samples across midnight, with stage minutes (deep/REM/core/awake/in bed) and no raw samples. Sessions are dated by the local wake-up date.",
+)
+def sleep_sessions(
+    start_date: Annotated[str, Field(description="First wake-up date (YYYY-MM-DD).")],
+    end_date: Annotated[
+        str | None,
+        Field(description="Last wake-up date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    max_gap_minutes: Annotated[
+        int,
+        Field(description="Sleep samples separated by at most this many minutes belong to the same session.", ge=0, le=360),
+    ] = _SLEEP_MAX_GAP_MINUTES,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _sleep_sessions_impl(
+        start_date=start_date,
+        end_date=end_date or start_date,
+        max_gap_minutes=max_gap_minutes,
+        storage_backend=storage_backend,
+    )
 
 
 @health_router.tool(
-    name="health.read_range_metrics",
-    description="Read a date range of exported daily metrics using monthly indexes. Missing dates are reported, not treated as an error.",
+    name="health.sample_percentiles",
+    description="Percentiles (plus count, mean, min, max) of raw Health sample values such as heart_rate or oxygen_saturation over up to 366 days. Merges cached per-day quantile sketches, so repeat and month-scale queries do not rescan raw samples; percentiles are approximate (about 1%).",
 )
-def read_range_metrics(
+def sample_percentiles(
     start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
-    end_date: Annotated[str, Field(description="End date (YYYY-MM-DD), inclusive.")],
+    type_keys: Annotated[list[str], Field(description="Canonical raw quantity type keys, such as heart_rate.")],
+    end_date: Annotated[
+        str | None,
+        Field(description="End date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    percentiles: Annotated[
+        list[str] | None,
+        Field(description="Percentiles to estimate as pNN (e.g. p50, p95, p99). Defaults to p5, p25, p50, p75, p95."),
+    ] = None,
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
     ] = "auto",
 ) -> dict[str, Any]:
-    return _read_range_metrics_impl(
+    return _sample_percentiles_impl(
         start_date=start_date,
-        end_date=end_date,
+        end_date=end_date or start_date,
+        type_keys=type_keys,
+        percentiles=percentiles,
         storage_backend=storage_backend,
     )
 
 
 @health_router.tool(
-    name="health.analyze_range",
-    description="Analyze a Health date range using exported daily snapshots only. Returns metric summaries, segment trends, notable days, and brief insights without reading raw samples.",
+    name="health.coverage_report",
+    description="Report which days have raw Health data per type over up to 10 years, as run-length date ranges with manifest record counts and statuses. Reads manifests only (cached locally), never sample files.",
 )
-def analyze_range(
+def coverage_report(
     start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
     end_date: Annotated[str, Field(description="End date (YYYY-MM-DD), inclusive.")],
-    metric_keys: Annotated[
+    type_keys: Annotated[
         list[str] | None,
-        Field(description="Optional daily metric keys to analyze. Defaults to all known daily metrics with available data."),
+        Field(description="Optional canonical raw type keys such as heart_rate or sleep_analysis."),
+    ] = None,
+    tags: Annotated[
+        list[HealthSampleTag] | None,
+        Field(description="Optional logical tags. Matching is union-based across tags."),
+    ] = None,
+    kinds: Annotated[
+        list[HealthSampleKind] | None,
+        Field(description="Optional record kinds such as quantity, category, workout, or correlation."),
     ] = None,
-    segment_count: Annotated[
-        int,
-        Field(description="How many contiguous segments to split the requested range into for trend comparison.", ge=1, le=12),
-    ] = 3,
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
     ] = "auto",
 ) -> dict[str, Any]:
-    return _analyze_range_impl(
+    return _coverage_report_impl(
         start_date=start_date,
         end_date=end_date,
-        metric_keys=metric_keys,
-        segment_count=segment_count,
+        type_keys=type_keys,
+        tags=tags,
+        kinds=kinds,
         storage_backend=storage_backend,
     )
 
 
 @health_router.tool(
-    name="health.list_sample_catalog",
-    description="List known Health raw sample types, kinds, tags, and how they relate to daily metrics.",
-)
-def list_sample_catalog() -> dict[str, Any]:
-    return _public_sample_catalog()
-
-
-@health_router.tool(
-    name="health.read_samples",
-    description="Read raw Health samples across one or more dates, filtered by type_keys/tags/kinds, with manifest-aware pagination.",
+    name="health.presign_objects",
+    description="Return time-limited presigned GET URLs for raw manifests and type files selected like health.read_samples, so bulk exports can download directly from storage in parallel instead of through this server.",
 )
-def read_samples(
+def presign_objects(
     start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
     end_date: Annotated[
         str | None,
@@ -2070,37 +7341,26 @@ def read_samples(
         list[HealthSampleKind] | None,
         Field(description="Optional record kinds such as quantity, category, workout, or correlation."),
     ] = None,
-    cursor: Annotated[
-        str | None,
-        Field(description="Opaque pagination cursor returned by a previous read_samples/read_daily_raw call."),
-    ] = None,
-    max_records: Annotated[
+    expires_s: Annotated[
         int,
-        Field(description="Maximum number of sample records to return.", ge=0, le=50000),
-    ] = 5000,
-    manifest_only: Annotated[
-        bool,
-        Field(description="When true, return only filtered manifest views and no sample payloads."),
-    ] = False,
+        Field(description="URL lifetime in seconds (max 7 days).", ge=1, le=_PRESIGN_MAX_EXPIRES_S),
+    ] = 3600,
     include_manifests: Annotated[
         bool,
-        Field(description="Include filtered manifest views alongside sample payloads."),
+        Field(description="Also presign each day's raw manifest."),
     ] = True,
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
     ] = "auto",
 ) -> dict[str, Any]:
-    final_end_date = end_date or start_date
-    return _read_samples_impl(
+    return _presign_objects_impl(
         start_date=start_date,
-        end_date=final_end_date,
+        end_date=end_date or start_date,
         type_keys=type_keys,
         tags=tags,
         kinds=kinds,
-        cursor=cursor,
-        max_records=max_records,
-        manifest_only=manifest_only,
+        expires_s=expires_s,
         include_manifests=include_manifests,
         storage_backend=storage_backend,
     )
@@ -2140,6 +7400,16 @@ def read_daily_raw(
         bool,
         Field(description="Include the filtered manifest view in the response."),
     ] = True,
+    format: Annotated[
+        Literal["records", "columnar"],
+        Field(
+            description=(
+                "`records` (default) returns one JSON object per sample; `columnar` returns `sample_columns` instead: "
+                "per-type field arrays with delta-encoded start_ms, constant fields hoisted, and repeated strings "
+                "dictionary-encoded. Much smaller for dense types."
+            )
+        ),
+    ] = "records",
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
@@ -2156,14 +7426,17 @@ def read_daily_raw(
         manifest_only=manifest_only,
         include_manifests=include_manifests,
         storage_backend=storage_backend,
+        format=format,
     )
     manifest = result["manifests"][0] if result["manifests"] else None
+    samples_key = "sample_columns" if format == "columnar" else "samples"
     return {
         "date": date,
         "commit_id": manifest.get("commit_id") if isinstance(manifest, dict) else None,
         "storage_backend": result["storage_backend"],
         "manifest": manifest,
-        "samples": result["samples"],
+        "format": format,
+        samples_key: result[samples_key],
         "truncated": result["truncated"],
         "next_cursor": result["next_cursor"],
         "selected_type_keys": result["selected_type_keys"],
@@ -2186,6 +7459,15 @@ def inspect_day(
         list[str] | None,
         Field(description="Optional raw type keys to focus the inspection on."),
     ] = None,
+    recompute: Annotated[
+        bool,
+        Field(
+            description=(
+                "Recompute raw_aggregate metrics from the day's raw samples following each aggregate_hint, and report "
+                "the value and delta against the snapshot. Useful to confirm aggregation_gap diagnoses."
+            )
+        ),
+    ] = False,
     storage_backend: Annotated[
         Literal["auto", "s3_object_store"],
         Field(description="Storage backend to read from."),
@@ -2196,6 +7478,76 @@ def inspect_day(
         metric_keys=metric_keys,
         type_keys=type_keys,
         storage_backend=storage_backend,
+        recompute=recompute,
+    )
+
+
+@health_router.tool(
+    name="health.inspect_day_batch",
+    description="Run health.inspect_day for a list of possibly non-contiguous dates in one call. Days are inspected concurrently; dates that fail are reported under errors instead of failing the call.",
+)
+def inspect_day_batch(
+    dates: Annotated[list[str], Field(description="Dates (YYYY-MM-DD), at most 100. Results keep this order.")],
+    metric_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional daily metric keys to inspect."),
+    ] = None,
+    type_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional raw type keys to focus the inspection on."),
+    ] = None,
+    recompute: Annotated[
+        bool,
+        Field(description="Recompute raw-aggregate metrics from each day's raw samples, as in health.inspect_day."),
+    ] = False,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _inspect_day_batch_impl(
+        dates=dates,
+        metric_keys=metric_keys,
+        type_keys=type_keys,
+        recompute=recompute,
+        storage_backend=storage_backend,
+    )
+
+
+@health_router.tool(
+    name="health.verify_export",
+    description="Check the health export over a date range: manifest record_count against streamed raw sample counts, raw relpaths that exist, commit_id agreement across snapshot, month index, and manifest, and month-index entries against per-day snapshots. Returns a compact issue report.",
+)
+def verify_export(
+    start_date: Annotated[str, Field(description="Start date (YYYY-MM-DD).")],
+    end_date: Annotated[
+        str | None,
+        Field(description="End date (YYYY-MM-DD), inclusive. Defaults to start_date."),
+    ] = None,
+    type_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional raw type keys whose files are checked; snapshots and manifests are always checked."),
+    ] = None,
+    count_samples: Annotated[
+        bool,
+        Field(description="Stream every raw file and compare its sample count with record_count. When false, only check that each relpath exists (HEAD)."),
+    ] = True,
+    max_issues: Annotated[
+        int,
+        Field(description="Maximum number of issues listed; issue_counts always covers all of them.", ge=0, le=5000),
+    ] = 200,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _verify_export_impl(
+        start_date=start_date,
+        end_date=end_date or start_date,
+        type_keys=type_keys,
+        count_samples=count_samples,
+        max_issues=max_issues,
+        storage_backend=storage_backend,
     )
 
 
@@ -2221,51 +7573,125 @@ def list_changes(
         Field(description="Storage backend to read from."),
     ] = "auto",
 ) -> dict[str, Any]:
-    backend = _resolve_storage_backend(storage_backend)
-    keys = [key for key in backend.list_keys(_commit_prefix()) if key.endswith(".json")]
+    return _list_changes_impl(
+        since_cursor=since_cursor,
+        limit=limit,
+        include_raw_types=include_raw_types,
+        backend=_resolve_storage_backend(storage_backend),
+    )
 
-    commits: list[tuple[str, dict[str, Any]]] = []
-    for key in keys:
-        commit_id = key.rsplit("/", maxsplit=1)[-1].removesuffix(".json")
-        if since_cursor and commit_id <= since_cursor:
-            continue
-        try:
-            commit = _read_json(backend, key)
-        except _DataNotFound:
-            continue
-        commits.append((commit_id, commit))
 
-    commits.sort(key=lambda item: item[0])
-    selected = commits[:limit]
-    next_cursor = selected[-1][0] if selected else since_cursor
+@health_router.tool(
+    name="health.wait_for_changes",
+    description="Wait until a health sync commit newer than since_cursor appears (long poll), then return it like list_changes. Returns an empty page with timed_out=true after timeout_s. Use instead of polling list_changes in a loop.",
+)
+async def wait_for_changes(
+    since_cursor: Annotated[
+        str,
+        Field(description="Cursor (commit_id) from a previous list_changes / wait_for_changes call."),
+    ],
+    timeout_s: Annotated[
+        int,
+        Field(description="Maximum number of seconds to wait.", ge=0, le=300),
+    ] = 30,
+    limit: Annotated[
+        int,
+        Field(description="Maximum number of commits to return.", gt=0, le=1000),
+    ] = 100,
+    include_raw_types: Annotated[
+        bool,
+        Field(description="When true, enrich each changed date with raw type status/record_count/relpath from its manifest."),
+    ] = True,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return await _wait_for_changes_impl(
+        since_cursor=since_cursor,
+        timeout_s=timeout_s,
+        limit=limit,
+        include_raw_types=include_raw_types,
+        backend=_resolve_storage_backend(storage_backend),
+    )
 
-    changes: list[dict[str, Any]] = []
-    for _, commit in selected:
-        enriched_commit = dict(commit)
-        dates = enriched_commit.get("dates")
-        if include_raw_types and isinstance(dates, list):
-            enriched_dates: list[dict[str, Any]] = []
-            for item in dates:
-                if not isinstance(item, dict):
-                    continue
-                enriched_item = dict(item)
-                relpath = enriched_item.get("raw_manifest_relpath")
-                if isinstance(relpath, str) and relpath:
-                    try:
-                        manifest = _read_json(backend, relpath)
-                    except _DataNotFound:
-                        enriched_item["raw_types"] = None
-                    else:
-                        enriched_item["raw_types"] = _manifest_types(manifest)
-                else:
-                    enriched_item["raw_types"] = None
-                enriched_dates.append(enriched_item)
-            enriched_commit["dates"] = enriched_dates
-        changes.append(enriched_commit)
 
-    return {
-        "storage_backend": backend.backend,
-        "since_cursor": since_cursor,
-        "next_cursor": next_cursor,
-        "changes": changes,
-    }
+@health_router.tool(
+    name="health.sync_warehouse",
+    description="Incrementally sync the local SQLite health warehouse from the commit log. Only dates named in commits after the stored cursor are re-imported.",
+)
+def sync_warehouse(
+    include_raw_samples: Annotated[
+        bool | None,
+        Field(description="Also import per-sample rows for raw types. Defaults to the previous sync's setting (false on first sync)."),
+    ] = None,
+    type_keys: Annotated[
+        list[str] | None,
+        Field(description="Optional raw type keys to import. Defaults to the previous sync's setting (all types on first sync)."),
+    ] = None,
+    max_commits: Annotated[
+        int,
+        Field(description="Maximum number of commits to consume in this call.", gt=0, le=100000),
+    ] = 10000,
+    rebuild: Annotated[
+        bool,
+        Field(description="Drop the warehouse contents and cursor, then re-import from the start of the commit log."),
+    ] = False,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to read from."),
+    ] = "auto",
+) -> dict[str, Any]:
+    return _sync_warehouse_impl(
+        include_raw_samples=include_raw_samples,
+        type_keys=type_keys,
+        max_commits=max_commits,
+        rebuild=rebuild,
+        backend=_resolve_storage_backend(storage_backend),
+    )
+
+
+@health_router.tool(
+    name="health.query_warehouse",
+    description=(
+        "Run a parameterized, read-only SQL query against the local health warehouse. "
+        "Tables: daily_metrics(date, metric_key, value, status, unit, commit_id), "
+        "samples(type_key, date, record_index, start_time, end_time, start_ms, end_ms, value, unit, "
+        "category_value, category_label, source_name, source_bundle_id, device_model, components), "
+        "ingested_dates(date, daily_commit_id, raw_commit_id, ingested_at)."
+    ),
+)
+def query_warehouse(
+    sql: Annotated[
+        str,
+        Field(description="A single SELECT statement. Use ? placeholders for values."),
+    ],
+    params: Annotated[
+        list[str | int | float | None] | None,
+        Field(description="Positional parameter values for ? placeholders, bound as given (text, integer, real, or null)."),
+    ] = None,
+    max_rows: Annotated[
+        int,
+        Field(description="Maximum number of result rows to return.", gt=0, le=10000),
+    ] = 1000,
+    sync: Annotated[
+        bool,
+        Field(description="Sync the warehouse from the commit log before querying (one commit-log scan per call)."),
+    ] = False,
+    storage_backend: Annotated[
+        Literal["auto", "s3_object_store"],
+        Field(description="Storage backend to sync from when sync is enabled."),
+    ] = "auto",
+) -> dict[str, Any]:
+    sync_result = None
+    if sync:
+        sync_result = _sync_warehouse_impl(
+            include_raw_samples=None,
+            type_keys=None,
+            max_commits=10000,
+            rebuild=False,
+            backend=_resolve_storage_backend(storage_backend),
+        )
+    result = _query_warehouse_impl(sql=sql, params=params, max_rows=max_rows)
+    result["sync"] = sync_result
+    return result
@@ -0,0 +1,107 @@
+"""Raw Health JSONL parsing shared by the health tools and their process-pool workers.
+
+This module only imports the standard library so spawned workers start without loading FastMCP.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+from array import array
+from collections.abc import Iterable
+from typing import Any
+
+COLUMNAR_MISSING_TIME = -(2**63)
+COLUMNAR_MISSING_INT = -1
+COLUMNAR_NUMERIC_FIELDS: tuple[tuple[str, str], ...] = (
+    ("start_ms", "q"),
+    ("end_ms", "q"),
+    ("value", "d"),
+    ("category_value", "q"),
+)
+COLUMNAR_STRING_FIELDS: tuple[str, ...] = (
+    "category_label",
+    "unit",
+    "source_name",
+    "source_bundle_id",
+    "device_model",
+)
+EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+ColumnarChunk = tuple[dict[str, array], list[str], bytes]
+
+
+def coerce_numeric(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        result = float(value)
+        if math.isfinite(result):
+            return result
+    return None
+
+
+def iso_to_epoch_ms(value: Any) -> int:
+    if not isinstance(value, str):
+        return COLUMNAR_MISSING_TIME
+    try:
+        parsed = dt.datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return COLUMNAR_MISSING_TIME
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+    return (parsed - EPOCH) // dt.timedelta(milliseconds=1)
+
+
+def parse_columnar_lines(lines: Iterable[bytes]) -> ColumnarChunk:
+    """Parse sample lines into typed columns, a local string table, and the verbatim record bytes."""
+    columns: dict[str, array] = {name: array(typecode) for name, typecode in COLUMNAR_NUMERIC_FIELDS}
+    for name in COLUMNAR_STRING_FIELDS:
+        columns[name] = array("i")
+    record_offsets = array("q", [0])
+    columns["record_offset"] = record_offsets
+    start_ms = columns["start_ms"]
+    end_ms = columns["end_ms"]
+    values = columns["value"]
+    category_values = columns["category_value"]
+    string_columns = [(name, columns[name]) for name in COLUMNAR_STRING_FIELDS]
+    interned: dict[str, int] = {}
+    records = bytearray()
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(value, dict) or value.get("record") != "sample":
+            continue
+        start_value = value.get("start")
+        end_value = value.get("end")
+        sample_start_ms = iso_to_epoch_ms(start_value)
+        start_ms.append(sample_start_ms)
+        end_ms.append(sample_start_ms if end_value == start_value else iso_to_epoch_ms(end_value))
+        numeric = coerce_numeric(value.get("value"))
+        values.append(math.nan if numeric is None else numeric)
+        category = value.get("category_value")
+        category_values.append(
+            category if isinstance(category, int) and not isinstance(category, bool) else COLUMNAR_MISSING_INT
+        )
+        for name, column in string_columns:
+            text = value.get(name)
+            if isinstance(text, str):
+                column.append(interned.setdefault(text, len(interned)))
+            else:
+                column.append(COLUMNAR_MISSING_INT)
+        records.extend(line)
+        record_offsets.append(len(records))
+
+    return columns, list(interned), bytes(records)
+
+
+def parse_columnar_bytes(data: bytes) -> ColumnarChunk:
+    """Process-pool entry point: parse one newline-aligned slice of a decoded JSONL file."""
+    return parse_columnar_lines(data.split(b"\n"))